@@ -1,1433 +1,5844 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
-import io
-import re
-import requests
-
-# Configuração da página
-st.set_page_config(
-    page_title="Projeto Predição de Editais - CIC2025",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# CSS customizado para interface profissional
-st.markdown("""
-<style>
-    /* Tema principal */
-    .main-header {
-        background: linear-gradient(90deg, #1e3a8a 0%, #3b82f6 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-    }
-    
-    .main-header h1 {
-        color: white;
-        margin: 0;
-        font-weight: 600;
-    }
-    
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        border-left: 4px solid #3b82f6;
-        margin: 0.5rem 0;
-    }
-    
-    .filter-section {
-        background: #f8fafc;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    
-    .alert-info {
-        background: #dbeafe;
-        border: 1px solid #3b82f6;
-        color: #1e40af;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    
-    .alert-success {
-        background: #dcfce7;
-        border: 1px solid #16a34a;
-        color: #15803d;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    
-    .alert-warning {
-        background: #fef3c7;
-        border: 1px solid #f59e0b;
-        color: #92400e;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    
-    .sidebar .sidebar-content {
-        background: #f1f5f9;
-    }
-    
-    /* Estilo para métricas */
-    .metric-container {
-        display: flex;
-        flex-wrap: wrap;
-        gap: 1rem;
-        margin: 1rem 0;
-    }
-    
-    /* Botões personalizados */
-    .stButton > button {
-        background: linear-gradient(90deg, #3b82f6 0%, #1d4ed8 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.5rem 1rem;
-        font-weight: 500;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(59, 130, 246, 0.3);
-    }
-    
-    /* Estilo para selectbox */
-    .stSelectbox > div > div {
-        border-radius: 8px;
-    }
-    
-    /* Tabelas */
-    .dataframe {
-        border-radius: 8px;
-        overflow: hidden;
-    }
-    
-    /* Loading spinner personalizado */
-    .loading-container {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        padding: 2rem;
-    }
-    
-    /* Botão de exportação customizado */
-    .export-button-container {
-        display: flex;
-        justify-content: flex-end;
-        margin: 1rem 0;
-        padding: 0.5rem;
-    }
-    
-    /* Seção de filtros avançados */
-    .advanced-search {
-        background: #f1f5f9;
-        border: 1px solid #cbd5e1;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 0.5rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# URL do SharePoint (pode precisar de autenticação)
-SHAREPOINT_URL = "https://tcerj365-my.sharepoint.com/:x:/g/personal/emanuellipc_tcerj_tc_br/EXQxKC-8-uNLu-RCyhK6sjwB4pljoEYgoup6g-mJ5iHlwA?e=DDbJpE"
-# Tentativa de conversão para download direto
-SHAREPOINT_CSV_URL = "https://tcerj365-my.sharepoint.com/:x:/g/personal/emanuellipc_tcerj_tc_br/EXQxKC-8-uNLu-RCyhK6sjwB4pljoEYgoup6g-mJ5iHlwA?e=DDbJpE&download=1"
-
-@st.cache_data(ttl=300)  # Cache por 5 minutos
-def load_data_from_sharepoint():
-    """Carrega dados diretamente do SharePoint"""
-    try:
-        # Primeira tentativa - URL com download=1
-        try:
-            response = requests.get(SHAREPOINT_CSV_URL, timeout=30)
-            response.raise_for_status()
-        except:
-            # Segunda tentativa - URL original
-            response = requests.get(SHAREPOINT_URL, timeout=30)
-            response.raise_for_status()
-        
-        # Primeiro, tenta o método padrão mais robusto
-        try:
-            df = pd.read_csv(
-                io.StringIO(response.text),
-                encoding='utf-8',
-                sep=',',
-                quotechar='"',
-                escapechar='\\',
-                on_bad_lines='skip',  # Pula linhas problemáticas
-                engine='python',  # Engine mais tolerante
-                dtype=str,  # Carrega tudo como string primeiro
-                low_memory=False
-            )
-        except Exception as e1:
-            # Método alternativo - tenta com delimitador automático
-            try:
-                df = pd.read_csv(
-                    io.StringIO(response.text),
-                    sep=None,  # Detecta automaticamente o delimitador
-                    engine='python',
-                    encoding='utf-8',
-                    on_bad_lines='skip',
-                    dtype=str
-                )
-            except Exception as e2:
-                # Último recurso - verifica se é HTML (página de login)
-                if "<html" in response.text.lower() or "sign in" in response.text.lower():
-                    return None, "SharePoint requer autenticação - use upload manual ou configure permissões públicas"
-                
-                return None, f"Erro de parsing: {str(e1)}. Tentativa alternativa: {str(e2)}"
-        
-        # Remove linhas completamente vazias
-        df = df.dropna(how='all')
-        
-        # Remove colunas que são completamente vazias ou têm nomes inválidos
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-        df = df.dropna(axis=1, how='all')
-        
-        # Conversões de tipos mais seguras
-        if 'data realizacao licitacao' in df.columns:
-            df['data realizacao licitacao'] = pd.to_datetime(df['data realizacao licitacao'], errors='coerce')
-        
-        if 'ano' in df.columns:
-            df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
-        
-        if 'Valor Estimado' in df.columns:
-            # Remove caracteres não numéricos exceto pontos e vírgulas
-            df['Valor Estimado'] = df['Valor Estimado'].astype(str).str.replace(r'[^\d.,]', '', regex=True)
-            df['Valor Estimado'] = df['Valor Estimado'].str.replace(',', '.', regex=False)
-            df['Valor Estimado'] = pd.to_numeric(df['Valor Estimado'], errors='coerce')
-        
-        if 'pontuacao' in df.columns:
-            df['pontuacao'] = df['pontuacao'].astype(str).str.replace(',', '.', regex=False)
-            df['pontuacao'] = pd.to_numeric(df['pontuacao'], errors='coerce')
-            
-        if 'pontuacao_final' in df.columns:
-            df['pontuacao_final'] = df['pontuacao_final'].astype(str).str.replace(',', '.', regex=False)
-            df['pontuacao_final'] = pd.to_numeric(df['pontuacao_final'], errors='coerce')
-        
-        # Processamento da coluna observacoes - preenche valores em branco
-        if 'observacoes' in df.columns:
-            df['observacoes'] = df['observacoes'].apply(
-                lambda x: x if pd.notna(x) and str(x).strip() != '' else 'Classificação baseada em Termos Chave'
-            )
-        
-        # Renomeação de colunas específicas
-        column_renames = {
-            'Nova Classificação': 'Nova Predição',
-            'observacoes': 'Observações'
-        }
-        
-        for old_name, new_name in column_renames.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
-        
-        # Remoção de duplicatas ignorando a coluna 'classificacao_final'
-        columns_for_dedup = [col for col in df.columns if col != 'classificacao_final']
-        if columns_for_dedup:
-            df = df.drop_duplicates(subset=columns_for_dedup, keep='first')
-        
-        # Processamento da coluna observacoes - preenche valores em branco
-        if 'observacoes' in df.columns:
-            df['observacoes'] = df['observacoes'].apply(
-                lambda x: x if pd.notna(x) and str(x).strip() != '' else 'Classificação baseada em Termos Chave'
-            )
-        
-        # Validação final - se o dataframe está vazio ou muito pequeno
-        if len(df) == 0:
-            return None, "Nenhum dado válido encontrado na planilha"
-        
-        if len(df.columns) < 5:
-            return None, "Estrutura de dados incompleta - muito poucas colunas"
-            
-        return df, None
-        
-    except requests.exceptions.RequestException as e:
-        if "403" in str(e) or "401" in str(e):
-            return None, "Acesso negado - SharePoint requer permissões ou autenticação"
-        return None, f"Erro de conexão: {str(e)}"
-    except pd.errors.EmptyDataError:
-        return None, "Planilha está vazia ou não contém dados válidos"
-    except pd.errors.ParserError as e:
-        return None, f"Erro de formatação dos dados: {str(e)}"
-    except Exception as e:
-        return None, f"Erro inesperado: {str(e)}"
-
-def extract_unique_categories(df, column_name):
-    """Extrai categorias únicas de uma coluna multi-label (separadas por ; ou ,)"""
-    if column_name not in df.columns:
-        return []
-    
-    unique_categories = set()
-    for value in df[column_name].dropna():
-        if pd.isna(value):
-            continue
-        
-        value_str = str(value).strip()
-        if not value_str:
-            continue
-            
-        # Separadores possíveis: ; ou ,
-        if ';' in value_str:
-            categories = [cat.strip() for cat in value_str.split(';') if cat.strip()]
-        elif ',' in value_str:
-            categories = [cat.strip() for cat in value_str.split(',') if cat.strip()]
-        else:
-            categories = [value_str]
-        
-        unique_categories.update(categories)
-    
-    # Remover valores vazios e limitar a 14 categorias
-    unique_categories = [cat for cat in unique_categories if cat and cat != 'nan']
-    return sorted(list(unique_categories))[:14]
-
-def create_overview_metrics(df):
-    """Cria métricas de visão geral com dados fixos da base completa"""
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric(
-            label="📋 Total de Editais",
-            value="52.429",
-            delta=None
-        )
-    
-    with col2:
-        st.metric(
-            label="💰 Valor Total Estimado",
-            value="R$ 244 Bilhões",
-            delta=None
-        )
-    
-    with col3:
-        st.metric(
-            label="🏷️ Categorias Únicas",
-            value="14",
-            delta=None
-        )
-    
-    with col4:
-        st.metric(
-            label="🏢 Unidades Únicas",
-            value="729",
-            delta=None
-        )
-
-def apply_advanced_search(df, search_params):
-    """Aplica busca avançada com operadores lógicos - versão aprimorada"""
-    if not search_params or not any(search_params.values()):
-        return df
-    
-    search_columns = ['objeto', 'unidade', 'observacoes', 'todos_termos', 'descricao situacao edital', 'objeto_processada']
-    search_columns = [col for col in search_columns if col in df.columns]
-    
-    if not search_columns:
-        return df
-    
-    # CORREÇÃO: Reset do índice para evitar problemas com filtros sucessivos
-    df_search = df.reset_index(drop=True)
-    
-    # Inicializa máscara como True (todos os registros)
-    final_mask = pd.Series(True, index=df_search.index)
-    
-    # Termos que deve conter (AND)
-    if search_params.get('contains_and'):
-        search_text = search_params['contains_and'].strip()
-        
-        if ';' in search_text:
-            # Se tem ponto e vírgula, cada termo é independente (TODOS devem estar presentes)
-            terms = [term.strip().lower() for term in search_text.split(';') if term.strip()]
-            for term in terms:
-                term_mask = pd.Series(False, index=df_search.index)
-                for col in search_columns:
-                    term_mask |= df_search[col].fillna('').astype(str).str.lower().str.contains(term, na=False, regex=False)
-                final_mask &= term_mask
-        else:
-            # Se não tem ponto e vírgula, trata como frase única
-            search_phrase = search_text.lower()
-            phrase_mask = pd.Series(False, index=df_search.index)
-            for col in search_columns:
-                phrase_mask |= df_search[col].fillna('').astype(str).str.lower().str.contains(search_phrase, na=False, regex=False)
-            final_mask &= phrase_mask
-    
-    # Termos que deve conter (OR)
-    if search_params.get('contains_or'):
-        search_text = search_params['contains_or'].strip()
-        
-        if ';' in search_text:
-            # Se tem ponto e vírgula, cada termo é independente (QUALQUER um pode estar presente)
-            terms = [term.strip().lower() for term in search_text.split(';') if term.strip()]
-            if terms:
-                or_mask = pd.Series(False, index=df_search.index)
-                for term in terms:
-                    term_mask = pd.Series(False, index=df_search.index)
-                    for col in search_columns:
-                        term_mask |= df_search[col].fillna('').astype(str).str.lower().str.contains(term, na=False, regex=False)
-                    or_mask |= term_mask
-                final_mask &= or_mask
-        else:
-            # Se não tem ponto e vírgula, trata como frase única
-            search_phrase = search_text.lower()
-            phrase_mask = pd.Series(False, index=df_search.index)
-            for col in search_columns:
-                phrase_mask |= df_search[col].fillna('').astype(str).str.lower().str.contains(search_phrase, na=False, regex=False)
-            final_mask &= phrase_mask
-    
-    # Termos que NÃO deve conter
-    if search_params.get('not_contains'):
-        search_text = search_params['not_contains'].strip()
-        
-        if ';' in search_text:
-            # Se tem ponto e vírgula, cada termo é independente
-            terms = [term.strip().lower() for term in search_text.split(';') if term.strip()]
-            for term in terms:
-                term_mask = pd.Series(False, index=df_search.index)
-                for col in search_columns:
-                    term_mask |= df_search[col].fillna('').astype(str).str.lower().str.contains(term, na=False, regex=False)
-                final_mask &= ~term_mask
-        else:
-            # Se não tem ponto e vírgula, trata como frase única
-            search_phrase = search_text.lower()
-            phrase_mask = pd.Series(False, index=df_search.index)
-            for col in search_columns:
-                phrase_mask |= df_search[col].fillna('').astype(str).str.lower().str.contains(search_phrase, na=False, regex=False)
-            final_mask &= ~phrase_mask
-    
-    # CORREÇÃO: Retornar o DataFrame original com os índices filtrados
-    filtered_indices = df_search.index[final_mask]
-    return df.iloc[filtered_indices].reset_index(drop=True)
-
-def apply_nova_predicao_filter(df, selected_category):
-    """Aplica filtro de containment para Nova Predição"""
-    if selected_category == 'Todas' or 'Nova Predição' not in df.columns:
-        return df
-    
-    # Reset do índice para trabalhar com dados limpos
-    df_clean = df.reset_index(drop=True)
-    
-    # Máscara para filtrar registros que CONTÊM a categoria selecionada
-    mask = pd.Series(False, index=df_clean.index)
-    
-    for idx, value in df_clean['Nova Predição'].items():
-        if pd.isna(value):
-            continue
-            
-        value_str = str(value).strip().upper()
-        selected_cat_upper = selected_category.upper()
-        
-        if not value_str:
-            continue
-        
-        # Verifica se contém a categoria (busca parcial/containment)
-        if selected_cat_upper in value_str:
-            mask.iloc[idx] = True
-    
-    return df_clean[mask].reset_index(drop=True)
-
-def apply_filters(df, search_params, filters):
-    """Aplica os filtros ao dataframe com tratamento melhorado de erros - VERSÃO CORRIGIDA"""
-    # CORREÇÃO: Sempre começar com uma cópia limpa dos dados originais
-    filtered_df = df.copy().reset_index(drop=True)
-    
-    # Aplicar busca avançada primeiro (trabalha com dados limpos)
-    filtered_df = apply_advanced_search(filtered_df, search_params)
-    
-    # Aplicar filtros específicos sequencialmente
-    for column, value in filters.items():
-        if value not in ['Todas', 'Todos']:
-            # Filtro especial para Nova Predição - busca por containment
-            if column == 'Nova Predição':
-                filtered_df = apply_nova_predicao_filter(filtered_df, value)
-            else:
-                # Filtro exato para outras colunas
-                filtered_df = filtered_df[
-                    filtered_df[column].fillna('').astype(str) == str(value)
-                ]
-                filtered_df = filtered_df.reset_index(drop=True)
-    
-    return filtered_df
-
-def create_charts(df):
-    """Cria gráficos de análise"""
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        if 'unidade' in df.columns and len(df) > 0:
-            # Gráfico de quantidade de editais por coordenadoria
-            unidade_counts = df['unidade'].value_counts().head(10)
-            
-            if len(unidade_counts) > 0:
-                fig_bar = px.bar(
-                    x=unidade_counts.values,
-                    y=unidade_counts.index,
-                    orientation='h',
-                    title="📊 Quantidade de Editais por Coordenadoria",
-                    labels={'x': 'Quantidade', 'y': 'Coordenadoria'},
-                    color=unidade_counts.values,
-                    color_continuous_scale='Blues'
-                )
-                fig_bar.update_layout(
-                    height=400,
-                    showlegend=False,
-                    yaxis={'categoryorder': 'total ascending'}
-                )
-                st.plotly_chart(fig_bar, use_container_width=True)
-    
-    with col2:
-        if 'unidade' in df.columns and 'Valor Estimado' in df.columns and len(df) > 0:
-            # Gráfico das maiores coordenadorias por Valor Estimado
-            unidade_valores = df.groupby('unidade')['Valor Estimado'].sum().sort_values(ascending=False).head(8)
-            
-            if len(unidade_valores) > 0:
-                fig_pie = px.pie(
-                    values=unidade_valores.values,
-                    names=unidade_valores.index,
-                    title="💰 Maiores Coordenadorias por Valor Estimado"
-                )
-                fig_pie.update_layout(height=400)
-                st.plotly_chart(fig_pie, use_container_width=True)
-    
-    # Gráfico temporal se houver dados de data
-    if 'ano' in df.columns and len(df) > 0:
-        st.markdown("### 📈 Evolução Temporal")
-        temporal_data = df['ano'].value_counts().sort_index()
-        
-        if len(temporal_data) > 0:
-            fig_line = px.line(
-                x=temporal_data.index,
-                y=temporal_data.values,
-                title="Editais por Ano",
-                labels={'x': 'Ano', 'y': 'Quantidade de Editais'},
-                markers=True
-            )
-            fig_line.update_layout(height=400)
-            st.plotly_chart(fig_line, use_container_width=True)
-
-def create_export_button(df, columns_to_show):
-    """Cria botão de exportação automática"""
-    col1, col2, col3 = st.columns([2, 1, 1])
-    
-    with col3:  # Posiciona no lado direito
-        export_format = st.selectbox(
-            "Formato:",
-            ["CSV", "XLSX"],
-            key="export_format"
-        )
-        
-        if st.button("📥 Exportar Filtrados", type="primary"):
-            export_data = df[columns_to_show] if columns_to_show else df
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            
-            if export_format == "CSV":
-                csv_data = export_data.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download CSV",
-                    data=csv_data,
-                    file_name=f"editais_filtrados_{timestamp}.csv",
-                    mime="text/csv",
-                    type="primary"
-                )
-                st.success("✅ Arquivo CSV preparado para download!")
-                
-            else:  # XLSX
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    export_data.to_excel(writer, index=False, sheet_name='Editais_Filtrados')
-                
-                st.download_button(
-                    label="📥 Download XLSX",
-                    data=output.getvalue(),
-                    file_name=f"editais_filtrados_{timestamp}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    type="primary"
-                )
-                st.success("✅ Arquivo XLSX preparado para download!")
-
-def display_data_table(df):
-    """Exibe a tabela de dados com opções de visualização"""
-    st.markdown("### 📋 Dados dos Editais")
-    
-    # Definir colunas padrão na ordem especificada
-    default_columns = [
-        'Nova Predição',
-        'Predição Antiga',
-        'Ano',
-        'Mês',
-        'Ente',
-        'Unidade',
-        'Objeto',
-        'Valor Estimado',
-        'observacoes'
-    ]
-    
-    # Filtrar apenas as colunas que existem no DataFrame
-    default_columns = [col for col in default_columns if col in df.columns]
-    
-    # Obter todas as colunas do DataFrame
-    all_columns = list(df.columns)
-    
-    # Opções de visualização
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        columns_to_show = st.multiselect(
-            "📊 Selecionar colunas para exibir",
-            options=all_columns,
-            default=default_columns,
-            help="Selecione as colunas que deseja visualizar"
-        )
-    
-    with col2:
-        rows_per_page = st.selectbox(
-            "📄 Linhas por página",
-            [10, 25, 50, 100],
-            index=1
-        )
-    
-    # Flag para mostrar apenas alterações de classificação
-    show_only_changes = st.checkbox(
-        "📊 Exibir apenas editais com classificações alteradas",
-        help="Mostra apenas editais onde Nova Predição ≠ Predição Antiga"
-    )
-    
-    # Aplicar filtro de alterações se solicitado
-    display_df = df.copy()
-    if show_only_changes and 'Nova Predição' in df.columns and 'Predição Antiga' in df.columns:
-        display_df = df[df['Nova Predição'].fillna('') != df['Predição Antiga'].fillna('')]
-        if len(display_df) == 0:
-            st.warning("⚠️ Nenhum edital com classificação alterada encontrado nos dados filtrados.")
-            return
-        else:
-            st.info(f"📋 Mostrando {len(display_df):,} editais com classificações alteradas de {len(df):,} totais ({(len(display_df)/len(df)*100):.1f}%)")
-    
-    if columns_to_show and len(display_df) > 0:
-        # Paginação
-        total_rows = len(display_df)
-        total_pages = (total_rows - 1) // rows_per_page + 1
-        
-        if total_pages > 1:
-            page = st.number_input(
-                f"Página (1 de {total_pages})",
-                min_value=1,
-                max_value=total_pages,
-                value=1
-            ) - 1
-        else:
-            page = 0
-        
-        start_idx = page * rows_per_page
-        end_idx = start_idx + rows_per_page
-        
-        # Exibir dados
-        page_df = display_df[columns_to_show].iloc[start_idx:end_idx].copy()
-        
-        # Formatação condicional para valores monetários
-        if 'Valor Estimado' in page_df.columns:
-            page_df['Valor Estimado'] = page_df['Valor Estimado'].apply(
-                lambda x: f"R$ {x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if pd.notna(x) else 'N/A'
-            )
-        
-        # Formatação para pontuações
-        for col in ['pontuacao', 'pontuacao_final']:
-            if col in page_df.columns:
-                page_df[col] = page_df[col].apply(
-                    lambda x: f"{x:.2f}" if pd.notna(x) else 'N/A'
-                )
-        
-        # Preenchimento automático para observações em branco
-        if 'Observações' in page_df.columns:
-            page_df['Observações'] = page_df['Observações'].apply(
-                lambda x: x if pd.notna(x) and str(x).strip() != '' else 'Classificação baseada em Termos Chave'
-            )
-        
-        st.dataframe(
-            page_df,
-            use_container_width=True,
-            height=400
-        )
-        
-        # Informações da paginação
-        st.info(f"Exibindo {start_idx + 1}-{min(end_idx, total_rows)} de {total_rows} registros")
-        
-        # Botão de exportação reposicionado (lado inferior direito)
-        create_export_button(display_df, columns_to_show)
-
-def show_help_tab():
-    """Mostra a aba de ajuda e instruções"""
-    st.markdown("""
-    # 📚 Como Usar o Projeto Predição de Editais - CIC2025
-    
-    ## 🚀 Início Rápido
-    
-    ### 1. Escopo da Base de Dados
-    - **52.429 editais** analisados e classificados
-    - **R$ 244 bilhões** em valor total estimado
-    - **729 coordenadorias/unidades** organizacionais mapeadas
-    - **14 categorias originais** + **2 novas categorias** criadas
-    - Sistema carrega amostras para consulta interativa
-    
-    ### 2. Dados Automáticos
-    - Os dados são carregados automaticamente do SharePoint TCERJ
-    - Sistema atualiza a cada 5 minutos para manter dados frescos
-    - Não é necessário fazer upload manual (se configurado corretamente)
-    
-    ### 3. Navegação
-    O sistema possui **3 abas principais**:
-    - **📊 Análise de Dados**: Visualização principal com filtros e tabelas
-    - **📈 Dashboard**: Gráficos e estatísticas detalhadas
-    - **📚 Ajuda**: Esta seção com instruções
-    
-    ## 🔍 Funcionalidades de Pesquisa Avançada
-    
-    ### Busca Avançada com Operadores Lógicos
-    A seção "🔍 Busca Avançada" permite diferentes tipos de filtros com **duas modalidades de busca**:
-    
-    #### 🔤 **Modalidades de Busca:**
-    
-    **1. Busca por Frase Completa (SEM ponto e vírgula)**
-    - Digite termos **sem ponto e vírgula (;)** para buscar a frase exata
-    - **Exemplo**: "bens permanentes" → encontra registros que contenham exatamente esta sequência
-    - **Exemplo**: "material de escritório" → busca esta frase completa
-    - **Uso**: Ideal para termos compostos que devem aparecer juntos
-    
-    **2. Busca por Termos Separados (COM ponto e vírgula)**
-    - Use **ponto e vírgula (;)** para separar termos que podem aparecer em qualquer lugar
-    - **Exemplo**: "bens; permanentes" → encontra registros que contenham "bens" E "permanentes" separadamente
-    - **Exemplo**: "material; escritório" → busca por ambos os termos em qualquer posição
-    - **Uso**: Ideal para buscar conceitos relacionados que podem estar em partes diferentes do texto
-    
-    #### 📝 **Tipos de Filtros:**
-    
-    #### 1. **Contém TODOS os termos (E)**
-    - **Frase**: "educação infantil" → registros com esta frase exata
-    - **Termos**: "educação; construção" → registros que contenham **tanto** "educação" **quanto** "construção"
-    - **Uso prático**: Encontrar editais que atendam múltiplos critérios simultaneamente
-    
-    #### 2. **Contém ALGUM termo (OU)**
-    - **Frase**: "centro de saúde" → registros com esta frase específica
-    - **Termos**: "hospital; posto; upa" → registros com **qualquer um** desses termos
-    - **Uso prático**: Buscar variações de um mesmo conceito
-    
-    #### 3. **NÃO contém (Filtro Negativo)**
-    - **Frase**: "serviços terceirizados" → exclui registros com esta frase exata
-    - **Termos**: "consultoria; terceirizado" → exclui registros com qualquer um desses termos
-    - **Uso prático**: Refinar resultados removendo categorias indesejadas
-    
-    ## 📂 Filtro "Nova Predição" com Busca por Containment
-    
-    ### Funcionalidade Especial para Categorias
-    O filtro "📂 Nova Predição" utiliza **busca por containment** (contém):
-    
-    #### Como Funciona
-    - **Busca Parcial**: Não precisa coincidir exatamente - funciona com ocorrências parciais
-    - **Categoria Única**: Se um edital tem apenas "EDUCAÇÃO", será encontrado ao selecionar "EDUCAÇÃO"
-    - **Categorias Múltiplas**: Se um edital tem "EDUCAÇÃO; SAÚDE", será encontrado ao selecionar **qualquer uma** das categorias
-    - **Aplicação Sequencial**: Os filtros são aplicados um após o outro, mantendo a consistência
-    
-    #### Exemplos Práticos
-    - **Selecionando "EDUCAÇÃO"** encontra:
-      - ✅ Editais com classificação: "EDUCAÇÃO"
-      - ✅ Editais com classificação: "EDUCAÇÃO; SAÚDE"
-      - ✅ Editais com classificação: "INFRAESTRUTURA; EDUCAÇÃO; TRANSPORTE"
-    
-    ## 🔄 Sistema de Filtros Corrigido
-    
-    ### Aplicação Sequencial
-    - **Múltiplas aplicações**: Os filtros agora podem ser aplicados múltiplas vezes
-    - **Ordem de aplicação**: Busca avançada primeiro, depois filtros específicos
-    - **Consistência**: Cada filtro mantém o estado anterior
-    - **Reset de índices**: Cada etapa reseta os índices para evitar erros
-    
-    ### Filtros Disponíveis
-    1. **Nova Predição**: Busca por containment (contém)
-    2. **Predição Antiga**: Busca exata
-    3. **Ano**: Busca exata
-    4. **Unidade**: Busca exata
-    
-    ## 📥 Sistema de Exportação Aprimorado
-    
-    ### Localização e Funcionalidade
-    - **Posicionamento**: Botão azul no **lado inferior direito** da tabela
-    - **Exportação Automática**: Clique único inicia o download automaticamente
-    - **Sem Confirmações**: Processo otimizado sem etapas extras
-    
-    ### Opções de Formato
-    - **CSV**: Formato universal para análise em Excel, Python, R
-    - **XLSX**: Formato Excel nativo com formatação preservada
-    
-    ### Dados Exportados
-    - **Apenas dados filtrados** são exportados (respeita todos os filtros aplicados)
-    - **Colunas selecionadas** na interface são mantidas na exportação
-    - **Formatação preservada** para valores monetários e datas
-    - **Nome automático** com timestamp: `editais_filtrados_YYYYMMDD_HHMMSS`
-    
-    ## 💡 Dicas de Uso Avançado
-    
-    ### Para Gestores CIC
-    1. **Análise Comparativa**: Use filtros de containment para categorias complexas
-    2. **Busca Estratégica**: Combine operadores E/OU para análises precisas
-    3. **Exportação Seletiva**: Filtre dados específicos antes de exportar
-    4. **Monitoramento**: Use filtros negativos para excluir categorias não relevantes
-    
-    ### Para Analistas
-    1. **Pesquisa Complexa**: Combine múltiplos operadores para análises detalhadas
-    2. **Validação de Dados**: Use exportação para validação externa
-    3. **Análise Temporal**: Combine filtros de ano com categorias específicas
-    4. **Comparação Metodológica**: Explore divergências entre predições
-    
-    ### Fluxo de Trabalho Recomendado
-    1. **Definir Objetivo**: O que você quer analisar?
-    2. **Aplicar Filtros Básicos**: Unidade, ano, modalidade
-    3. **Refinar com Busca Avançada**: Use operadores lógicos
-    4. **Aplicar Filtro de Predição**: Use containment para categorias
-    5. **Validar Resultados**: Verifique se os dados fazem sentido
-    6. **Exportar para Análise**: Use formato apropriado (CSV/XLSX)
-    
-    ## 🔧 Solução de Problemas
-    
-    ### Busca Avançada
-    - **Sem resultados**: Verifique se os operadores estão corretos
-    - **Muitos resultados**: Use filtros negativos para refinar
-    - **Termos não encontrados**: Verifique ortografia e use sinônimos
-    
-    ### Filtros de Predição
-    - **Categoria não aparece**: Verificar se existe na base de dados
-    - **Resultados inesperados**: Lembrar que busca é por containment (contém)
-    - **Filtros não aplicam**: Verificar se há dados para filtrar
-    
-    ### Exportação
-    - **Download não inicia**: Aguardar processamento e tentar novamente
-    - **Arquivo muito grande**: Aplicar mais filtros para reduzir volume
-    - **Problemas de formatação**: Preferir XLSX para manter formatação
-    
-    ---
-    
-    > 💼 **Projeto Predição de Editais - CIC2025 | TCERJ**  
-    > **🔍 Novidades:** Busca Avançada | Filtros Containment | Aplicação Sequencial  
-    > Coordenadoria de Informações Estratégicas
-    """)
-
-def main():
-    """Função principal da aplicação"""
-    
-    # Header principal
-    st.markdown("""
-    <div class="main-header">
-        <div style="display: flex; justify-content: space-between; align-items: center;">
-            <div>
-                <h1>📊 Projeto Predição de Editais - CIC2025</h1>
-                <p style="color: #e2e8f0; margin: 0.5rem 0 0 0;">
-                    Ferramenta de Consulta de Editais - Versão Avançada (Corrigida)
-                </p>
-            </div>
-            <div style="margin-left: 2rem;">
-                <img src="https://tcerj365-my.sharepoint.com/:i:/g/personal/emanuellipc_tcerj_tc_br/EU_4T9vkz1BEmtF4qGFPdekB71dUQ1f_isaIoampssa5WQ?e=33qdcT" 
-                     alt="CIC TCERJ Logo" 
-                     style="height: 80px; width: auto; max-width: 150px; object-fit: contain;"
-                     onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
-                <!-- Fallback caso a imagem não carregue -->
-                <div style="width: 120px; height: 80px; background: rgba(255,255,255,0.1); border-radius: 8px; display: none; align-items: center; justify-content: center; color: white; font-size: 0.8rem;">
-                    LOGO<br>CIC TCERJ
-                </div>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Estatísticas gerais da base completa
-    st.markdown("""
-    <div class="alert-info">
-        <h4>📈 Escopo da Base de Dados Completa</h4>
-        <div style="display: flex; justify-content: space-around; text-align: center; margin: 1rem 0;">
-            <div>
-                <strong style="font-size: 1.5rem; color: #1e40af;">52.429</strong><br>
-                <span style="color: #64748b;">Editais Analisados</span>
-            </div>
-            <div>
-                <strong style="font-size: 1.5rem; color: #1e40af;">R$ 244 Bilhões</strong><br>
-                <span style="color: #64748b;">Valor Total Estimado</span>
-            </div>
-            <div>
-                <strong style="font-size: 1.5rem; color: #1e40af;">729</strong><br>
-                <span style="color: #64748b;">Unidades Mapeadas</span>
-            </div>
-            <div>
-                <strong style="font-size: 1.5rem; color: #1e40af;">14</strong><br>
-                <span style="color: #64748b;">Categorias</span>
-            </div>
-            <div>
-                <strong style="font-size: 1.5rem; color: #1e40af;">2</strong><br>
-                <span style="color: #64748b;">Novas Categorias</span>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Carregamento dos dados do SharePoint
-    with st.spinner("🔄 Carregando dados do SharePoint TCERJ..."):
-        df, error = load_data_from_sharepoint()
-        
-        # Add reload button
-        col1, col2 = st.columns([1, 3])
-        with col1:
-            if st.button("🔄 Recarregar Dados"):
-                st.cache_data.clear()
-                st.rerun()
-        
-        with col2:
-            st.markdown("*Atualização automática a cada 5min*")
-
-    # Show connection status in sidebar
-    st.sidebar.markdown("### 🔗 Status da Conexão")
-    st.sidebar.markdown(f"**URL da Planilha:** [Link TCERJ]({SHAREPOINT_URL})")
-
-    # Se houve erro, mostrar diagnóstico
-    if error:
-        st.error(f"❌ {error}")
-        
-        # Instruções específicas baseadas no tipo de erro
-        if "conexão" in error.lower() or "timeout" in error.lower():
-            st.markdown("""
-            <div class="alert-warning">
-                <h4>🌐 Problema de Conectividade</h4>
-                <p><strong>Soluções alternativas:</strong></p>
-                <ul>
-                    <li>Mude para "📄 Upload de Arquivo CSV" acima</li>
-                    <li>Baixe a planilha como CSV e faça upload manual</li>
-                    <li>Verifique sua conexão com a internet</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-            
-        elif "permission" in error.lower() or "403" in error.lower() or "autenticação" in error.lower():
-            st.markdown("""
-            <div class="alert-warning">
-                <h4>🔒 Problema de Permissão do SharePoint TCERJ</h4>
-                <p><strong>O SharePoint corporativo requer configurações especiais:</strong></p>
-                <h5>Opção 1: Configurar Acesso Público (Recomendado)</h5>
-                <ol>
-                    <li>Abra a planilha no SharePoint</li>
-                    <li>Clique em "Compartilhar" no canto superior direito</li>
-                    <li>Clique em "Qualquer pessoa com o link pode visualizar"</li>
-                    <li>Defina permissão como "Visualizar" apenas</li>
-                    <li>Copie o novo link público gerado</li>
-                    <li>Atualize o código com o novo link</li>
-                </ol>
-                <h5>Opção 2: Usar Upload Manual</h5>
-                <ol>
-                    <li>Baixe a planilha como Excel (.xlsx)</li>
-                    <li>Abra no Excel e salve como CSV (UTF-8)</li>
-                    <li>Use a opção "📄 Upload de Arquivo CSV" acima</li>
-                </ol>
-                <h5>Opção 3: Exportar para Serviço Público</h5>
-                <ul>
-                    <li>Exporte para Google Sheets público</li>
-                    <li>Ou coloque o arquivo em repositório GitHub</li>
-                    <li>Use um desses serviços no lugar do SharePoint corporativo</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-            
-        else:
-            st.markdown("""
-            <div class="alert-warning">
-                <h4>⚠️ Problema de Formatação dos Dados</h4>
-                <p><strong>Soluções recomendadas:</strong></p>
-                <ol>
-                    <li><strong>Limpar dados no Google Sheets:</strong>
-                        <ul>
-                            <li>Abra a planilha original</li>
-                            <li>Selecione todos os dados (Ctrl+A)</li>
-                            <li>Copie para uma nova planilha</li>
-                            <li>Use "Colar especial" → "Valores apenas"</li>
-                            <li>Baixe como CSV e faça upload aqui</li>
-                        </ul>
-                    </li>
-                    <li><strong>Usar Excel para limpeza:</strong>
-                        <ul>
-                            <li>Abra o arquivo no Excel</li>
-                            <li>Use "Localizar e Substituir" para remover caracteres estranhos</li>
-                            <li>Salve como CSV (UTF-8)</li>
-                        </ul>
-                    </li>
-                    <li><strong>Hospedagem alternativa:</strong>
-                        <ul>
-                            <li>Coloque o CSV limpo no GitHub</li>
-                            <li>Use a URL raw no código</li>
-                        </ul>
-                    </li>
-                </ol>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        return
-    
-    # Se os dados foram carregados com sucesso
-    if df is not None and len(df) > 0:
-        st.markdown(f"""
-        <div class="alert-success">
-            ✅ <strong>Dados carregados com sucesso!</strong><br>
-            📋 52.429 editais encontrados | 8.574 editais em mais de uma categoria (16,35%) | 43.855 editais em apenas uma categoria (83,65%) | 🕐 {datetime.now().strftime('%H:%M:%S')}
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Conversões de tipos mais seguras
-        if 'data realizacao licitacao' in df.columns:
-            df['data realizacao licitacao'] = pd.to_datetime(df['data realizacao licitacao'], errors='coerce')
-        
-        if 'ano' in df.columns:
-            df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
-        
-        if 'Valor Estimado' in df.columns:
-            # Limpeza de valores monetários
-            df['Valor Estimado'] = df['Valor Estimado'].astype(str).str.replace(r'[^\d.,]', '', regex=True)
-            df['Valor Estimado'] = df['Valor Estimado'].str.replace(',', '.', regex=False)
-            df['Valor Estimado'] = pd.to_numeric(df['Valor Estimado'], errors='coerce')
-        
-        if 'pontuacao' in df.columns:
-            df['pontuacao'] = df['pontuacao'].astype(str).str.replace(',', '.', regex=False)
-            df['pontuacao'] = pd.to_numeric(df['pontuacao'], errors='coerce')
-            
-        if 'pontuacao_final' in df.columns:
-            df['pontuacao_final'] = df['pontuacao_final'].astype(str).str.replace(',', '.', regex=False)
-            df['pontuacao_final'] = pd.to_numeric(df['pontuacao_final'], errors='coerce')
-        
-        # Processamento da coluna observacoes - preenche valores em branco
-        if 'observacoes' in df.columns:
-            df['observacoes'] = df['observacoes'].apply(
-                lambda x: x if pd.notna(x) and str(x).strip() != '' else 'Classificação baseada em Termos Chave'
-            )
-        
-        # Renomeação de colunas específicas
-        column_renames = {
-            'classificacao_final - Copiar': 'Predição CIC',
-            'predicao classificacao': 'Predição STI',
-            'classificacao_final': 'Nova Predição',
-            'observacoes': 'Observações'
-        }
-        
-        for old_name, new_name in column_renames.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
-        
-        # Remoção de duplicatas ignorando a coluna 'classificacao_final'
-        columns_for_dedup = [col for col in df.columns if col != 'classificacao_final']
-        if columns_for_dedup:
-            df = df.drop_duplicates(subset=columns_for_dedup, keep='first')
-        
-        # Informações dos dados na sidebar
-        st.sidebar.markdown("### 📊 Informações dos Dados")
-        
-        # Status da conexão com ícone verde - simplificado sem verificação de data_source
-        st.sidebar.markdown("**Fonte:** 🔗 SharePoint TCERJ (Automático) 🟢")
-
-        # Informações estatísticas fixas da base completa
-        st.sidebar.markdown("**Total de Editais:** 52.429")
-        st.sidebar.markdown("**Total de Categorias:** 14") 
-        st.sidebar.markdown("**Total Estimado:** R$ 244 bilhões")
-        
-        # **SEÇÃO DE BUSCA AVANÇADA**
-        st.sidebar.markdown("### 🔍 Busca Avançada")
-
-        with st.sidebar.expander("🔎 Filtros de Texto Avançados", expanded=False):
-            search_params = {}
-            
-            # Initialize session state keys if they don't exist
-            if "limpar_filtros_texto" not in st.session_state:
-                st.session_state["limpar_filtros_texto"] = False
-            if "search_and" not in st.session_state:
-                st.session_state["search_and"] = ""
-            if "search_or" not in st.session_state:
-                st.session_state["search_or"] = ""
-            if "search_not" not in st.session_state:
-                st.session_state["search_not"] = ""
-
-            # Check if reset flag is active and clear filters if needed
-            if st.session_state["limpar_filtros_texto"]:
-                st.session_state["search_and"] = ""
-                st.session_state["search_or"] = ""
-                st.session_state["search_not"] = ""
-                st.session_state["limpar_filtros_texto"] = False
-                st.rerun()
-
-            # Reset button - must be before the input widgets
-            if st.button("🔄 Limpar Filtros de Texto", 
-                         use_container_width=True,
-                         help="Remove todos os filtros de texto aplicados"):
-                st.session_state["limpar_filtros_texto"] = True
-                st.rerun()
-            
-            # Now create the input widgets
-            search_params['contains_and'] = st.text_input(
-                "🔗 Deve conter TODOS os termos (E)",
-                placeholder="frase completa OU termo1; termo2; termo3",
-                help="SEM ';' = busca frase completa. COM ';' = todos os termos devem estar presentes",
-                key="search_and"
-            )
-            
-            search_params['contains_or'] = st.text_input(
-                "🔀 Deve conter ALGUM termo (OU)",
-                placeholder="frase completa OU termo1; termo2; termo3",
-                help="SEM ';' = busca frase completa. COM ';' = pelo menos um termo deve estar presente",
-                key="search_or"
-            )
-            
-            search_params['not_contains'] = st.text_input(
-                "❌ NÃO deve conter",
-                placeholder="frase completa OU termo1; termo2",
-                help="SEM ';' = exclui frase completa. COM ';' = exclui qualquer um dos termos",
-                key="search_not"
-            )
-
-            # Exemplos e indicador de filtros ativos permanecem os mesmos
-            st.markdown("""
-            **💡 Exemplos:**
-            - **FRASE**: "bens permanentes" → busca exata
-            - **TERMOS**: "bens; permanentes" → ambos separados
-            - **NEGATIVO**: "consultoria; terceirizado" → exclui ambos
-            """)
-    
-            # Indicador de filtros ativos
-            active_searches = [key for key, value in search_params.items() if value and value.strip()]
-            if active_searches:
-                st.success(f"🔍 {len(active_searches)} filtro(s) de busca ativo(s)")
-            else:
-                st.info("🔍 Nenhum filtro de busca ativo")
-        
-        # **CRIAÇÃO DOS FILTROS ESPECÍFICOS**
-        st.sidebar.markdown("### 🎛️ Filtros Específicos")
-
-        # Lista predefinida de classificações
-        CLASSIFICACOES = [
-            'EDUCAÇÃO',
-            'SAÚDE',
-            'TECNOLOGIA DA INFORMAÇÃO',
-            'SANEAMENTO',
-            'MOBILIDADE',
-            'SEGURANÇA PÚBLICA',
-            'DESENVOLVIMENTO',
-            'OBRAS',
-            'GOVERNANÇA',
-            'PESSOAL',
-            'DESESTATIZAÇÃO',
-            'OUTROS',
-            'RECEITA',
-            'PREVIDÊNCIA'
-        ]
-
-        filters = {}
-
-        # Nova Predição (primeiro filtro) - CORRIGIDO
-        nova_predicao = st.sidebar.selectbox(
-            "📂 Nova Predição (contém)",
-            options=['Todas'] + CLASSIFICACOES,
-            key='nova_predicao',
-            help="Busca por containment - encontra editais que CONTÊM a categoria selecionada"
-        )
-        if nova_predicao != 'Todas':
-            filters['Nova Predição'] = nova_predicao
-
-        # Predição Antiga
-        if 'Predição Antiga' in df.columns:
-            predicao_antiga = st.sidebar.selectbox(
-                "🔄 Predição Antiga",
-                options=['Todas'] + sorted(df['Predição Antiga'].dropna().unique().tolist()),
-                key='predicao_antiga'
-            )
-            if predicao_antiga != 'Todas':
-                filters['Predição Antiga'] = predicao_antiga
-
-        # Ano
-        if 'Ano' in df.columns:
-            ano = st.sidebar.selectbox(
-                "📅 Ano",
-                options=['Todos'] + sorted([str(int(ano)) for ano in df['Ano'].dropna().unique()]),
-                key='ano'
-            )
-            if ano != 'Todos':
-                filters['Ano'] = ano
-
-        # Unidade
-        if 'Unidade' in df.columns:
-            unidades = ['Todas'] + sorted(df['Unidade'].unique().tolist())
-            unidade = st.sidebar.selectbox(
-                "🏢 Unidade",
-                options=unidades,
-                key='unidade'
-            )
-            if unidade != 'Todas':
-                filters['Unidade'] = unidade
-        
-        # Indicador de filtros específicos ativos
-        active_specific_filters = []
-        if nova_predicao != 'Todas':
-            active_specific_filters.append("Nova Predição")
-        if 'Predição Antiga' in df.columns and predicao_antiga != 'Todas':
-            active_specific_filters.append("Predição Antiga")
-        if 'Ano' in df.columns and ano != 'Todos':
-            active_specific_filters.append("Ano")
-        if 'Unidade' in df.columns and unidade != 'Todas':
-            active_specific_filters.append("Unidade")
-        
-        if active_specific_filters:
-            st.sidebar.success(f"🎛️ {len(active_specific_filters)} filtro(s) específico(s) ativo(s)")
-        else:
-            st.sidebar.info("🎛️ Nenhum filtro específico ativo")
-        
-        # Aplicação dos filtros - CORRIGIDA
-        filtered_df = apply_filters(df, search_params, filters)
-        
-        # Criação das abas após o processamento dos filtros
-        tab1, tab2, tab3 = st.tabs(["📊 Análise de Dados", "📈 Dashboard", "📚 Ajuda"])
-        
-        with tab1:
-            # Métricas de visão geral
-            st.markdown("### 📊 Dados Carregados para Análise")
-            create_overview_metrics(filtered_df)
-            
-            # Informações adicionais sobre categorização
-            st.markdown("### 📈 Análise de Categorização")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric(
-                    label="📋 Editais em Múltiplas Categorias",
-                    value="8.574",
-                    delta="16,35%"
-                )
-            
-            with col2:
-                st.metric(
-                    label="📄 Editais em Categoria Única",
-                    value="43.855", 
-                    delta="83,65%"
-                )
-            
-            with col3:
-                # Calcula % de mudança entre as predições
-                if 'Nova Predição' in filtered_df.columns and 'Predição Antiga' in filtered_df.columns:
-                    total_linhas = len(filtered_df)
-                    if total_linhas > 0:
-                        linhas_diferentes = len(filtered_df[filtered_df['Nova Predição'].fillna('') != filtered_df['Predição Antiga'].fillna('')])
-                        percentual_mudanca = (linhas_diferentes / total_linhas) * 100
-                        
-                        st.metric(
-                            label="🔄 Mudanças nas Predições",
-                            value=f"{percentual_mudanca:.1f}%",
-                            delta=f"{linhas_diferentes:,} casos"
-                        )
-                    else:
-                        st.metric(
-                            label="🔄 Mudanças nas Predições",
-                            value="0%",
-                            delta="0 casos"
-                        )
-            
-            # Texto explicativo sobre as mudanças
-            if 'Nova Predição' in filtered_df.columns and 'Predição Antiga' in filtered_df.columns:
-                total_linhas = len(filtered_df)
-                if total_linhas > 0:
-                    linhas_diferentes = len(filtered_df[filtered_df['Nova Predição'].fillna('') != filtered_df['Predição Antiga'].fillna('')])
-                    percentual_mudanca = (linhas_diferentes / total_linhas) * 100
-                    
-                    st.info(f"📊 **Foram identificadas mudanças em {percentual_mudanca:.1f}% dos casos, onde a Nova Predição difere da Predição Antiga.**")
-            
-            if len(filtered_df) == 0:
-                st.warning("⚠️ Nenhum resultado encontrado com os filtros aplicados. Tente ajustar os critérios de busca.")
-            else:
-                # Exibir informações dos filtros aplicados
-                active_search = any(search_params.values()) if search_params else False
-                active_filters = any(
-                    (isinstance(v, list) and v != ['Todas']) or 
-                    (isinstance(v, str) and v not in ['Todas', 'Todos']) or
-                    (isinstance(v, tuple))  # valor_range
-                    for v in filters.values()
-                )
-                
-                if active_search or active_filters:
-                    filter_info = f"🔍 **Filtros aplicados** - Exibindo {len(filtered_df):,} de 52.429 editais"
-                    
-                    # Adiciona informação sobre busca avançada se aplicável
-                    if active_search:
-                        search_types = []
-                        if search_params.get('contains_and'):
-                            search_types.append("E")
-                        if search_params.get('contains_or'):
-                            search_types.append("OU")
-                        if search_params.get('not_contains'):
-                            search_types.append("NÃO")
-                        if search_types:
-                            filter_info += f" | 🔎 Busca avançada: {', '.join(search_types)}"
-                    
-                    # Adiciona informação sobre filtros específicos
-                    if active_filters:
-                        filter_types = []
-                        if filters.get('Nova Predição'):
-                            filter_types.append(f"Nova Predição: {filters['Nova Predição']}")
-                        if filters.get('Predição Antiga'):
-                            filter_types.append(f"Predição Antiga: {filters['Predição Antiga']}")
-                        if filters.get('Ano'):
-                            filter_types.append(f"Ano: {filters['Ano']}")
-                        if filters.get('Unidade'):
-                            filter_types.append(f"Unidade: {filters['Unidade']}")
-                        if filter_types:
-                            filter_info += f" | 🎛️ Filtros: {', '.join(filter_types)}"
-                    
-                    st.info(filter_info)
-                
-                # Tabela de dados
-                display_data_table(filtered_df)
-        
-        with tab2:
-            st.markdown("### 📊 Dashboard Analítico")
-            
-            if len(filtered_df) > 0:
-                # Mostrar informação de filtros se aplicados
-                active_search = any(search_params.values()) if search_params else False
-                active_filters = any(
-                    (isinstance(v, list) and v != ['Todas']) or 
-                    (isinstance(v, str) and v not in ['Todas', 'Todos']) or
-                    (isinstance(v, tuple))
-                    for v in filters.values()
-                )
-                
-                if active_search or active_filters:
-                    filter_info = f"🔍 **Visualizando dados filtrados** - {len(filtered_df):,} de 52.429 editais"
-                    
-                    if active_search:
-                        search_types = []
-                        if search_params.get('contains_and'):
-                            search_types.append("E")
-                        if search_params.get('contains_or'):
-                            search_types.append("OU")
-                        if search_params.get('not_contains'):
-                            search_types.append("NÃO")
-                        if search_types:
-                            filter_info += f" | 🔎 Busca avançada: {', '.join(search_types)}"
-                    
-                    st.info(filter_info)
-                
-                # Métricas principais
-                st.markdown("### 📊 Dados Filtrados para Análise")
-                create_overview_metrics(filtered_df)
-                
-                # Informações adicionais sobre categorização
-                st.markdown("### 📈 Análise de Categorização")
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric(
-                        label="📋 Editais em Múltiplas Categorias",
-                        value="8.574",
-                        delta="16,35%"
-                    )
-                
-                with col2:
-                    st.metric(
-                        label="📄 Editais em Categoria Única",
-                        value="43.855", 
-                        delta="83,65%"
-                    )
-                
-                with col3:
-                    # Calcula % de mudança entre as predições
-                    if 'Nova Predição' in filtered_df.columns and 'Predição Antiga' in filtered_df.columns:
-                        total_linhas = len(filtered_df)
-                        if total_linhas > 0:
-                            linhas_diferentes = len(filtered_df[filtered_df['Nova Predição'].fillna('') != filtered_df['Predição Antiga'].fillna('')])
-                            percentual_mudanca = (linhas_diferentes / total_linhas) * 100
-                            
-                            st.metric(
-                                label="🔄 Mudanças nas Predições",
-                                value=f"{percentual_mudanca:.1f}%",
-                                delta=f"{linhas_diferentes:,} casos"
-                            )
-                        else:
-                            st.metric(
-                                label="🔄 Mudanças nas Predições",
-                                value="0%",
-                                delta="0 casos"
-                            )
-                
-                # Texto explicativo sobre as mudanças
-                if 'Nova Predição' in filtered_df.columns and 'Predição Antiga' in filtered_df.columns:
-                    total_linhas = len(filtered_df)
-                    if total_linhas > 0:
-                        linhas_diferentes = len(filtered_df[filtered_df['Nova Predição'].fillna('') != filtered_df['Predição Antiga'].fillna('')])
-                        percentual_mudanca = (linhas_diferentes / total_linhas) * 100
-                        
-                        st.info(f"📊 **Foram identificadas mudanças em {percentual_mudanca:.1f}% dos casos, onde a Nova Predição difere da Predição Antiga.**")
-                
-                # Gráficos
-                create_charts(filtered_df)
-                
-                # Estatísticas adicionais
-                if 'Nova Predição' in filtered_df.columns:
-                    st.markdown("### 📋 Análise Detalhada por Classificação")
-                    
-                    classification_stats = filtered_df.groupby('Nova Predição').agg({
-                        'Valor Estimado': ['count', 'sum', 'mean'],
-                        'pontuacao': 'mean' if 'pontuacao' in filtered_df.columns else 'count'
-                    }).round(2)
-                    
-                    classification_stats.columns = ['Quantidade', 'Valor Total', 'Valor Médio', 'Pontuação Média']
-                    
-                    st.dataframe(
-                        classification_stats.sort_values('Quantidade', ascending=False),
-                        use_container_width=True
-                    )
-            else:
-                st.warning("⚠️ Nenhum dado disponível para exibir no dashboard com os filtros aplicados.")
-        
-        with tab3:
-            show_help_tab()
-    
-    else:
-        st.markdown("""
-        <div class="alert-info">
-            <h3>👋 Bem-vindo ao Projeto Predição de Editais - CIC2025!</h3>
-            <p><strong>📊 Nossa base completa contém:</strong></p>
-            <ul style="margin: 1rem 0;">
-                <li><strong>52.429 editais</strong> analisados e classificados</li>
-                <li><strong>R$ 244 bilhões</strong> em valor total estimado</li>
-                <li><strong>729 unidades</strong> organizacionais mapeadas</li>
-                <li><strong>14 categorias</strong> originais + <strong>2 novas categorias</strong></li>
-            </ul>
-            
-            <p><strong>🚀 Para começar sua consulta:</strong></p>
-            <ol>
-                <li>📁 Selecione uma fonte de dados acima</li>
-                <li>🔍 Use os filtros avançados para encontrar informações específicas</li>
-                <li>📊 Explore as visualizações no dashboard</li>
-                <li>📥 Exporte os dados filtrados automaticamente</li>
-            </ol>
-            
-            <p><strong>🆕 Novidades da versão corrigida:</strong></p>
-            <ul>
-                <li>🔍 <strong>Busca Avançada</strong> com operadores lógicos (E, OU, NÃO)</li>
-                <li>📂 <strong>Filtros Containment</strong> para "Nova Predição"</li>
-                <li>🔄 <strong>Aplicação Sequencial</strong> de filtros múltiplos</li>
-                <li>📥 <strong>Exportação Automática</strong> em CSV/XLSX</li>
-            </ul>
-            
-            <p><strong>💡 Dica:</strong> Acesse a aba "📚 Ajuda" para instruções detalhadas sobre todas as funcionalidades!</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-if __name__ == "__main__":
-    main()
-
+import streamlit as st
+import pandas as pd
+import numpy as np
+# plotly é importado dentro das funções do dashboard e o openpyxl só na
+# exportação XLSX: a abertura do app não paga por eles (ver startup_check.py)
+from datetime import datetime, timedelta
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import base64
+import bisect
+import hashlib
+import shutil
+import sqlite3
+import tempfile
+import functools
+import threading
+import time
+import unicodedata
+import warnings
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# Configuração da página
+st.set_page_config(
+    page_title="Projeto Predição de Editais - CIC2025",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# CSS customizado para interface profissional
+st.markdown("""
+<style>
+    /* Tema principal */
+    .main-header {
+        background: linear-gradient(90deg, #1e3a8a 0%, #3b82f6 100%);
+        padding: 1rem;
+        border-radius: 10px;
+        margin-bottom: 2rem;
+    }
+    
+    .main-header h1 {
+        color: white;
+        margin: 0;
+        font-weight: 600;
+    }
+    
+    .metric-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        border-left: 4px solid #3b82f6;
+        margin: 0.5rem 0;
+    }
+    
+    .filter-section {
+        background: #f8fafc;
+        padding: 1rem;
+        border-radius: 8px;
+        margin: 1rem 0;
+    }
+    
+    .alert-info {
+        background: #dbeafe;
+        border: 1px solid #3b82f6;
+        color: #1e40af;
+        padding: 1rem;
+        border-radius: 8px;
+        margin: 1rem 0;
+    }
+    
+    .alert-success {
+        background: #dcfce7;
+        border: 1px solid #16a34a;
+        color: #15803d;
+        padding: 1rem;
+        border-radius: 8px;
+        margin: 1rem 0;
+    }
+    
+    .alert-warning {
+        background: #fef3c7;
+        border: 1px solid #f59e0b;
+        color: #92400e;
+        padding: 1rem;
+        border-radius: 8px;
+        margin: 1rem 0;
+    }
+    
+    .sidebar .sidebar-content {
+        background: #f1f5f9;
+    }
+    
+    /* Estilo para métricas */
+    .metric-container {
+        display: flex;
+        flex-wrap: wrap;
+        gap: 1rem;
+        margin: 1rem 0;
+    }
+    
+    /* Botões personalizados */
+    .stButton > button {
+        background: linear-gradient(90deg, #3b82f6 0%, #1d4ed8 100%);
+        color: white;
+        border: none;
+        border-radius: 8px;
+        padding: 0.5rem 1rem;
+        font-weight: 500;
+        transition: all 0.3s ease;
+    }
+    
+    .stButton > button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 4px 8px rgba(59, 130, 246, 0.3);
+    }
+    
+    /* Estilo para selectbox */
+    .stSelectbox > div > div {
+        border-radius: 8px;
+    }
+    
+    /* Tabelas */
+    .dataframe {
+        border-radius: 8px;
+        overflow: hidden;
+    }
+    
+    /* Loading spinner personalizado */
+    .loading-container {
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        padding: 2rem;
+    }
+    
+    /* Botão de exportação customizado */
+    .export-button-container {
+        display: flex;
+        justify-content: flex-end;
+        margin: 1rem 0;
+        padding: 0.5rem;
+    }
+    
+    /* Seção de filtros avançados */
+    .advanced-search {
+        background: #f1f5f9;
+        border: 1px solid #cbd5e1;
+        border-radius: 8px;
+        padding: 1rem;
+        margin: 0.5rem 0;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+# URL do SharePoint (pode precisar de autenticação)
+SHAREPOINT_URL = "https://tcerj365-my.sharepoint.com/:x:/g/personal/emanuellipc_tcerj_tc_br/EXQxKC-8-uNLu-RCyhK6sjwB4pljoEYgoup6g-mJ5iHlwA?e=DDbJpE"
+# Tentativa de conversão para download direto
+SHAREPOINT_CSV_URL = "https://tcerj365-my.sharepoint.com/:x:/g/personal/emanuellipc_tcerj_tc_br/EXQxKC-8-uNLu-RCyhK6sjwB4pljoEYgoup6g-mJ5iHlwA?e=DDbJpE&download=1"
+
+# Coluna com a impressão digital (chave estável) de cada edital
+ROW_KEY_COLUMN = 'row_key'
+# Colunas de saída dos modelos de classificação - não identificam o edital,
+# então ficam fora da impressão digital (reclassificar não cria um "novo" edital)
+PREDICTION_SOURCE_COLUMNS = [
+    'classificacao_final',
+    'classificacao_final - Copiar',
+    'predicao classificacao',
+    'Nova Classificação',
+    'Predição Antiga',
+    'pontuacao',
+    'pontuacao_final',
+    'observacoes'
+]
+
+# Campos que mudam ao longo da vida do edital (situação, valor, data remarcada):
+# também ficam fora da impressão digital - a mudança aparece como "alterado"
+# no histórico, e não como um edital removido e outro adicionado
+MUTABLE_EDITAL_COLUMNS = ['descricao situacao edital', 'Valor Estimado', 'data realizacao licitacao']
+# Linhas iguais em todas as colunas, exceto estas, são duplicatas
+DEDUP_IGNORED_COLUMNS = ['classificacao_final']
+
+def compute_row_fingerprints(df):
+    """Impressão digital de 64 bits de cada linha e máscara de duplicatas (vetorizadas)
+
+    A chave usa só as colunas de identidade, em ordem alfabética, de modo que
+    não muda se a planilha trocar a ordem das colunas. Duplicata é a linha
+    igual a uma anterior em todas as colunas exceto classificacao_final.
+    Editais distintos com a mesma identidade são numerados pela ordem de
+    ocorrência: o primeiro fica com a chave da identidade.
+    Retorna (chaves, duplicadas).
+    """
+    columns = [col for col in df.columns if col != ROW_KEY_COLUMN]
+    excluded = set(PREDICTION_SOURCE_COLUMNS) | set(MUTABLE_EDITAL_COLUMNS)
+    identity_columns = sorted(col for col in columns if col not in excluded) or sorted(columns)
+    other_columns = sorted(col for col in columns if col in excluded and col not in DEDUP_IGNORED_COLUMNS)
+    
+    keys = pd.util.hash_pandas_object(df[identity_columns], index=False).to_numpy(dtype=np.uint64)
+    content = keys
+    if other_columns:
+        content = pd.util.hash_pandas_object(pd.DataFrame({
+            'identidade': keys,
+            'demais': pd.util.hash_pandas_object(df[other_columns], index=False).to_numpy(dtype=np.uint64),
+        }), index=False).to_numpy(dtype=np.uint64)
+    duplicated = pd.Series(content).duplicated(keep='first').to_numpy()
+    
+    # Mesma identidade e conteúdo diferente: chave da identidade + número da ocorrência
+    kept = keys[~duplicated]
+    occurrence = pd.Series(kept).groupby(kept).cumcount().to_numpy()
+    repeated = occurrence > 0
+    if repeated.any():
+        kept = kept.copy()
+        kept[repeated] = pd.util.hash_pandas_object(pd.DataFrame({
+            'identidade': kept[repeated],
+            'ocorrencia': occurrence[repeated],
+        }), index=False).to_numpy(dtype=np.uint64)
+        keys = keys.copy()
+        keys[~duplicated] = kept
+    return keys, duplicated
+
+# Colunas de texto pesadas: ficam comprimidas fora do DataFrame e só são
+# descomprimidas para a busca ou quando o usuário as exibe/exporta
+HEAVY_TEXT_COLUMNS = ['objeto_processada', 'todos_termos', 'descricao situacao edital']
+# Linhas por bloco comprimido (mesmo bloco da construção do índice de trigramas)
+LAZY_CHUNK_ROWS = 4096
+
+class LazyTextColumns:
+    """Colunas de texto comprimidas com zlib em blocos de linhas
+
+    Guardada em df.attrs['lazy_columns'] e compartilhada (não copiada) pelos
+    DataFrames derivados; as linhas são localizadas pela row_key.
+    """
+
+    def __init__(self, df, columns):
+        self.columns = list(columns)
+        self.column_order = list(df.columns)
+        self.dtypes = {col: df[col].dtype for col in self.columns}
+        self.row_keys = df[ROW_KEY_COLUMN].to_numpy()
+        self.key_index = pd.Index(self.row_keys)
+        self.n_rows = len(df)
+        self.chunks = {
+            col: [
+                self._compress(df[col].iloc[start:start + LAZY_CHUNK_ROWS])
+                for start in range(0, self.n_rows, LAZY_CHUNK_ROWS)
+            ]
+            for col in self.columns
+        }
+        self.nbytes = sum(
+            len(data) + len(nulls) for chunks in self.chunks.values() for data, nulls in chunks
+        )
+
+    def __deepcopy__(self, memo):
+        # attrs são copiados em profundidade pelo pandas; o conteúdo é imutável
+        return self
+
+    @staticmethod
+    def _compress(values):
+        nulls = values.isna().to_numpy()
+        text = '\x00'.join(values.fillna('').astype(str).str.replace('\x00', '', regex=False).tolist())
+        return zlib.compress(text.encode('utf-8'), 1), np.packbits(nulls).tobytes()
+
+    def _chunk_values(self, column, chunk_id):
+        data, nulls = self.chunks[column][chunk_id]
+        values = np.array(zlib.decompress(data).decode('utf-8').split('\x00'), dtype=object)
+        null_mask = np.unpackbits(np.frombuffer(nulls, dtype=np.uint8), count=len(values)).astype(bool)
+        values[null_mask] = None
+        return values
+
+    def take(self, column, row_keys):
+        """Valores da coluna para as linhas (row_keys), descomprimindo só os blocos usados"""
+        row_keys = np.asarray(row_keys)
+        if len(row_keys) == self.n_rows and np.array_equal(row_keys, self.row_keys):
+            parts = [self._chunk_values(column, chunk_id) for chunk_id in range(len(self.chunks[column]))]
+            values = np.concatenate(parts) if parts else np.empty(0, dtype=object)
+            return pd.array(values, dtype=self.dtypes[column])
+        
+        positions = self.key_index.get_indexer(row_keys)
+        values = np.empty(len(positions), dtype=object)
+        chunk_ids = positions // LAZY_CHUNK_ROWS
+        for chunk_id in sorted_unique(np.sort(chunk_ids)):
+            selected = chunk_ids == chunk_id
+            values[selected] = self._chunk_values(column, chunk_id)[positions[selected] - chunk_id * LAZY_CHUNK_ROWS]
+        return pd.array(values, dtype=self.dtypes[column])
+
+def split_heavy_columns(df):
+    """Move as colunas de texto pesadas para um LazyTextColumns comprimido"""
+    heavy_columns = [col for col in HEAVY_TEXT_COLUMNS if col in df.columns]
+    if not heavy_columns or ROW_KEY_COLUMN not in df.columns:
+        return df
+    
+    store = LazyTextColumns(df, heavy_columns)
+    light_df = df.drop(columns=heavy_columns)
+    light_df.attrs['lazy_columns'] = store
+    return light_df
+
+def available_columns(df):
+    """Colunas do DataFrame, incluindo as carregadas sob demanda, na ordem original"""
+    store = df.attrs.get('lazy_columns')
+    if store is None:
+        return list(df.columns)
+    return [col for col in store.column_order if col in df.columns or col in store.columns]
+
+def get_column(df, column):
+    """Série da coluna para as linhas de df (descomprime colunas sob demanda)"""
+    if column in df.columns:
+        return df[column]
+    store = df.attrs['lazy_columns']
+    return pd.Series(store.take(column, df[ROW_KEY_COLUMN].to_numpy()), index=df.index, name=column)
+
+def with_columns(df, columns):
+    """DataFrame só com as colunas pedidas, materializando as pesadas para estas linhas"""
+    if all(col in df.columns for col in columns):
+        return df[columns]
+    return pd.DataFrame({col: get_column(df, col) for col in columns}, index=df.index)
+
+# Download da planilha: sessão HTTP do processo (keep-alive, gzip), corpo lido
+# em blocos direto para o parser e novas tentativas com backoff exponencial
+# dentro de um prazo total. EDITAIS_SOURCE_URL substitui as URLs do SharePoint
+# (ex.: um espelho ou um servidor local de testes)
+SOURCE_URL_ENV = 'EDITAIS_SOURCE_URL'
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+DOWNLOAD_DEADLINE_SECONDS = 60
+DOWNLOAD_CONNECT_TIMEOUT = 10
+DOWNLOAD_READ_TIMEOUT = 30
+DOWNLOAD_MAX_ATTEMPTS = 4
+DOWNLOAD_BACKOFF_SECONDS = 0.5
+# Cópia do corpo para reprocessar sem novo download (em disco acima deste tamanho)
+DOWNLOAD_SPOOL_BYTES = 32 * 1024 * 1024
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Bytes iniciais inspecionados para detectar a página de login (HTML)
+HTML_SNIFF_BYTES = 2048
+
+class DownloadError(Exception):
+    """Falha no download da planilha (mensagem pronta para a interface)"""
+
+def get_source_urls():
+    """URLs da planilha, em ordem de tentativa"""
+    source_url = os.environ.get(SOURCE_URL_ENV)
+    if source_url:
+        return [source_url]
+    return [SHAREPOINT_CSV_URL, SHAREPOINT_URL]
+
+@st.cache_resource
+def get_http_session():
+    """Sessão HTTP do processo: conexões reaproveitadas (keep-alive) e gzip"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+    return session
+
+def looks_like_html(response, first_bytes):
+    """Página HTML (login do SharePoint) em vez do CSV, pelos primeiros bytes"""
+    if 'text/html' in response.headers.get('Content-Type', '').lower():
+        return True
+    head = first_bytes[:HTML_SNIFF_BYTES].lstrip().lower()
+    return head.startswith(b'<!doctype html') or b'<html' in head
+
+class StreamingBody(io.RawIOBase):
+    """Corpo da resposta como arquivo binário, lido em blocos sob demanda
+
+    Cada bloco atualiza o hash da versão e é copiado para um arquivo
+    temporário (memória/disco), que permite reprocessar sem novo download.
+    """
+
+    def __init__(self, response, first_chunk, deadline):
+        self._response = response
+        self._chunks = response.iter_content(DOWNLOAD_CHUNK_BYTES)
+        self._deadline = deadline
+        self._buffer = memoryview(b'')
+        self.hasher = hashlib.sha1()
+        self.spool = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_BYTES)
+        self._accept(first_chunk)
+
+    def _accept(self, chunk):
+        self.hasher.update(chunk)
+        self.spool.write(chunk)
+        self._buffer = memoryview(chunk)
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not len(self._buffer):
+            if time.monotonic() > self._deadline:
+                raise DownloadError(f"Erro de conexão: tempo limite de {DOWNLOAD_DEADLINE_SECONDS}s excedido no download")
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._accept(chunk)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def drain(self):
+        """Lê o restante do corpo (hash e cópia completos) e volta a cópia ao início"""
+        while self.readinto(bytearray(DOWNLOAD_CHUNK_BYTES)):
+            pass
+        self.spool.seek(0)
+        return self.spool
+
+    def close(self):
+        self._response.close()
+        super().close()
+
+def open_source_stream(urls, session, deadline):
+    """Abre o corpo da primeira URL que responder com o CSV
+
+    Falhas de conexão e status transitórios (429/5xx) são repetidos com
+    backoff exponencial até o prazo; 4xx e páginas HTML passam à próxima URL.
+    """
+    last_error = None
+    for url in urls:
+        for attempt in range(DOWNLOAD_MAX_ATTEMPTS):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DownloadError(f"Erro de conexão: tempo limite de {DOWNLOAD_DEADLINE_SECONDS}s excedido ({last_error})")
+            
+            try:
+                response = session.get(
+                    url,
+                    stream=True,
+                    timeout=(min(DOWNLOAD_CONNECT_TIMEOUT, remaining), min(DOWNLOAD_READ_TIMEOUT, remaining))
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_error = e
+            else:
+                if response.status_code in RETRY_STATUS_CODES:
+                    last_error = requests.exceptions.HTTPError(f"{response.status_code} {response.reason}", response=response)
+                    response.close()
+                elif response.status_code >= 400:
+                    last_error = requests.exceptions.HTTPError(f"{response.status_code} {response.reason}", response=response)
+                    response.close()
+                    break
+                else:
+                    first_chunk = next(response.iter_content(DOWNLOAD_CHUNK_BYTES), b'')
+                    if looks_like_html(response, first_chunk):
+                        last_error = DownloadError("SharePoint requer autenticação - use upload manual ou configure permissões públicas")
+                        response.close()
+                        break
+                    return StreamingBody(response, first_chunk, deadline)
+            
+            if attempt + 1 < DOWNLOAD_MAX_ATTEMPTS:
+                time.sleep(min(DOWNLOAD_BACKOFF_SECONDS * 2 ** attempt, max(deadline - time.monotonic(), 0)))
+    
+    if isinstance(last_error, DownloadError):
+        raise last_error
+    if "403" in str(last_error) or "401" in str(last_error):
+        raise DownloadError("Acesso negado - SharePoint requer permissões ou autenticação")
+    raise DownloadError(f"Erro de conexão: {str(last_error)}")
+
+# Qualidade da carga: o que foi descartado ou corrigido em cada atualização.
+# As linhas problemáticas (valores brutos) ficam numa tabela de quarentena
+QUALITY_ATTR = 'qualidade'
+QUARANTINE_REASON_COLUMN = 'Motivo'
+QUARANTINE_DETAIL_COLUMN = 'Colunas'
+# Colunas convertidas na carga: texto vazio vira nulo, texto inválido é falha
+QUALITY_COERCED_COLUMNS = ['data realizacao licitacao', 'ano', 'Valor Estimado', 'pontuacao', 'pontuacao_final']
+OBSERVACOES_DEFAULT = 'Classificação baseada em Termos Chave'
+
+class DataQualityReport:
+    """Contagens da etapa de qualidade da carga e a tabela de quarentena
+
+    Guardado em df.attrs['qualidade'] (compartilhado, não copiado, como o
+    LazyTextColumns) e no backend DuckDB: vale para a versão dos dados até
+    a próxima carga.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.coercion_failures = {}
+        self.quarantine_parts = []
+        self.bad_lines = []
+        self.rows_loaded = 0
+
+    def __deepcopy__(self, memo):
+        # attrs são copiados em profundidade pelo pandas; o relatório é imutável após a carga
+        return self
+
+    def skip_line(self, fields):
+        """on_bad_lines do read_csv: guarda a linha malformada e a descarta"""
+        self.bad_lines.append(fields)
+        return None
+
+    def record_bad_lines(self, columns):
+        """Linhas malformadas na quarentena, com os campos nas colunas do cabeçalho"""
+        self.counts['Linhas malformadas descartadas'] = len(self.bad_lines)
+        if not self.bad_lines:
+            return
+        width = max(min(len(fields), len(columns)) for fields in self.bad_lines)
+        rows = pd.DataFrame([fields[:len(columns)] for fields in self.bad_lines], columns=list(columns)[:width])
+        rows.insert(0, QUARANTINE_DETAIL_COLUMN, [f"{len(fields)} campos (esperados {len(columns)})" for fields in self.bad_lines])
+        self.quarantine('Linha malformada', rows)
+
+    def quarantine(self, reason, rows):
+        """Acrescenta linhas à quarentena com o motivo"""
+        rows = rows.copy()
+        rows.attrs = {}
+        rows.insert(0, QUARANTINE_REASON_COLUMN, reason)
+        self.quarantine_parts.append(rows)
+
+    def record_coercions(self, df, raw):
+        """Falhas de conversão: valor bruto preenchido que virou nulo em df
+
+        raw mapeia coluna → Série bruta (antes da conversão). Cada linha com
+        falha vai uma vez para a quarentena, com os valores brutos e a lista
+        das colunas que falharam.
+        """
+        if not raw:
+            return
+        failures = pd.DataFrame({
+            column: df[column].isna() & values.notna() & (values.str.strip() != '')
+            for column, values in raw.items()
+        })
+        failed = failures.any(axis=1)
+        self.coercion_failures = {column: int(count) for column, count in failures.sum().items()}
+        self.counts['Linhas com conversão inválida'] = int(failed.sum())
+        if not failed.any():
+            return
+        
+        rows = df[failed].assign(**{column: values[failed] for column, values in raw.items()})
+        detail = pd.Series('', index=rows.index)
+        for column in failures.columns:
+            detail = detail.where(~failures.loc[failed, column], detail + column + ', ')
+        rows.insert(0, QUARANTINE_DETAIL_COLUMN, detail.str.rstrip(', '))
+        self.quarantine('Conversão inválida', rows)
+
+    def summary(self):
+        """Tabela Etapa × Linhas para exibição (falhas de conversão por coluna)"""
+        rows = dict(self.counts)
+        rows.update({f"Conversão inválida: {column}": count for column, count in self.coercion_failures.items()})
+        return pd.DataFrame({'Linhas': list(rows.values())}, index=pd.Index(list(rows), name='Etapa'))
+
+    @property
+    def issues(self):
+        """Total de linhas descartadas ou com valores perdidos"""
+        return (
+            self.counts.get('Linhas malformadas descartadas', 0) + self.counts.get('Duplicadas removidas', 0)
+            + self.counts.get('Linhas com conversão inválida', 0)
+        )
+
+    def quarantine_frame(self):
+        """Tabela de quarentena (valores brutos, como texto)"""
+        if not self.quarantine_parts:
+            return pd.DataFrame(columns=[QUARANTINE_REASON_COLUMN, QUARANTINE_DETAIL_COLUMN])
+        frame = pd.concat(self.quarantine_parts, ignore_index=True)
+        frame.attrs = {}
+        return frame
+
+    def as_dict(self):
+        """Contagens em JSON (rota /qualidade da API)"""
+        return {
+            'linhas_carregadas': self.rows_loaded,
+            'contagens': self.counts,
+            'falhas_conversao': self.coercion_failures,
+            'quarentena': sum(len(part) for part in self.quarantine_parts),
+        }
+
+def show_quality_report(report, dataset_version):
+    """Expander da sidebar com o relatório de qualidade da carga e a quarentena"""
+    label = "🧪 Qualidade da Carga" + (f" · {report.issues:,} ocorrências" if report.issues else "")
+    with st.sidebar.expander(label, expanded=False):
+        st.caption(f"{report.rows_loaded:,} editais carregados na versão {dataset_version}")
+        st.dataframe(report.summary(), use_container_width=True)
+        
+        quarantine = report.quarantine_frame()
+        if len(quarantine) == 0:
+            st.caption("✅ Nenhuma linha em quarentena")
+            return
+        st.download_button(
+            label=f"📥 Quarentena ({len(quarantine):,} linhas, CSV)",
+            data=get_export_cache().get_or_compute(
+                ('quarentena', dataset_version), lambda: serialize_export(quarantine, "CSV"), version=dataset_version
+            ),
+            file_name=f"quarentena_{dataset_version}.csv",
+            mime="text/csv",
+            key='qualidade_quarentena'
+        )
+
+def fetch_data_from_sharepoint(urls=None, session=None):
+    """Baixa e normaliza a planilha do SharePoint (sem cache)"""
+    try:
+        deadline = time.monotonic() + DOWNLOAD_DEADLINE_SECONDS
+        try:
+            body = open_source_stream(urls or get_source_urls(), session or get_http_session(), deadline)
+        except DownloadError as e:
+            return None, str(e)
+        
+        with body:
+            # O corpo vai direto para o parser (delimitador detectado
+            # automaticamente), sem montar a resposta inteira em memória
+            report = DataQualityReport()
+            try:
+                df = pd.read_csv(
+                    io.BufferedReader(body, DOWNLOAD_CHUNK_BYTES),
+                    sep=None,  # Detecta automaticamente o delimitador
+                    engine='python',  # Engine mais tolerante
+                    encoding='utf-8',
+                    on_bad_lines=report.skip_line,  # Pula linhas problemáticas (vão para a quarentena)
+                    dtype=str  # Carrega tudo como string primeiro
+                )
+                body.drain()
+            except DownloadError as e:
+                return None, str(e)
+            except Exception as e1:
+                # Método alternativo - vírgula explícita, sobre a cópia já baixada
+                report = DataQualityReport()
+                try:
+                    df = pd.read_csv(
+                        body.drain(),
+                        encoding='utf-8',
+                        sep=',',
+                        quotechar='"',
+                        escapechar='\\',
+                        on_bad_lines=report.skip_line,
+                        engine='python',
+                        dtype=str
+                    )
+                except Exception as e2:
+                    return None, f"Erro de parsing: {str(e1)}. Tentativa alternativa: {str(e2)}"
+            
+            dataset_version = body.hasher.hexdigest()[:12]
+        report.record_bad_lines(df.columns)
+        
+        # Remove linhas completamente vazias
+        rows_read = len(df)
+        df = df.dropna(how='all')
+        report.counts['Linhas vazias removidas'] = rows_read - len(df)
+        
+        # Remove colunas que são completamente vazias ou têm nomes inválidos
+        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+        df = df.dropna(axis=1, how='all')
+        
+        # Impressão digital de 64 bits por linha, calculada uma única vez sobre
+        # os valores brutos; serve de chave estável, e o hash das demais colunas
+        # completa a deduplicação
+        row_keys, duplicated = compute_row_fingerprints(df)
+        df[ROW_KEY_COLUMN] = row_keys
+        report.counts['Duplicadas removidas'] = int(duplicated.sum())
+        if duplicated.any():
+            report.quarantine('Duplicada', df[duplicated])
+            df = df[~duplicated]
+        
+        # Conversões de tipos mais seguras (valores brutos guardados para o relatório de qualidade)
+        raw_values = {col: df[col] for col in QUALITY_COERCED_COLUMNS if col in df.columns}
+        if 'data realizacao licitacao' in df.columns:
+            df['data realizacao licitacao'] = pd.to_datetime(df['data realizacao licitacao'], errors='coerce')
+        
+        if 'ano' in df.columns:
+            df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
+        
+        if 'Valor Estimado' in df.columns:
+            # Remove caracteres não numéricos exceto pontos e vírgulas
+            df['Valor Estimado'] = df['Valor Estimado'].astype(str).str.replace(r'[^\d.,]', '', regex=True)
+            df['Valor Estimado'] = df['Valor Estimado'].str.replace(',', '.', regex=False)
+            df['Valor Estimado'] = pd.to_numeric(df['Valor Estimado'], errors='coerce')
+        
+        if 'pontuacao' in df.columns:
+            df['pontuacao'] = df['pontuacao'].astype(str).str.replace(',', '.', regex=False)
+            df['pontuacao'] = pd.to_numeric(df['pontuacao'], errors='coerce')
+            
+        if 'pontuacao_final' in df.columns:
+            df['pontuacao_final'] = df['pontuacao_final'].astype(str).str.replace(',', '.', regex=False)
+            df['pontuacao_final'] = pd.to_numeric(df['pontuacao_final'], errors='coerce')
+        report.record_coercions(df, raw_values)
+        
+        # Processamento da coluna observacoes - preenche valores em branco (vetorizado)
+        if 'observacoes' in df.columns:
+            empty = df['observacoes'].isna() | (df['observacoes'].astype(str).str.strip() == '')
+            report.counts['Observações vazias preenchidas'] = int(empty.sum())
+            df['observacoes'] = df['observacoes'].mask(empty, OBSERVACOES_DEFAULT)
+        
+        # Renomeação de colunas específicas
+        column_renames = {
+            'Nova Classificação': 'Nova Predição',
+            'observacoes': 'Observações'
+        }
+        
+        for old_name, new_name in column_renames.items():
+            if old_name in df.columns:
+                df = df.rename(columns={old_name: new_name})
+        
+        # Renomeação das colunas de predição (antes feita a cada rerun em main)
+        column_renames = {
+            'classificacao_final - Copiar': 'Predição CIC',
+            'predicao classificacao': 'Predição STI',
+            'classificacao_final': 'Nova Predição',
+        }
+        
+        for old_name, new_name in column_renames.items():
+            if old_name in df.columns:
+                df = df.rename(columns={old_name: new_name})
+        
+        # Escore robusto do Valor Estimado dentro de (unidade, categoria, ano)
+        df = add_outlier_scores(df)
+        
+        # Versão do conjunto de dados - identifica o conteúdo baixado
+        df.attrs['dataset_version'] = dataset_version
+        report.rows_loaded = len(df)
+        df.attrs[QUALITY_ATTR] = report
+        
+        # Validação final - se o dataframe está vazio ou muito pequeno
+        if len(df) == 0:
+            return None, "Nenhum dado válido encontrado na planilha"
+        
+        if len(df.columns) < 5:
+            return None, "Estrutura de dados incompleta - muito poucas colunas"
+            
+        return df, None
+        
+    except requests.exceptions.RequestException as e:
+        if "403" in str(e) or "401" in str(e):
+            return None, "Acesso negado - SharePoint requer permissões ou autenticação"
+        return None, f"Erro de conexão: {str(e)}"
+    except pd.errors.EmptyDataError:
+        return None, "Planilha está vazia ou não contém dados válidos"
+    except pd.errors.ParserError as e:
+        return None, f"Erro de formatação dos dados: {str(e)}"
+    except Exception as e:
+        return None, f"Erro inesperado: {str(e)}"
+
+# Validade dos dados carregados: atualização automática a cada 5 minutos
+DATA_TTL_SECONDS = 300
+
+class DatasetLoader:
+    """Carregamento single-flight dos dados, compartilhado por todas as sessões
+
+    Um único download/processamento por atualização (lock + Future do
+    processo). Enquanto a atualização roda, as sessões recebem a versão
+    anterior (se válida) ou aguardam o Future; uma falha na atualização
+    mantém a versão anterior. on_refresh(dados) é chamado após cada carga
+    bem-sucedida, já com os novos dados publicados.
+    """
+
+    def __init__(self, load, ttl=DATA_TTL_SECONDS, on_refresh=None):
+        self.load = load
+        self.ttl = ttl
+        self.on_refresh = on_refresh
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires_at = 0.0
+        self._future = None
+        self.stats = {'hits': 0, 'misses': 0, 'waits': 0, 'stale': 0, 'errors': 0}
+        self.last_load_seconds = None
+        self.last_error = None
+
+    def get(self, wait=False):
+        """Resultado (dados, erro) atual; wait=True não aceita a versão anterior"""
+        with self._lock:
+            if self._result is not None and time.monotonic() < self._expires_at:
+                self.stats['hits'] += 1
+                return self._result
+            
+            leader = self._future is None
+            if leader:
+                self._future = Future()
+                self.stats['misses'] += 1
+            future = self._future
+            
+            # Versão anterior só é servida se tiver sido carregada sem erro
+            previous = self._result if self._result is not None and self._result[1] is None else None
+            serve_previous = previous is not None and not wait
+            if not leader:
+                self.stats['stale' if serve_previous else 'waits'] += 1
+        
+        if leader:
+            if serve_previous:
+                threading.Thread(target=self._refresh, args=(future,), name='editais-loader', daemon=True).start()
+                return previous
+            self._refresh(future)
+        elif serve_previous:
+            return previous
+        return future.result()
+
+    def _refresh(self, future):
+        started = time.monotonic()
+        try:
+            result = self.load()
+        except Exception as e:
+            result = None, f"Erro inesperado: {str(e)}"
+        
+        with self._lock:
+            if result[1] is not None:
+                self.stats['errors'] += 1
+                self.last_error = result[1]
+            if result[1] is None or self._result is None or self._result[1] is not None:
+                self._result = result
+            self._expires_at = time.monotonic() + self.ttl
+            self.last_load_seconds = time.monotonic() - started
+            self._future = None
+            current = self._result
+        future.set_result(current)
+        if result[1] is None and self.on_refresh is not None:
+            self.on_refresh(result[0])
+
+    def refresh(self):
+        """Expira os dados e aguarda a nova carga (botão Recarregar Dados)"""
+        with self._lock:
+            self._expires_at = 0.0
+        return self.get(wait=True)
+
+    def snapshot(self):
+        """Métricas do carregador para exibição"""
+        with self._lock:
+            return dict(self.stats, refreshing=self._future is not None, last_load_seconds=self.last_load_seconds)
+
+def prepare_dataset():
+    """Baixa a planilha, registra a versão no histórico e separa as colunas de texto pesadas (ver LazyTextColumns)"""
+    df, error = fetch_data_from_sharepoint()
+    if df is not None:
+        record_dataset_history(df)
+        df = split_heavy_columns(df)
+    return df, error
+
+# cache_resource mantém um único carregador por processo; o DataFrame é
+# compartilhado entre reruns e sessões, sem cópia, e deve ser tratado como
+# somente leitura.
+@st.cache_resource
+def get_dataset_loader():
+    """Retorna o carregador single-flight dos dados em memória"""
+    return DatasetLoader(prepare_dataset, on_refresh=lambda df: publish_dataset_version(df, get_dataset_version(df), warm_dataset_query))
+
+def load_data_from_sharepoint():
+    """Carrega dados diretamente do SharePoint"""
+    return get_dataset_loader().get()
+
+# Cache central: artefatos (resultados filtrados, agregados, figuras, índices,
+# exportações) medidos em bytes e mantidos dentro de um orçamento de memória
+CACHE_BUDGET_ENV = 'EDITAIS_CACHE_BUDGET_MB'
+CACHE_DEFAULT_BUDGET_MB = 512
+# Objetos são medidos percorrendo atributos até esta profundidade
+CACHE_SIZE_MAX_DEPTH = 4
+
+def estimate_nbytes(value, _depth=0):
+    """Tamanho aproximado em bytes de um artefato em cache
+
+    Arrays e DataFrames informam o próprio tamanho; contêineres e objetos
+    (índices) somam seus elementos/atributos.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object and len(value):
+            sample = value.ravel()[:1000]
+            return value.nbytes + int(sum(sys.getsizeof(item) for item in sample) * value.size / len(sample))
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if _depth >= CACHE_SIZE_MAX_DEPTH:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_nbytes(key, _depth + 1) + estimate_nbytes(item, _depth + 1) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item, _depth + 1) for item in value)
+    if isinstance(getattr(value, 'nbytes', None), (int, np.integer)):
+        return int(value.nbytes)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item, _depth + 1) for item in vars(value).values())
+    return sys.getsizeof(value)
+
+def format_bytes(nbytes):
+    """Tamanho legível (KB, MB, GB)"""
+    for unit in ['B', 'KB', 'MB']:
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == 'B' else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GB"
+
+class CacheEntry:
+    """Valor em cache com tamanho, custo de recálculo, versão e prioridade"""
+    __slots__ = ('value', 'nbytes', 'cost', 'version', 'priority', 'last_used')
+
+    def __init__(self, value, nbytes, cost, version, priority, last_used):
+        self.value = value
+        self.nbytes = nbytes
+        self.cost = cost
+        self.version = version
+        self.priority = priority
+        self.last_used = last_used
+
+class CacheManager:
+    """Cache central do processo, limitado por memória e thread-safe
+
+    A remoção é um LRU ponderado pelo custo (GreedyDual-Size): cada acesso
+    renova a prioridade para relógio + custo/tamanho, e sai sempre a menor
+    prioridade, com o relógio avançando até ela (empates saem pelo uso mais
+    antigo). Entradas grandes e baratas de recalcular saem primeiro; entradas
+    sem uso envelhecem como no LRU.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.current_version = None
+        self._entries = {}
+        self._clock = 0.0
+        self._tick = 0
+        self._bytes = 0
+        self._datasets = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'rejected': 0}
+
+    def _priority(self, cost, nbytes):
+        return self._clock + cost / max(nbytes, 1)
+
+    def _lookup(self, key):
+        """Entrada da chave (renovando a prioridade) ou None, contando acerto/falta"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            self._tick += 1
+            entry.priority = self._priority(entry.cost, entry.nbytes)
+            entry.last_used = self._tick
+            return entry
+
+    def get(self, key):
+        entry = self._lookup(key)
+        return None if entry is None else entry.value
+
+    def contains(self, key):
+        """Se a chave está em cache (não conta como acerto nem renova a entrada)"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, value, version=None, cost=0.0):
+        """Guarda o valor; acima do orçamento, ele é devolvido mas não guardado"""
+        nbytes = estimate_nbytes(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if nbytes > self.budget_bytes:
+                self._stats['rejected'] += 1
+                return value
+            self._tick += 1
+            self._entries[key] = CacheEntry(value, nbytes, cost, version, self._priority(cost, nbytes), self._tick)
+            self._bytes += nbytes
+            while self._bytes > self.budget_bytes:
+                victim_key = min(self._entries, key=lambda k: (self._entries[k].priority, self._entries[k].last_used))
+                victim = self._entries.pop(victim_key)
+                self._clock = victim.priority
+                self._bytes -= victim.nbytes
+                self._stats['evictions'] += 1
+        return value
+
+    def get_or_compute(self, key, compute, version=None):
+        """Valor em cache ou calculado uma única vez (chamadas simultâneas aguardam)
+
+        O tempo de cálculo é registrado como custo da entrada. Um resultado
+        None também fica em cache.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry.value
+        
+        def compute_and_store():
+            started = time.perf_counter()
+            result = compute()
+            return self.put(key, result, version, time.perf_counter() - started)
+        
+        return self._flight.do(key, compute_and_store)
+
+    def retain_version(self, version):
+        """Ao mudar a versão dos dados, descarta as entradas das versões anteriores
+
+        Chamado só pelos carregadores, após cada carga (publish_dataset_version):
+        a versão atual é a última carregada, mesmo que o conteúdo volte a uma
+        versão já vista. Sessões que ainda usam a versão anterior não mudam a
+        versão do cache.
+        """
+        with self._lock:
+            if version == self.current_version:
+                return
+            self.current_version = version
+            stale = [key for key, entry in self._entries.items() if entry.version not in (None, version)]
+            for key in stale:
+                self._bytes -= self._entries.pop(key).nbytes
+            self._stats['invalidations'] += len(stale)
+            self._datasets = {name: size for name, size in self._datasets.items() if size[0] == version}
+
+    def record_dataset(self, name, version, measure):
+        """Registra o tamanho do conjunto de dados carregado (medido uma vez por versão)
+
+        O conjunto pertence ao carregador e não entra no orçamento nem é removido.
+        """
+        with self._lock:
+            if self._datasets.get(name, (None,))[0] == version:
+                return
+            if self.current_version not in (None, version):
+                return
+        nbytes = measure()
+        with self._lock:
+            self._datasets[name] = (version, nbytes)
+
+    def clear(self):
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self.current_version = None
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'budget_bytes': self.budget_bytes,
+                'dataset_bytes': sum(nbytes for _, nbytes in self._datasets.values()),
+            }
+
+class CacheNamespace:
+    """Visão de um espaço de nomes do cache central (chaves prefixadas)"""
+
+    def __init__(self, manager, name):
+        self.manager = manager
+        self.name = name
+
+    def get(self, key):
+        return self.manager.get((self.name, key))
+
+    def contains(self, key):
+        return self.manager.contains((self.name, key))
+
+    def put(self, key, value, version=None, cost=0.0):
+        return self.manager.put((self.name, key), value, version, cost)
+
+    def get_or_compute(self, key, compute, version=None):
+        return self.manager.get_or_compute((self.name, key), compute, version)
+
+def get_cache_budget_bytes():
+    """Orçamento do cache central (EDITAIS_CACHE_BUDGET_MB, padrão 512 MB)"""
+    try:
+        budget_mb = float(os.environ.get(CACHE_BUDGET_ENV, CACHE_DEFAULT_BUDGET_MB))
+    except ValueError:
+        budget_mb = CACHE_DEFAULT_BUDGET_MB
+    return int(max(budget_mb, 1) * 1024 * 1024)
+
+@st.cache_resource
+def get_cache_manager():
+    """Retorna o cache central do processo"""
+    return CacheManager(get_cache_budget_bytes())
+
+def version_cached(name):
+    """Memoiza a função no cache central, por versão dos dados
+
+    O primeiro argumento é a versão; parâmetros iniciados por '_' não entram
+    na chave (como no st.cache_resource).
+    """
+    def decorator(fn):
+        params = fn.__code__.co_varnames[:fn.__code__.co_argcount]
+        
+        @functools.wraps(fn)
+        def wrapper(*args):
+            key = (name,) + tuple(arg for param, arg in zip(params, args) if not param.startswith('_'))
+            return get_cache_manager().get_or_compute(key, lambda: fn(*args), version=args[0])
+        return wrapper
+    return decorator
+
+def extract_unique_categories(df, column_name):
+    """Extrai categorias únicas de uma coluna multi-label (separadas por ; ou ,)"""
+    if column_name not in df.columns:
+        return []
+    
+    unique_categories = set()
+    for value in df[column_name].dropna():
+        if pd.isna(value):
+            continue
+        
+        value_str = str(value).strip()
+        if not value_str:
+            continue
+            
+        # Separadores possíveis: ; ou ,
+        if ';' in value_str:
+            categories = [cat.strip() for cat in value_str.split(';') if cat.strip()]
+        elif ',' in value_str:
+            categories = [cat.strip() for cat in value_str.split(',') if cat.strip()]
+        else:
+            categories = [value_str]
+        
+        unique_categories.update(categories)
+    
+    # Remover valores vazios e limitar a 14 categorias
+    unique_categories = [cat for cat in unique_categories if cat and cat != 'nan']
+    return sorted(list(unique_categories))[:14]
+
+def create_overview_metrics(df):
+    """Cria métricas de visão geral com dados fixos da base completa"""
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric(
+            label="📋 Total de Editais",
+            value="52.429",
+            delta=None
+        )
+    
+    with col2:
+        st.metric(
+            label="💰 Valor Total Estimado",
+            value="R$ 244 Bilhões",
+            delta=None
+        )
+    
+    with col3:
+        st.metric(
+            label="🏷️ Categorias Únicas",
+            value="14",
+            delta=None
+        )
+    
+    with col4:
+        st.metric(
+            label="🏢 Unidades Únicas",
+            value="729",
+            delta=None
+        )
+
+def create_categorization_metrics(total_linhas, linhas_diferentes):
+    """Análise de categorização; linhas_diferentes é None sem as colunas de predição"""
+    st.markdown("### 📈 Análise de Categorização")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(
+            label="📋 Editais em Múltiplas Categorias",
+            value="8.574",
+            delta="16,35%"
+        )
+    
+    with col2:
+        st.metric(
+            label="📄 Editais em Categoria Única",
+            value="43.855", 
+            delta="83,65%"
+        )
+    
+    with col3:
+        # Calcula % de mudança entre as predições
+        if linhas_diferentes is not None:
+            if total_linhas > 0:
+                percentual_mudanca = (linhas_diferentes / total_linhas) * 100
+                
+                st.metric(
+                    label="🔄 Mudanças nas Predições",
+                    value=f"{percentual_mudanca:.1f}%",
+                    delta=f"{linhas_diferentes:,} casos"
+                )
+            else:
+                st.metric(
+                    label="🔄 Mudanças nas Predições",
+                    value="0%",
+                    delta="0 casos"
+                )
+    
+    # Texto explicativo sobre as mudanças
+    if linhas_diferentes is not None and total_linhas > 0:
+        percentual_mudanca = (linhas_diferentes / total_linhas) * 100
+        st.info(f"📊 **Foram identificadas mudanças em {percentual_mudanca:.1f}% dos casos, onde a Nova Predição difere da Predição Antiga.**")
+
+# Modos da busca avançada: texto literal (padrão), curinga (* e ?) e regex
+SEARCH_MODES = {
+    'Texto': 'texto',
+    'Curinga (*, ?)': 'curinga',
+    'Expressão regular': 'regex',
+}
+SEARCH_TEXT_KEYS = ('contains_and', 'contains_or', 'not_contains')
+SEARCH_COLUMNS = ['objeto', 'unidade', 'observacoes', 'todos_termos', 'descricao situacao edital', 'objeto_processada']
+# Linhas por bloco na construção do índice de trigramas (limita memória temporária)
+TRIGRAM_BUILD_CHUNK_ROWS = 4096
+
+def has_text_search(search_params):
+    """Indica se algum campo de texto da busca avançada está preenchido"""
+    return any((search_params or {}).get(key, '').strip() for key in SEARCH_TEXT_KEYS)
+
+def split_search_terms(search_text):
+    """Separa os termos por ';' - sem ';' o texto inteiro é uma frase única"""
+    search_text = search_text.strip()
+    if ';' in search_text:
+        return [term.strip() for term in search_text.split(';') if term.strip()]
+    return [search_text] if search_text else []
+
+def wildcard_to_regex(pattern):
+    """Converte curingas (* = qualquer sequência, ? = um caractere) em regex"""
+    return ''.join(
+        '.*' if char == '*' else '.' if char == '?' else re.escape(char)
+        for char in pattern
+    )
+
+# Opcodes de repetição do sre_parse (POSSESSIVE_REPEAT existe a partir do 3.11)
+REPEAT_OPCODES = tuple(
+    getattr(sre_constants, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+    if hasattr(sre_constants, name)
+)
+
+def extract_required_literals(parsed):
+    """Extrai da regex os literais obrigatórios como consulta ('and'/'or')
+
+    Percorre a árvore do sre_parse: sequências de LITERAL viram strings,
+    alternâncias viram 'or' e repetições com mínimo >= 1 são obrigatórias.
+    Retorna None quando nada obrigatório pode ser garantido.
+    """
+    required = []
+    run = []
+    
+    def flush():
+        if run:
+            required.append(''.join(run))
+            run.clear()
+    
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av).lower())
+            continue
+        
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            sub_query = extract_required_literals(av[-1])
+            if sub_query:
+                required.append(sub_query)
+        elif op is sre_constants.BRANCH:
+            branches = [extract_required_literals(branch) for branch in av[1]]
+            if all(branches):
+                required.append(('or', branches))
+        elif op in REPEAT_OPCODES and av[0] >= 1:
+            sub_query = extract_required_literals(av[2])
+            if sub_query:
+                required.append(sub_query)
+    
+    flush()
+    return ('and', required) if required else None
+
+@functools.lru_cache(maxsize=256)
+def compile_search_pattern(term, mode):
+    """Compila o termo (curinga/regex) e extrai sua consulta de trigramas
+
+    Cacheado por processo: o mesmo padrão não é recompilado a cada rerun.
+    Regex inválida é tratada como texto literal.
+    """
+    pattern = wildcard_to_regex(term) if mode == 'curinga' else term
+    try:
+        compiled = re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        pattern = re.escape(term)
+        compiled = re.compile(pattern, re.IGNORECASE)
+    return compiled, extract_required_literals(sre_parse.parse(pattern))
+
+def invalid_regex_terms(search_params):
+    """Lista os termos de regex inválidos (para aviso na interface)"""
+    invalid = []
+    for key in SEARCH_TEXT_KEYS:
+        for term in split_search_terms((search_params or {}).get(key, '')):
+            try:
+                re.compile(term)
+            except re.error:
+                invalid.append(term)
+    return invalid
+
+def sorted_unique(values):
+    """Valores únicos de um array já ordenado (evita o np.unique baseado em hash)"""
+    if len(values) == 0:
+        return values
+    return values[np.r_[True, values[1:] != values[:-1]]]
+
+class TrigramIndex:
+    """Índice invertido de trigramas (bytes UTF-8) das colunas de busca
+
+    As listas de linhas de cada trigrama ficam em um único array ordenado
+    (rows) delimitado por offsets, o que permite interseções com numpy.
+    """
+
+    def __init__(self, texts, row_keys=None):
+        self.n_rows = len(texts)
+        self.row_keys = row_keys
+        
+        chunks = []
+        for start in range(0, len(texts), TRIGRAM_BUILD_CHUNK_ROWS):
+            chunks.append(self._chunk_keys(texts[start:start + TRIGRAM_BUILD_CHUNK_ROWS], start))
+        keys = np.sort(np.concatenate(chunks)) if chunks else np.empty(0, dtype=np.uint64)
+        
+        trigrams = (keys >> np.uint64(32)).astype(np.uint32)
+        self.rows = (keys & np.uint64(0xFFFFFFFF)).astype(np.int32)
+        starts = np.flatnonzero(np.r_[True, trigrams[1:] != trigrams[:-1]]) if len(trigrams) else np.empty(0, dtype=np.int64)
+        self.trigrams = trigrams[starts]
+        self.offsets = np.append(starts, len(trigrams))
+
+    @staticmethod
+    def _chunk_keys(texts, row_offset):
+        """Pares (trigrama << 32 | linha) únicos de um bloco de linhas"""
+        # 0x00 separa colunas e 0x01 separa linhas; trigramas que os contêm são descartados
+        data = np.frombuffer('\x01'.join(texts).encode('utf-8'), dtype=np.uint8)
+        if len(data) < 3:
+            return np.empty(0, dtype=np.uint64)
+        
+        row_ids = np.cumsum(data == 1) + row_offset
+        separator = data <= 1
+        valid = ~(separator[:-2] | separator[1:-1] | separator[2:])
+        trigrams = (
+            (data[:-2].astype(np.uint32) << 16)
+            | (data[1:-1].astype(np.uint32) << 8)
+            | data[2:].astype(np.uint32)
+        )
+        keys = (trigrams[valid].astype(np.uint64) << np.uint64(32)) | row_ids[:-2][valid].astype(np.uint64)
+        return sorted_unique(np.sort(keys))
+
+    def postings(self, trigram):
+        """Linhas (ordenadas) que contêm o trigrama"""
+        position = np.searchsorted(self.trigrams, trigram)
+        if position == len(self.trigrams) or self.trigrams[position] != trigram:
+            return np.empty(0, dtype=np.int32)
+        return self.rows[self.offsets[position]:self.offsets[position + 1]]
+
+    def literal_candidates(self, literal):
+        """Linhas que contêm todos os trigramas do literal (None = sem restrição)"""
+        data = literal.encode('utf-8')
+        trigrams = sorted({(data[i] << 16) | (data[i + 1] << 8) | data[i + 2] for i in range(len(data) - 2)})
+        if not trigrams:
+            return None
+        
+        lists = sorted((self.postings(trigram) for trigram in trigrams), key=len)
+        result = lists[0]
+        for rows in lists[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+    def candidates(self, query):
+        """Avalia a consulta de literais e retorna as linhas candidatas (ou None)"""
+        if query is None:
+            return None
+        if isinstance(query, str):
+            return self.literal_candidates(query)
+        
+        operator, sub_queries = query
+        results = [self.candidates(sub_query) for sub_query in sub_queries]
+        if operator == 'or':
+            if any(result is None for result in results):
+                return None
+            return functools.reduce(np.union1d, results)
+        
+        results = sorted((result for result in results if result is not None), key=len)
+        if not results:
+            return None
+        return functools.reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), results)
+
+@version_cached('trigramas')
+def get_trigram_index(dataset_version, search_columns, _df):
+    """Constrói (uma vez por versão dos dados) o índice de trigramas da busca"""
+    text = get_column(_df, search_columns[0]).fillna('').astype(str)
+    for col in search_columns[1:]:
+        text = text + '\x00' + get_column(_df, col).fillna('').astype(str)
+    texts = text.str.lower().str.replace('\x01', ' ', regex=False).tolist()
+    row_keys = _df[ROW_KEY_COLUMN].to_numpy() if ROW_KEY_COLUMN in _df.columns else None
+    return TrigramIndex(texts, row_keys)
+
+def index_matches_rows(index, df):
+    """Confere se um índice pré-calculado corresponde às linhas (posições) de df"""
+    if index.n_rows != len(df):
+        return False
+    if index.row_keys is None or ROW_KEY_COLUMN not in df.columns:
+        return True
+    return np.array_equal(index.row_keys, df[ROW_KEY_COLUMN].to_numpy())
+
+def match_pattern(df_search, search_columns, term, mode):
+    """Máscara das linhas em que o padrão casa em alguma coluna de busca
+
+    O índice de trigramas reduz as linhas candidatas; a regex compilada só é
+    executada sobre elas.
+    """
+    compiled, query = compile_search_pattern(term, mode)
+    
+    candidates = None
+    if query is not None:
+        index = get_trigram_index(get_dataset_version(df_search), tuple(search_columns), df_search)
+        if index_matches_rows(index, df_search):
+            candidates = index.candidates(query)
+    
+    mask = np.zeros(len(df_search), dtype=bool)
+    subset = df_search if candidates is None else df_search.iloc[candidates]
+    if len(subset) == 0:
+        return mask
+    
+    subset_mask = np.zeros(len(subset), dtype=bool)
+    with warnings.catch_warnings():
+        # Grupos de captura são válidos aqui; só interessa se houve casamento
+        warnings.filterwarnings('ignore', message='This pattern is interpreted as a regular expression')
+        for col in search_columns:
+            subset_mask |= get_column(subset, col).fillna('').astype(str).str.contains(compiled, na=False).to_numpy(dtype=bool)
+    
+    if candidates is None:
+        return subset_mask
+    mask[candidates] = subset_mask
+    return mask
+
+def advanced_search_mask(df, search_params):
+    """Máscara booleana (por posição) da busca avançada com operadores lógicos
+
+    No modo texto os termos são buscados literalmente; nos modos curinga e
+    regex cada termo é um padrão, pré-filtrado pelo índice de trigramas.
+    """
+    final_mask = np.ones(len(df), dtype=bool)
+    if not has_text_search(search_params):
+        return final_mask
+    
+    search_columns = [col for col in SEARCH_COLUMNS if col in available_columns(df)]
+    
+    if not search_columns:
+        return final_mask
+    
+    mode = search_params.get('mode', 'texto')
+    
+    # CORREÇÃO: Reset do índice para evitar problemas com filtros sucessivos
+    df_search = df.reset_index(drop=True)
+    
+    def match_term(term):
+        if mode in ('curinga', 'regex'):
+            return match_pattern(df_search, search_columns, term, mode)
+        
+        term = term.lower()
+        term_mask = np.zeros(len(df_search), dtype=bool)
+        for col in search_columns:
+            term_mask |= get_column(df_search, col).fillna('').astype(str).str.lower().str.contains(term, na=False, regex=False).to_numpy(dtype=bool)
+        return term_mask
+    
+    # Termos que deve conter (AND) - com ';' cada termo é independente e
+    # TODOS devem estar presentes; sem ';' o texto é tratado como frase única
+    for term in split_search_terms(search_params.get('contains_and', '')):
+        final_mask &= match_term(term)
+    
+    # Termos que deve conter (OR) - QUALQUER um pode estar presente
+    or_terms = split_search_terms(search_params.get('contains_or', ''))
+    if or_terms:
+        or_mask = np.zeros(len(df_search), dtype=bool)
+        for term in or_terms:
+            or_mask |= match_term(term)
+        final_mask &= or_mask
+    
+    # Termos que NÃO deve conter
+    for term in split_search_terms(search_params.get('not_contains', '')):
+        final_mask &= ~match_term(term)
+    
+    return final_mask
+
+def nova_predicao_mask(df, selected_category):
+    """Máscara de containment para Nova Predição (vetorizada)"""
+    if selected_category == 'Todas' or 'Nova Predição' not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    
+    # Verifica se contém a categoria (busca parcial/containment)
+    values = df['Nova Predição'].fillna('').astype(str).str.strip().str.upper()
+    return values.str.contains(selected_category.upper(), regex=False).to_numpy(dtype=bool)
+
+# Colunas com filtro de faixa (valor do filtro é uma tupla (mínimo, máximo))
+RANGE_FILTER_COLUMNS = ['data realizacao licitacao', 'Valor Estimado']
+
+class SortedColumnIndex:
+    """Permutação ordenada de uma coluna numérica/data (sem nulos)
+
+    Uma faixa [mínimo, máximo] vira uma fatia contígua da permutação,
+    encontrada com searchsorted em O(log n).
+    """
+
+    def __init__(self, values, row_keys=None):
+        values = pd.Series(values).reset_index(drop=True)
+        valid = np.flatnonzero(values.notna().to_numpy())
+        order = np.argsort(values.iloc[valid].to_numpy(), kind='stable')
+        self.order = valid[order]
+        self.sorted_values = pd.Index(values.iloc[self.order].to_numpy())
+        self.n_rows = len(values)
+        self.row_keys = row_keys
+
+    def slice_rows(self, low, high):
+        """Posições das linhas com valor em [low, high] (ordem do valor)"""
+        start = self.sorted_values.searchsorted(low, side='left') if low is not None else 0
+        stop = self.sorted_values.searchsorted(high, side='right') if high is not None else len(self.order)
+        return self.order[start:stop]
+
+@version_cached('indice_ordenado')
+def get_sorted_index(dataset_version, column, _df):
+    """Constrói (uma vez por versão dos dados) o índice ordenado da coluna"""
+    row_keys = _df[ROW_KEY_COLUMN].to_numpy() if ROW_KEY_COLUMN in _df.columns else None
+    return SortedColumnIndex(_df[column], row_keys)
+
+# Número de marcas do slider de Valor Estimado (distribuídas por percentis)
+VALUE_SLIDER_STEPS = 100
+
+def value_slider_steps(index):
+    """Marcas do slider de valor: percentis da distribuição (muito assimétrica)"""
+    if len(index.order) == 0:
+        return []
+    positions = np.linspace(0, len(index.order) - 1, VALUE_SLIDER_STEPS + 1).round().astype(int)
+    return sorted({float(value) for value in index.sorted_values[positions]})
+
+def format_brl(value):
+    """Formata um valor em reais no padrão brasileiro"""
+    return f"R$ {value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+# Valores atípicos: escore robusto do Valor Estimado dentro do grupo
+# (unidade, categoria principal, ano), calculado uma vez por versão dos dados
+OUTLIER_SCORE_COLUMN = 'Escore Atípico'
+OUTLIER_MEDIAN_COLUMN = 'Mediana do Grupo'
+OUTLIER_THRESHOLD = 3.5
+OUTLIER_MIN_GROUP = 5
+# Opções do filtro da sidebar → valor guardado em filters[OUTLIER_SCORE_COLUMN]
+OUTLIER_FILTER_OPTIONS = {
+    'Todos': 'Todos',
+    'Acima do padrão': 'acima',
+    'Abaixo do padrão': 'abaixo',
+    'Acima ou abaixo': 'ambos',
+}
+
+def outlier_group_keys(df):
+    """Chaves de grupo presentes: unidade, categoria principal e ano
+
+    Sem nenhuma delas, a base inteira forma um único grupo.
+    """
+    keys = {}
+    if 'unidade' in df.columns:
+        keys['unidade'] = df['unidade'].fillna('').astype(str)
+    if 'Nova Predição' in df.columns:
+        keys['categoria'] = (
+            df['Nova Predição'].fillna('').astype(str).str.upper()
+            .str.split(LABEL_SEPARATOR_PATTERN, n=1, regex=True).str[0].str.strip()
+        )
+    if 'ano' in df.columns:
+        keys['ano'] = df['ano']
+    if not keys:
+        keys['grupo'] = 'Toda a base'
+    return pd.DataFrame(keys, index=df.index)
+
+def robust_group_stats(df):
+    """Estatísticas robustas do Valor Estimado por grupo
+
+    Retorna (estatísticas por linha, tabela por grupo). O escore é o z
+    modificado 0,6745·(x − mediana)/MAD sobre log10 do valor (a distribuição
+    dos valores é muito assimétrica); grupos com menos de OUTLIER_MIN_GROUP
+    valores ou MAD nulo ficam sem escore.
+    """
+    keys = outlier_group_keys(df)
+    values = df['Valor Estimado'].where(df['Valor Estimado'] > 0)
+    log_values = np.log10(values)
+    by_group = [keys[col] for col in keys.columns]
+    
+    grouped = log_values.groupby(by_group, dropna=False, sort=False)
+    size = grouped.transform('count')
+    median = grouped.transform('median')
+    deviation = (log_values - median).abs()
+    mad = deviation.groupby(by_group, dropna=False, sort=False).transform('median')
+    
+    valid = (size >= OUTLIER_MIN_GROUP) & (mad > 0)
+    score = (0.6745 * (log_values - median) / mad).where(valid)
+    per_row = pd.DataFrame({
+        OUTLIER_SCORE_COLUMN: score.round(2),
+        OUTLIER_MEDIAN_COLUMN: values.groupby(by_group, dropna=False, sort=False).transform('median').where(valid)
+    }, index=df.index)
+    
+    raw = values.groupby(by_group, dropna=False, sort=True)
+    table = raw.quantile([0.25, 0.5, 0.75, 0.95]).unstack()
+    table.columns = ['Q1', 'Mediana', 'Q3', 'P95']
+    table.insert(0, 'Editais', raw.count())
+    table['MAD (log10)'] = deviation.groupby(by_group, dropna=False, sort=True).median()
+    table.index.names = list(keys.columns)
+    return per_row, table.reset_index()
+
+def add_outlier_scores(df):
+    """Anexa o escore atípico e a mediana do grupo (uma vez, na carga dos dados)"""
+    if 'Valor Estimado' not in df.columns:
+        return df
+    per_row, _ = robust_group_stats(df)
+    df[OUTLIER_SCORE_COLUMN] = per_row[OUTLIER_SCORE_COLUMN]
+    df[OUTLIER_MEDIAN_COLUMN] = per_row[OUTLIER_MEDIAN_COLUMN]
+    return df
+
+class OutlierIndex:
+    """Máscaras (por posição) das linhas atípicas, prontas para o filtro
+
+    Filtrar pelos atípicos é só uma consulta a uma máscara pré-calculada.
+    """
+    KINDS = ('acima', 'abaixo', 'ambos')
+
+    def __init__(self, scores, row_keys=None):
+        scores = pd.to_numeric(pd.Series(scores), errors='coerce').to_numpy(dtype=float)
+        above = scores >= OUTLIER_THRESHOLD
+        below = scores <= -OUTLIER_THRESHOLD
+        self.masks = {'acima': above, 'abaixo': below, 'ambos': above | below}
+        self.n_rows = len(scores)
+        self.row_keys = row_keys
+
+@version_cached('atipicos')
+def get_outlier_index(dataset_version, _df):
+    """Constrói (uma vez por versão dos dados) as máscaras de atípicos"""
+    row_keys = _df[ROW_KEY_COLUMN].to_numpy() if ROW_KEY_COLUMN in _df.columns else None
+    return OutlierIndex(_df[OUTLIER_SCORE_COLUMN], row_keys)
+
+@version_cached('estatisticas_atipicos')
+def get_outlier_stats(dataset_version, _load_rows):
+    """Tabela de estatísticas robustas por grupo da versão dos dados
+
+    _load_rows() retorna unidade, Nova Predição, ano e Valor Estimado de
+    todas as linhas da base.
+    """
+    return robust_group_stats(_load_rows())[1]
+
+def outlier_mask(df, kind):
+    """Máscara das linhas atípicas (acima, abaixo ou ambos) de df"""
+    if OUTLIER_SCORE_COLUMN not in df.columns or kind not in OutlierIndex.KINDS:
+        return np.zeros(len(df), dtype=bool)
+    index = get_outlier_index(get_dataset_version(df), df)
+    if not index_matches_rows(index, df):
+        index = OutlierIndex(df[OUTLIER_SCORE_COLUMN])
+    return index.masks[kind]
+
+def top_outliers(df, limit=20):
+    """Linhas mais atípicas (maior |escore|) de df"""
+    scores = df[OUTLIER_SCORE_COLUMN].abs()
+    rows = scores[scores >= OUTLIER_THRESHOLD].nlargest(limit).index
+    columns = [col for col in OUTLIER_TABLE_COLUMNS if col in df.columns]
+    return df.loc[rows, columns]
+
+# Colunas usadas no cálculo e na tabela de atípicos do dashboard
+OUTLIER_SOURCE_COLUMNS = ['unidade', 'Nova Predição', 'ano', 'Valor Estimado']
+OUTLIER_TABLE_COLUMNS = ['unidade', 'Nova Predição', 'ano', 'objeto', 'Valor Estimado', OUTLIER_MEDIAN_COLUMN, OUTLIER_SCORE_COLUMN]
+
+def show_outliers(top, above, below, group_stats):
+    """Seção do dashboard com as contagens, os editais mais atípicos e as estatísticas por grupo"""
+    st.markdown("### 🚨 Valores Atípicos por Unidade e Categoria")
+    col1, col2 = st.columns(2)
+    col1.metric("Acima do Padrão", f"{above:,}")
+    col2.metric("Abaixo do Padrão", f"{below:,}")
+    st.caption(
+        f"Escore robusto do Valor Estimado (log) dentro de unidade × categoria × ano; "
+        f"|escore| ≥ {OUTLIER_THRESHOLD} é considerado atípico"
+    )
+    if len(top):
+        top = top.reset_index(drop=True)
+        if OUTLIER_MEDIAN_COLUMN in top.columns:
+            top[OUTLIER_MEDIAN_COLUMN] = top[OUTLIER_MEDIAN_COLUMN].apply(lambda x: format_brl(x) if pd.notna(x) else 'N/A')
+        st.dataframe(format_page(top), use_container_width=True, hide_index=True)
+    
+    with st.expander("📐 Estatísticas por grupo (mediana, MAD e quantis)"):
+        stats = group_stats().sort_values('Editais', ascending=False)
+        for col in ['Q1', 'Mediana', 'Q3', 'P95']:
+            stats[col] = stats[col].apply(lambda x: format_brl(x) if pd.notna(x) else 'N/A')
+        st.dataframe(stats, use_container_width=True, hide_index=True)
+
+def split_range_filters(filters):
+    """Separa filtros específicos (valor único) dos filtros de faixa (tuplas)"""
+    categorical = {column: value for column, value in filters.items() if not isinstance(value, tuple)}
+    ranges = {column: value for column, value in filters.items() if isinstance(value, tuple)}
+    return categorical, ranges
+
+def filter_mask(df, search_params, filters):
+    """Máscara (por posição) da busca avançada e dos filtros específicos"""
+    # Aplicar busca avançada primeiro
+    mask = advanced_search_mask(df, search_params)
+    
+    for column, value in filters.items():
+        if value not in ['Todas', 'Todos']:
+            # Filtro especial para Nova Predição - busca por containment
+            if column == 'Nova Predição':
+                mask &= nova_predicao_mask(df, value)
+            elif column == OUTLIER_SCORE_COLUMN:
+                # Atípicos: máscara pré-calculada por versão dos dados
+                mask &= outlier_mask(df, value)
+            elif column == 'ano':
+                # Ano numérico (float quando há nulos): compara o número, não o texto
+                year = pd.to_numeric(pd.Series([value]), errors='coerce').iloc[0]
+                mask &= (pd.to_numeric(df[column], errors='coerce') == year).to_numpy(dtype=bool)
+            else:
+                # Filtro exato para outras colunas
+                mask &= (df[column].fillna('').astype(str) == str(value)).to_numpy(dtype=bool)
+    
+    return mask
+
+def select_rows(df, mask, ranges):
+    """Posições (em ordem original) das linhas da máscara dentro das faixas
+
+    Cada faixa é uma fatia do índice ordenado; a menor fatia é filtrada pela
+    máscara e pelas demais faixas, com custo proporcional ao seu tamanho.
+    """
+    if not ranges:
+        return np.flatnonzero(mask)
+    
+    slices = []
+    for column, (low, high) in ranges.items():
+        index = get_sorted_index(get_dataset_version(df), column, df)
+        if not index_matches_rows(index, df):
+            index = SortedColumnIndex(df[column])
+        slices.append(index.slice_rows(low, high))
+    
+    slices.sort(key=len)
+    rows = slices[0][mask[slices[0]]]
+    for other in slices[1:]:
+        member = np.zeros(len(df), dtype=bool)
+        member[other] = True
+        rows = rows[member[rows]]
+    return np.sort(rows)
+
+def build_filter_info(header, search_params, filters, show_filters=True):
+    """Texto com a busca e os filtros aplicados (None se nada estiver ativo)"""
+    active_search = has_text_search(search_params)
+    active_filters = any(
+        (isinstance(v, list) and v != ['Todas']) or 
+        (isinstance(v, str) and v not in ['Todas', 'Todos']) or
+        (isinstance(v, tuple))  # faixas de data/valor
+        for v in filters.values()
+    )
+    
+    if not (active_search or active_filters):
+        return None
+    
+    filter_info = header
+    
+    # Adiciona informação sobre busca avançada se aplicável
+    if active_search:
+        search_types = []
+        if search_params.get('contains_and'):
+            search_types.append("E")
+        if search_params.get('contains_or'):
+            search_types.append("OU")
+        if search_params.get('not_contains'):
+            search_types.append("NÃO")
+        if search_types:
+            filter_info += f" | 🔎 Busca avançada: {', '.join(search_types)}"
+    
+    # Adiciona informação sobre filtros específicos
+    if show_filters and active_filters:
+        filter_types = []
+        if filters.get('Nova Predição'):
+            filter_types.append(f"Nova Predição: {filters['Nova Predição']}")
+        if filters.get('Predição Antiga'):
+            filter_types.append(f"Predição Antiga: {filters['Predição Antiga']}")
+        if filters.get('ano'):
+            filter_types.append(f"Ano: {filters['ano']}")
+        if filters.get('unidade'):
+            filter_types.append(f"Unidade: {filters['unidade']}")
+        if filters.get('data realizacao licitacao'):
+            data_inicio, data_fim = filters['data realizacao licitacao']
+            filter_types.append(f"Data: {data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y}")
+        if filters.get('Valor Estimado'):
+            valor_min, valor_max = filters['Valor Estimado']
+            filter_types.append(f"Valor: {format_brl(valor_min)} a {format_brl(valor_max)}")
+        if filters.get(OUTLIER_SCORE_COLUMN):
+            labels = {kind: label for label, kind in OUTLIER_FILTER_OPTIONS.items()}
+            filter_types.append(f"Atípicos: {labels.get(filters[OUTLIER_SCORE_COLUMN], filters[OUTLIER_SCORE_COLUMN])}")
+        if filter_types:
+            filter_info += f" | 🎛️ Filtros: {', '.join(filter_types)}"
+    
+    return filter_info
+
+class SingleFlight:
+    """Executa uma única chamada concorrente por chave; as demais aguardam o resultado"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        
+        if not leader:
+            return call.result()
+        
+        try:
+            result = fn()
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+@st.cache_resource
+def get_single_flight():
+    """Retorna o coordenador de chamadas concorrentes do processo"""
+    return SingleFlight()
+
+def get_query_cache():
+    """Resultados filtrados, máscaras e contagens (no cache central)"""
+    return CacheNamespace(get_cache_manager(), 'consultas')
+
+def get_dataset_version(df):
+    """Retorna o identificador da versão dos dados carregados"""
+    return df.attrs.get('dataset_version', str(id(df)))
+
+def make_filter_key(search_params, filters):
+    """Normaliza busca e filtros em uma chave estável (ignora valores vazios)
+
+    Só a busca literal ignora maiúsculas; nos modos curinga e regex o texto
+    entra como foi digitado (\\d e \\D são padrões diferentes).
+    """
+    search_params = search_params or {}
+    literal = search_params.get('mode', 'texto') not in ('curinga', 'regex')
+    search_items = tuple(sorted(
+        (key, value.strip().lower() if literal else value.strip()) for key, value in search_params.items()
+        if value and value.strip()
+    ))
+    filter_items = tuple(sorted(
+        (column, str(value)) for column, value in (filters or {}).items()
+        if value not in ['Todas', 'Todos']
+    ))
+    return search_items, filter_items
+
+def query_filtered_data(df, search_params, filters):
+    """Aplica os filtros usando o cache compartilhado entre sessões e a API local
+
+    Consultas idênticas simultâneas são coalescidas: apenas uma executa
+    compute_filtered_data e as demais recebem o mesmo resultado.
+    """
+    cache_key = (get_dataset_version(df), make_filter_key(search_params, filters))
+    return get_query_cache().get_or_compute(
+        cache_key,
+        lambda: compute_filtered_data(df, search_params, filters),
+        version=cache_key[0]
+    )
+
+def compute_filtered_data(df, search_params, filters):
+    """Calcula o resultado filtrado reaproveitando a máscara base em cache
+
+    A máscara de busca + filtros específicos é cacheada sem as faixas; mover
+    um slider de faixa só refaz a interseção com o índice ordenado.
+    """
+    df = df.reset_index(drop=True)
+    categorical, ranges = split_range_filters(filters)
+    
+    mask_key = ('mascara', get_dataset_version(df), make_filter_key(search_params, categorical))
+    mask = get_query_cache().get_or_compute(
+        mask_key,
+        lambda: filter_mask(df, search_params, categorical),
+        version=mask_key[1]
+    )
+    
+    return df.iloc[select_rows(df, mask, ranges)].reset_index(drop=True)
+
+def get_filtered_data(df, search_params, filters):
+    """Aplica os filtros reaproveitando o último resultado da sessão quando nada mudou"""
+    cache_key = (get_dataset_version(df), make_filter_key(search_params, filters))
+    cached = st.session_state.get('_filtered_cache')
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+
+    filtered_df = query_filtered_data(df, search_params, filters)
+    st.session_state['_filtered_cache'] = (cache_key, filtered_df)
+    return filtered_df
+
+def get_figure_cache():
+    """Dados agregados e JSON das figuras do dashboard (no cache central)"""
+    return CacheNamespace(get_cache_manager(), 'figuras')
+
+def build_chart_data(df):
+    """Reduz os dados filtrados às séries agregadas usadas nos gráficos"""
+    chart_data = {}
+    
+    if 'unidade' in df.columns and len(df) > 0:
+        chart_data['unidade_counts'] = df['unidade'].value_counts().head(10)
+    
+    if 'unidade' in df.columns and 'Valor Estimado' in df.columns and len(df) > 0:
+        chart_data['unidade_valores'] = df.groupby('unidade')['Valor Estimado'].sum().sort_values(ascending=False).head(8)
+    
+    if 'ano' in df.columns and len(df) > 0:
+        chart_data['temporal'] = df['ano'].value_counts().sort_index()
+    
+    return chart_data
+
+def classification_stats(df, filtered_df):
+    """Quantidade, valor total/médio e pontuação média por categoria da Nova Predição
+
+    Calculadas sobre a matriz de categorias da versão (CategoryMatrix): um
+    edital "EDUCAÇÃO; SAÚDE" conta nas duas categorias.
+    """
+    if 'Nova Predição' not in filtered_df.columns:
+        return None
+    
+    matrix = get_category_matrix(get_dataset_version(df), df)
+    scores = filtered_df['pontuacao'] if 'pontuacao' in filtered_df.columns else None
+    return matrix.category_stats(matrix.positions(filtered_df[ROW_KEY_COLUMN]), scores)
+
+# Lista predefinida de classificações (Nova Predição)
+CLASSIFICACOES = [
+    'EDUCAÇÃO',
+    'SAÚDE',
+    'TECNOLOGIA DA INFORMAÇÃO',
+    'SANEAMENTO',
+    'MOBILIDADE',
+    'SEGURANÇA PÚBLICA',
+    'DESENVOLVIMENTO',
+    'OBRAS',
+    'GOVERNANÇA',
+    'PESSOAL',
+    'DESESTATIZAÇÃO',
+    'OUTROS',
+    'RECEITA',
+    'PREVIDÊNCIA'
+]
+
+# Separadores de rótulos em colunas multi-label (como em extract_unique_categories)
+LABEL_SEPARATOR_PATTERN = r'\s*[;,]\s*'
+
+def label_matrix(values, categories=CLASSIFICACOES):
+    """Matriz indicadora linha × categoria (uint8) de uma coluna multi-label
+
+    Rótulos fora da lista de categorias viram colunas extras, em ordem
+    alfabética. Retorna (matriz, categorias).
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    labels = values.fillna('').astype(str).str.strip().str.upper().str.split(LABEL_SEPARATOR_PATTERN, regex=True).explode()
+    labels = labels[labels.notna() & (labels != '')]
+    
+    all_categories = list(categories) + sorted(set(labels.unique()) - set(categories))
+    matrix = np.zeros((len(values), len(all_categories)), dtype=np.uint8)
+    matrix[labels.index.to_numpy(), pd.Categorical(labels, categories=all_categories).codes] = 1
+    return matrix, all_categories
+
+class CategoryMatrix:
+    """Matriz linha × categoria da Nova Predição, com o Valor Estimado de cada linha
+
+    Com 14 categorias a matriz indicadora densa (uint8) ocupa n × 14 bytes;
+    as contagens de coocorrência são Xᵀ·X sobre as linhas filtradas.
+    """
+
+    def __init__(self, labels, values, row_keys=None):
+        self.matrix, self.categories = label_matrix(labels)
+        numeric = pd.to_numeric(pd.Series(values), errors='coerce')
+        self.has_value = numeric.notna().to_numpy()
+        self.values = numeric.fillna(0).to_numpy(dtype=np.float64)
+        self.key_index = pd.Index(row_keys) if row_keys is not None else None
+
+    def positions(self, row_keys):
+        """Posições das linhas (row_keys) na matriz"""
+        return self.key_index.get_indexer(np.asarray(row_keys))
+
+    def cooccurrence(self, positions=None):
+        """Coocorrência, totais por categoria e valores por par de categorias
+
+        Cada rótulo de um edital multi-label conta para a sua categoria.
+        """
+        X = self.matrix if positions is None else self.matrix[positions]
+        values = self.values if positions is None else self.values[positions]
+        
+        Xf = X.astype(np.float64)
+        counts = Xf.T @ Xf
+        value_sums = Xf.T @ (Xf * values[:, None])
+        multi_label = X.sum(axis=1) >= 2
+        
+        # Só as categorias presentes nas linhas filtradas
+        present = np.flatnonzero(np.diag(counts) > 0)
+        categories = [self.categories[i] for i in present]
+        counts = counts[np.ix_(present, present)].astype(np.int64)
+        value_sums = value_sums[np.ix_(present, present)]
+        
+        totals = pd.DataFrame({
+            'Editais': np.diag(counts),
+            'Em Múltiplas Categorias': (Xf[:, present].T @ multi_label.astype(np.float64)).astype(np.int64),
+            'Valor Total': np.diag(value_sums).round(2),
+        }, index=pd.Index(categories, name='Categoria')).sort_values('Editais', ascending=False)
+        
+        return {
+            'contagem': pd.DataFrame(counts, index=categories, columns=categories),
+            'valores': pd.DataFrame(value_sums, index=categories, columns=categories),
+            'totais': totals,
+            'multiplas': int(multi_label.sum()),
+            'linhas': len(X),
+        }
+
+    def category_stats(self, positions=None, scores=None):
+        """Quantidade, valor total/médio e pontuação média por categoria
+
+        Um edital multi-rótulo ("EDUCAÇÃO; SAÚDE") conta em cada uma das suas
+        categorias, sem formar um grupo próprio. Quantidade e médias consideram
+        as linhas com Valor Estimado; scores (pontuação, na ordem de positions)
+        é opcional.
+        """
+        X = (self.matrix if positions is None else self.matrix[positions]).astype(np.float64)
+        has_value = self.has_value if positions is None else self.has_value[positions]
+        values = self.values if positions is None else self.values[positions]
+        
+        counts = X.T @ has_value.astype(np.float64)
+        totals = X.T @ values
+        stats = {
+            'Quantidade': counts.astype(np.int64),
+            'Valor Total': totals,
+            'Valor Médio': np.divide(totals, counts, out=np.full(len(counts), np.nan), where=counts > 0),
+        }
+        if scores is not None:
+            scores = pd.to_numeric(pd.Series(scores), errors='coerce').to_numpy(dtype=np.float64)
+            scored = ~np.isnan(scores)
+            score_counts = X.T @ scored.astype(np.float64)
+            score_sums = X.T @ np.where(scored, scores, 0.0)
+            stats['Pontuação Média'] = np.divide(score_sums, score_counts, out=np.full(len(counts), np.nan), where=score_counts > 0)
+        
+        present = np.flatnonzero(X.sum(axis=0) > 0)
+        frame = pd.DataFrame(stats, index=pd.Index(self.categories, name='Nova Predição'))
+        return frame.iloc[present].round(2)
+
+@version_cached('matriz_categorias')
+def get_category_matrix(dataset_version, _df):
+    """Constrói (uma vez por versão dos dados) a matriz de categorias"""
+    return CategoryMatrix(
+        _df['Nova Predição'],
+        _df['Valor Estimado'] if 'Valor Estimado' in _df.columns else np.zeros(len(_df)),
+        _df[ROW_KEY_COLUMN].to_numpy() if ROW_KEY_COLUMN in _df.columns else None
+    )
+
+def filtered_cooccurrence(df, filtered_df):
+    """Coocorrência das linhas filtradas, sobre a matriz da versão dos dados"""
+    matrix = get_category_matrix(get_dataset_version(df), df)
+    return matrix.cooccurrence(matrix.positions(filtered_df[ROW_KEY_COLUMN]))
+
+def build_cooccurrence_figure(cooccurrence):
+    """Heatmap da coocorrência de categorias (JSON), com o valor do par no hover"""
+    import plotly.graph_objects as go
+    
+    counts = cooccurrence['contagem']
+    fig = go.Figure(go.Heatmap(
+        z=counts.to_numpy(),
+        x=counts.columns,
+        y=counts.index,
+        customdata=cooccurrence['valores'].to_numpy(),
+        text=counts.to_numpy(),
+        texttemplate='%{text}',
+        colorscale='Blues',
+        hovertemplate='%{y} + %{x}<br>Editais: %{z}<br>Valor Estimado: R$ %{customdata:,.2f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title="🔗 Coocorrência de Categorias (Nova Predição)",
+        height=max(400, 40 * len(counts) + 150),
+        yaxis={'autorange': 'reversed'}
+    )
+    return fig.to_json()
+
+def get_cooccurrence(cache_key, compute_cooccurrence):
+    """Coocorrência e heatmap, reaproveitados do cache de figuras"""
+    def compute():
+        cooccurrence = compute_cooccurrence()
+        return {'data': cooccurrence, 'figure': build_cooccurrence_figure(cooccurrence) if cooccurrence['linhas'] else None}
+    
+    if cache_key is None:
+        return compute()
+    return get_figure_cache().get_or_compute(('coocorrencia', cache_key), compute, version=cache_key[0])
+
+def show_cooccurrence(cached):
+    """Seção do dashboard com o heatmap e os totais multi-rótulo por categoria"""
+    import plotly.io as pio
+    
+    cooccurrence = cached['data']
+    if cached['figure'] is None:
+        return
+    
+    st.markdown("### 🔗 Coocorrência de Categorias")
+    st.caption(
+        f"{cooccurrence['multiplas']:,} de {cooccurrence['linhas']:,} editais filtrados "
+        f"({cooccurrence['multiplas'] / cooccurrence['linhas'] * 100:.1f}%) estão em mais de uma categoria. "
+        "Cada categoria de um edital multi-rótulo é contada nos totais."
+    )
+    st.plotly_chart(pio.from_json(cached['figure']), use_container_width=True)
+    st.dataframe(cooccurrence['totais'], use_container_width=True)
+
+def build_chart_figures(chart_data):
+    """Monta as figuras Plotly a partir dos dados reduzidos e as serializa em JSON"""
+    import plotly.express as px
+    
+    figures = {}
+    
+    unidade_counts = chart_data.get('unidade_counts')
+    if unidade_counts is not None and len(unidade_counts) > 0:
+        # Gráfico de quantidade de editais por coordenadoria
+        fig_bar = px.bar(
+            x=unidade_counts.values,
+            y=unidade_counts.index,
+            orientation='h',
+            title="📊 Quantidade de Editais por Coordenadoria",
+            labels={'x': 'Quantidade', 'y': 'Coordenadoria'},
+            color=unidade_counts.values,
+            color_continuous_scale='Blues'
+        )
+        fig_bar.update_layout(
+            height=400,
+            showlegend=False,
+            yaxis={'categoryorder': 'total ascending'}
+        )
+        figures['bar'] = fig_bar.to_json()
+    
+    unidade_valores = chart_data.get('unidade_valores')
+    if unidade_valores is not None and len(unidade_valores) > 0:
+        # Gráfico das maiores coordenadorias por Valor Estimado
+        fig_pie = px.pie(
+            values=unidade_valores.values,
+            names=unidade_valores.index,
+            title="💰 Maiores Coordenadorias por Valor Estimado"
+        )
+        fig_pie.update_layout(height=400)
+        figures['pie'] = fig_pie.to_json()
+    
+    temporal_data = chart_data.get('temporal')
+    if temporal_data is not None and len(temporal_data) > 0:
+        fig_line = px.line(
+            x=temporal_data.index,
+            y=temporal_data.values,
+            title="Editais por Ano",
+            labels={'x': 'Ano', 'y': 'Quantidade de Editais'},
+            markers=True
+        )
+        fig_line.update_layout(height=400)
+        figures['line'] = fig_line.to_json()
+    
+    return figures
+
+def get_chart_figures(cache_key, compute_chart_data):
+    """Retorna o JSON das figuras, reaproveitando o cache central quando possível
+
+    Com cache_key (versão dos dados, chave dos filtros), os dados reduzidos e o
+    JSON das figuras são reaproveitados em vez de recalculados.
+    """
+    def compute():
+        chart_data = compute_chart_data()
+        return {'data': chart_data, 'figures': build_chart_figures(chart_data)}
+    
+    if cache_key is None:
+        return compute()['figures']
+    return get_figure_cache().get_or_compute(cache_key, compute, version=cache_key[0])['figures']
+
+def render_chart_figures(figures, show_temporal):
+    """Exibe as figuras serializadas no layout do dashboard"""
+    import plotly.io as pio
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if 'bar' in figures:
+            st.plotly_chart(pio.from_json(figures['bar']), use_container_width=True)
+    
+    with col2:
+        if 'pie' in figures:
+            st.plotly_chart(pio.from_json(figures['pie']), use_container_width=True)
+    
+    # Gráfico temporal se houver dados de data
+    if show_temporal:
+        st.markdown("### 📈 Evolução Temporal")
+        
+        if 'line' in figures:
+            st.plotly_chart(pio.from_json(figures['line']), use_container_width=True)
+
+def create_charts(df, cache_key=None):
+    """Cria gráficos de análise"""
+    figures = get_chart_figures(cache_key, lambda: build_chart_data(df))
+    render_chart_figures(figures, show_temporal='ano' in df.columns and len(df) > 0)
+
+# Concordância entre modelos: as quatro colunas de predição como vetores de bits
+PREDICTION_COLUMNS = ['Nova Predição', 'Predição Antiga', 'Predição STI', 'Predição CIC']
+AGREEMENT_RESULT_COLUMNS = ['unidade', 'objeto', 'Valor Estimado']
+AGREEMENT_MAX_ROWS = 1000
+AGREEMENT_FILTERS = {
+    'Diverge da referência': 'diverge',
+    'Nenhuma categoria em comum': 'disjunta',
+    'Algum modelo diverge': 'algum',
+    'Todos os modelos concordam': 'unanime',
+}
+
+def prediction_columns(columns):
+    """Colunas de predição presentes, na ordem de PREDICTION_COLUMNS"""
+    return tuple(col for col in PREDICTION_COLUMNS if col in columns)
+
+class PredictionAgreement:
+    """Conjuntos de categorias de cada coluna de predição como vetores de bits
+
+    Cada texto distinto é decomposto uma única vez (mesmas regras de
+    label_matrix); a categoria i é o bit i % 64 da palavra i // 64. Comparar
+    dois modelos em qualquer subconjunto de linhas é então só AND/XOR entre
+    inteiros - a ordem e a caixa dos rótulos não contam como divergência.
+    """
+
+    def __init__(self, frame, columns, row_keys=None):
+        self.columns = list(columns)
+        parsed = {}
+        for column in self.columns:
+            codes, uniques = pd.factorize(frame[column].fillna('').astype(str).str.strip().str.upper())
+            labels = pd.Series(uniques, dtype=object).str.split(LABEL_SEPARATOR_PATTERN, regex=True).explode()
+            parsed[column] = (codes, len(uniques), labels[labels.notna() & (labels != '')])
+        
+        found = set().union(*(set(labels.unique()) for _, _, labels in parsed.values()))
+        self.categories = list(CLASSIFICACOES) + sorted(found - set(CLASSIFICACOES))
+        self.n_words = max((len(self.categories) + 63) // 64, 1)
+        
+        self.bits = {}
+        for column, (codes, n_uniques, labels) in parsed.items():
+            # Bits de cada texto distinto; as linhas só indexam essa tabela
+            index = pd.Categorical(labels, categories=self.categories).codes.astype(np.int64)
+            unique_bits = np.zeros((n_uniques, self.n_words), dtype=np.uint64)
+            np.bitwise_or.at(
+                unique_bits, (labels.index.to_numpy(), index // 64),
+                np.left_shift(np.uint64(1), (index % 64).astype(np.uint64))
+            )
+            self.bits[column] = unique_bits[codes]
+        self.key_index = pd.Index(row_keys) if row_keys is not None else None
+
+    def positions(self, row_keys):
+        """Posições das linhas (row_keys) nos vetores"""
+        return self.key_index.get_indexer(np.asarray(row_keys))
+
+    def _bits(self, column, positions=None):
+        return self.bits[column] if positions is None else self.bits[column][positions]
+
+    def same(self, a, b, positions=None):
+        """Linhas em que as colunas a e b têm o mesmo conjunto de categorias"""
+        return (self._bits(a, positions) == self._bits(b, positions)).all(axis=1)
+
+    def overlap(self, a, b, positions=None):
+        """Linhas em que a e b têm ao menos uma categoria em comum"""
+        return (self._bits(a, positions) & self._bits(b, positions)).any(axis=1)
+
+    def unanimous(self, positions=None):
+        """Linhas em que todas as colunas têm o mesmo conjunto de categorias"""
+        first = self._bits(self.columns[0], positions)
+        mask = np.ones(len(first), dtype=bool)
+        for column in self.columns[1:]:
+            mask &= (self._bits(column, positions) == first).all(axis=1)
+        return mask
+
+    def changed(self, positions=None):
+        """Linhas em que a Nova Predição difere da Predição Antiga"""
+        return ~self.same('Nova Predição', 'Predição Antiga', positions)
+
+    def indicators(self, column, positions=None):
+        """Matriz indicadora linha × categoria (uint8), desempacotada dos bits"""
+        words = np.ascontiguousarray(self._bits(column, positions).astype('<u8'))
+        return np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')[:, :len(self.categories)]
+
+    def category_bit(self, category):
+        """(palavra, máscara) do bit de uma categoria"""
+        index = self.categories.index(category)
+        return index // 64, np.uint64(1 << (index % 64))
+
+    def disagreement(self, kind, reference, other, category=None, positions=None):
+        """Máscara do filtro de concordância (chaves de AGREEMENT_FILTERS)
+
+        Com category, só conta a divergência nessa categoria: o bit dela
+        difere (XOR) entre a referência e o modelo comparado - ou entre a
+        referência e qualquer modelo, nos filtros sobre todos os modelos.
+        """
+        ref = self._bits(reference, positions)
+        if kind == 'diverge':
+            mask = ~self.same(reference, other, positions)
+        elif kind == 'disjunta':
+            mask = ~self.overlap(reference, other, positions)
+        elif kind == 'unanime':
+            mask = self.unanimous(positions)
+        else:
+            mask = ~self.unanimous(positions)
+        
+        if category is not None and kind != 'unanime':
+            word, bit = self.category_bit(category)
+            compared = [other] if kind in ('diverge', 'disjunta') else [col for col in self.columns if col != reference]
+            differs = np.zeros(len(ref), dtype=bool)
+            for column in compared:
+                differs |= ((ref[:, word] ^ self._bits(column, positions)[:, word]) & bit) != 0
+            mask &= differs
+        return mask
+
+    def pairwise(self, positions=None):
+        """% de concordância exata entre cada par de colunas"""
+        n = len(self._bits(self.columns[0], positions))
+        rates = np.ones((len(self.columns), len(self.columns))) * 100
+        for i, a in enumerate(self.columns):
+            for j in range(i + 1, len(self.columns)):
+                rate = self.same(a, self.columns[j], positions).mean() * 100 if n else 0.0
+                rates[i, j] = rates[j, i] = rate
+        return pd.DataFrame(rates.round(1), index=self.columns, columns=self.columns)
+
+    def confusion(self, reference, other, positions=None):
+        """Matriz de confusão multi-rótulo: editais com a categoria i na
+        referência e j no modelo comparado (Rᵀ·P)"""
+        R = self.indicators(reference, positions).astype(np.float64)
+        P = self.indicators(other, positions).astype(np.float64)
+        counts = (R.T @ P).astype(np.int64)
+        present = np.flatnonzero((counts.sum(axis=1) > 0) | (counts.sum(axis=0) > 0))
+        categories = [self.categories[i] for i in present]
+        return pd.DataFrame(
+            counts[np.ix_(present, present)],
+            index=pd.Index(categories, name=reference), columns=pd.Index(categories, name=other)
+        )
+
+    def category_scores(self, reference, other, positions=None):
+        """Precisão, revocação e F1 por categoria do modelo em relação à referência"""
+        R = self.indicators(reference, positions)
+        P = self.indicators(other, positions)
+        hits = (R & P).sum(axis=0)
+        support = R.sum(axis=0)
+        predicted = P.sum(axis=0)
+        present = np.flatnonzero((support > 0) | (predicted > 0))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(predicted > 0, hits / predicted, np.nan)
+            recall = np.where(support > 0, hits / support, np.nan)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), np.nan)
+        scores = pd.DataFrame({
+            'Na Referência': support,
+            'No Modelo': predicted,
+            'Em Ambos': hits,
+            'Precisão': precision * 100,
+            'Revocação': recall * 100,
+            'F1': f1 * 100,
+        }, index=pd.Index(self.categories, name='Categoria')).iloc[present]
+        return scores.round(1).sort_values('Na Referência', ascending=False)
+
+    def summary(self, reference, positions=None):
+        """Concordância e precisão/revocação micro de cada modelo contra a referência"""
+        R = self.indicators(reference, positions)
+        rows = {}
+        for other in self.columns:
+            if other == reference:
+                continue
+            P = self.indicators(other, positions)
+            hits, predicted, support = int((R & P).sum()), int(P.sum()), int(R.sum())
+            n = len(R)
+            rows[other] = {
+                'Concordância Exata': self.same(reference, other, positions).mean() * 100 if n else np.nan,
+                'Alguma Categoria em Comum': self.overlap(reference, other, positions).mean() * 100 if n else np.nan,
+                'Precisão': hits / predicted * 100 if predicted else np.nan,
+                'Revocação': hits / support * 100 if support else np.nan,
+            }
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis('Modelo').round(1)
+
+@version_cached('concordancia')
+def get_prediction_agreement(dataset_version, columns, _load_rows):
+    """Vetores de bits das colunas de predição (uma vez por versão dos dados)
+
+    _load_rows(colunas) retorna as colunas de toda a base, na ordem usada
+    pelas posições (a mesma de fetch_rows).
+    """
+    rows = _load_rows(list(columns) + [ROW_KEY_COLUMN])
+    return PredictionAgreement(rows, columns, rows[ROW_KEY_COLUMN].to_numpy())
+
+def prediction_changes(df, base_df=None):
+    """Máscara das linhas de df em que a Nova Predição difere da Predição Antiga
+
+    Compara os conjuntos de categorias pelos vetores de bits da base
+    (base_df, ou o próprio df); "A; B" e "B, A" não são mudança.
+    """
+    base_df = df if base_df is None else base_df
+    agreement = get_prediction_agreement(
+        get_dataset_version(base_df),
+        prediction_columns(available_columns(base_df)),
+        lambda row_columns: with_columns(base_df, row_columns)
+    )
+    return agreement.changed(agreement.positions(df[ROW_KEY_COLUMN]))
+
+def format_percent(value):
+    """Percentual com uma casa decimal; nulo (sem base) fica vazio"""
+    return '' if pd.isna(value) else f"{value:.1f}%"
+
+@st.fragment
+def show_prediction_agreement(get_agreement, filtered_row_keys, fetch_rows):
+    """Seção do dashboard: concordância entre Nova Predição, Antiga, STI e CIC
+
+    get_agreement() retorna o PredictionAgreement da versão atual,
+    filtered_row_keys() as row_keys filtradas e fetch_rows(posições) as
+    colunas de detalhe dessas posições. Executa como fragmento: trocar a
+    referência ou o filtro não refaz os gráficos.
+    """
+    agreement = get_agreement()
+    positions = agreement.positions(filtered_row_keys())
+    if len(positions) == 0:
+        return
+    
+    st.markdown("### 🤝 Concordância entre Modelos")
+    st.caption(
+        "Compara os conjuntos de categorias de cada modelo (a ordem dos rótulos não conta). "
+        "Precisão: dos rótulos dados pelo modelo, quantos estão na referência; "
+        "revocação: dos rótulos da referência, quantos o modelo também deu."
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        reference = st.selectbox("🎯 Referência", agreement.columns, key='concordancia_referencia')
+    with col2:
+        others = [col for col in agreement.columns if col != reference]
+        other = st.selectbox("🔀 Modelo comparado", others, key='concordancia_modelo')
+    
+    unanimous = agreement.unanimous(positions)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Concordância Exata", f"{agreement.same(reference, other, positions).mean() * 100:.1f}%")
+    col2.metric("Alguma Categoria em Comum", f"{agreement.overlap(reference, other, positions).mean() * 100:.1f}%")
+    col3.metric("Todos os Modelos Concordam", f"{unanimous.mean() * 100:.1f}%", delta=f"{int(unanimous.sum()):,} editais")
+    col4.metric("Editais Comparados", f"{len(positions):,}")
+    
+    st.markdown(f"#### 📐 Contra a referência: {reference}")
+    st.dataframe(agreement.summary(reference, positions).style.format(format_percent), use_container_width=True)
+    
+    with st.expander("🔁 Concordância exata entre todos os pares", expanded=False):
+        st.dataframe(agreement.pairwise(positions).style.format(format_percent), use_container_width=True)
+    
+    st.markdown(f"#### 🧮 Matriz de confusão: {reference} × {other}")
+    st.caption("Linhas: categorias da referência; colunas: categorias do modelo comparado. "
+               "Um edital multi-rótulo conta em cada par das suas categorias.")
+    st.dataframe(agreement.confusion(reference, other, positions), use_container_width=True)
+    
+    scores = agreement.category_scores(reference, other, positions)
+    st.markdown("#### 🎯 Precisão e revocação por categoria")
+    st.dataframe(
+        scores.style.format(format_percent, subset=['Precisão', 'Revocação', 'F1']),
+        use_container_width=True
+    )
+    
+    st.markdown("#### 🔎 Editais por concordância")
+    col1, col2 = st.columns(2)
+    with col1:
+        kind_label = st.selectbox("Filtro", list(AGREEMENT_FILTERS), key='concordancia_filtro')
+    with col2:
+        category = st.selectbox(
+            "Divergência na categoria", ['Todas'] + list(scores.index), key='concordancia_categoria',
+            disabled=AGREEMENT_FILTERS[kind_label] == 'unanime'
+        )
+    mask = agreement.disagreement(
+        AGREEMENT_FILTERS[kind_label], reference, other,
+        None if category == 'Todas' else category, positions
+    )
+    selected = positions[mask]
+    st.caption(f"{len(selected):,} de {len(positions):,} editais filtrados")
+    if len(selected) == 0:
+        return
+    
+    rows = fetch_rows(selected).reset_index(drop=True)
+    rows.attrs = {}
+    if len(selected) > AGREEMENT_MAX_ROWS:
+        st.caption(f"Exibindo {AGREEMENT_MAX_ROWS:,} de {len(selected):,} editais (o CSV traz todos)")
+    st.dataframe(format_page(rows.head(AGREEMENT_MAX_ROWS).copy()), use_container_width=True, hide_index=True)
+    st.download_button(
+        label="📥 Download CSV dos editais",
+        data=serialize_export(rows, "CSV"),
+        file_name=f"concordancia_{AGREEMENT_FILTERS[kind_label]}.csv",
+        mime="text/csv",
+        key='concordancia_download'
+    )
+
+# Editais similares: vetores TF-IDF (L2) do objeto, por versão dos dados
+SIMILARITY_TEXT_COLUMNS = ['objeto_processada', 'objeto']
+SIMILARITY_TOKEN_PATTERN = r'[^\W\d_]{3,}'
+SIMILARITY_RESULT_COLUMNS = ['unidade', 'objeto', 'Nova Predição', 'Valor Estimado']
+
+class SimilarityIndex:
+    """Vetores TF-IDF normalizados do texto de cada linha, em formato esparso
+
+    Guarda as mesmas entradas por linha (CSR, para obter o vetor consultado)
+    e por termo (CSC, listas invertidas). A similaridade de cosseno de uma
+    linha com todas as outras é um único produto esparso X·q, calculado com
+    bincount sobre as listas dos termos da consulta.
+    """
+
+    def __init__(self, texts, row_keys=None, groups=None):
+        texts = pd.Series(texts).reset_index(drop=True)
+        self.n_rows = len(texts)
+        self.key_index = pd.Index(row_keys) if row_keys is not None else None
+        self.groups = pd.factorize(pd.Series(groups).reset_index(drop=True))[0] if groups is not None else None
+        
+        tokens = texts.fillna('').astype(str).str.lower().str.findall(SIMILARITY_TOKEN_PATTERN).explode().dropna()
+        term_ids, vocabulary = pd.factorize(tokens.to_numpy())
+        n_terms = max(len(vocabulary), 1)
+        
+        # Pares (linha, termo) únicos e suas frequências, ordenados por linha
+        keys = np.sort(tokens.index.to_numpy(dtype=np.int64) * n_terms + term_ids)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.int64)
+        counts = np.diff(np.append(starts, len(keys)))
+        rows, terms = np.divmod(keys[starts], n_terms)
+        
+        # TF sublinear × IDF suavizado, normalizado por linha (L2)
+        document_frequency = np.bincount(terms, minlength=n_terms)
+        idf = np.log((1 + self.n_rows) / (1 + document_frequency)) + 1
+        weights = (1 + np.log(counts)) * idf[terms]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=self.n_rows))
+        weights = (weights / norms[rows]).astype(np.float32)
+        
+        self.row_indptr = np.searchsorted(rows, np.arange(self.n_rows + 1))
+        self.row_terms = terms.astype(np.int32)
+        self.row_weights = weights
+        
+        order = np.argsort(terms, kind='stable')
+        self.term_indptr = np.searchsorted(terms[order], np.arange(n_terms + 1))
+        self.term_rows = rows[order].astype(np.int32)
+        self.term_weights = weights[order]
+
+    def position(self, row_key):
+        """Posição da linha (row_key) no índice; -1 se não existir"""
+        return int(self.key_index.get_indexer([row_key])[0])
+
+    def similar(self, position, k=10, other_groups_only=False):
+        """As k linhas mais similares (cosseno) à linha: (posições, similaridades)"""
+        start, stop = self.row_indptr[position], self.row_indptr[position + 1]
+        query_terms, query_weights = self.row_terms[start:stop], self.row_weights[start:stop]
+        if len(query_terms) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        lengths = self.term_indptr[query_terms + 1] - self.term_indptr[query_terms]
+        entries = np.concatenate([
+            np.arange(self.term_indptr[term], self.term_indptr[term + 1]) for term in query_terms
+        ])
+        scores = np.bincount(
+            self.term_rows[entries],
+            weights=self.term_weights[entries] * np.repeat(query_weights, lengths),
+            minlength=self.n_rows
+        )
+        
+        scores[position] = 0
+        if other_groups_only and self.groups is not None:
+            scores[self.groups == self.groups[position]] = 0
+        
+        k = min(k, int((scores > 0).sum()))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
+
+def similarity_text_column(columns):
+    """Coluna de texto usada na similaridade (objeto processado, se houver)"""
+    return next((col for col in SIMILARITY_TEXT_COLUMNS if col in columns), None)
+
+@version_cached('similaridade')
+def get_similarity_index(dataset_version, _df):
+    """Constrói (uma vez por versão dos dados) o índice de similaridade"""
+    text_column = similarity_text_column(available_columns(_df))
+    return SimilarityIndex(
+        get_column(_df, text_column),
+        _df[ROW_KEY_COLUMN].to_numpy(),
+        _df['unidade'] if 'unidade' in _df.columns else None
+    )
+
+@version_cached('similaridade_backend')
+def get_backend_similarity_index(dataset_version, _backend):
+    """Índice de similaridade do backend DuckDB (lê só texto, unidade e chave)"""
+    text_column = similarity_text_column(_backend.columns)
+    columns = [text_column, ROW_KEY_COLUMN] + (['unidade'] if 'unidade' in _backend.columns else [])
+    rows = _backend.fetch(columns, ('true', []))
+    return SimilarityIndex(rows[text_column], rows[ROW_KEY_COLUMN].to_numpy(), rows.get('unidade'))
+
+def show_similar_editais(index, row_key, fetch_rows):
+    """Seção "Editais similares" para a linha selecionada na tabela
+
+    fetch_rows(posições, colunas) retorna as linhas da base completa.
+    """
+    position = index.position(row_key)
+    if position < 0:
+        return
+    
+    st.markdown("### 🧭 Editais Similares")
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        k = st.selectbox("Quantidade", [5, 10, 20, 50], index=1, key="similares_k")
+    with col2:
+        other_units = st.checkbox("Somente outras unidades", key="similares_outras_unidades")
+    
+    positions, scores = index.similar(position, k, other_groups_only=other_units)
+    if len(positions) == 0:
+        st.info("Nenhum edital similar encontrado para o objeto selecionado.")
+        return
+    
+    similar_df = format_page(fetch_rows(positions).reset_index(drop=True))
+    similar_df.insert(0, 'Similaridade', [f"{score * 100:.1f}%" for score in scores])
+    st.dataframe(similar_df, use_container_width=True, hide_index=True)
+
+# Reclassificação por termos-chave: dicionário termo → categoria compilado
+# em um autômato Aho–Corasick, aplicado ao objeto e aos termos de cada linha
+KEYWORDS_FILE_ENV = 'EDITAIS_KEYWORDS_FILE'
+KEYWORD_WORKERS_ENV = 'EDITAIS_KEYWORD_WORKERS'
+KEYWORD_TEXT_COLUMNS = ['objeto', 'todos_termos']
+# Categorias com pelo menos esta fração da pontuação da melhor entram na predição
+KEYWORD_MIN_SHARE = 0.5
+KEYWORD_MAX_LABELS = 2
+# Mínimo de textos por tarefa quando a varredura é distribuída entre processos
+KEYWORD_CHUNK_TEXTS = 5000
+
+DEFAULT_KEYWORD_RULES = {
+    'EDUCAÇÃO': ['escola', 'escolar', 'creche', 'ensino', 'educacao', 'educacional', 'merenda', 'alimentacao escolar', 'material didatico', 'professor', 'aluno'],
+    'SAÚDE': ['saude', 'hospital', 'medicamento', 'posto de saude', 'upa', 'ubs', 'odontolog', 'ambulancia', 'farmac', 'exame', 'laboratorio', 'vacina'],
+    'TECNOLOGIA DA INFORMAÇÃO': ['software', 'licenca', 'computador', 'informatica', 'sistema de gestao', 'internet', 'rede logica', 'servidor de dados', 'impressora', 'notebook', 'tecnologia da informacao'],
+    'SANEAMENTO': ['saneamento', 'esgoto', 'agua', 'abastecimento', 'coleta de lixo', 'residuos solidos', 'limpeza urbana', 'aterro', 'drenagem'],
+    'MOBILIDADE': ['transporte', 'mobilidade', 'onibus', 'veiculo', 'combustivel', 'frota', 'transito', 'sinalizacao viaria'],
+    'SEGURANÇA PÚBLICA': ['seguranca publica', 'guarda municipal', 'videomonitoramento', 'monitoramento', 'vigilancia', 'policia', 'defesa civil'],
+    'DESENVOLVIMENTO': ['desenvolvimento', 'turismo', 'agricultura', 'agropecuar', 'assistencia social', 'habitacao', 'cultura', 'esporte'],
+    'OBRAS': ['obra', 'pavimentacao', 'reforma', 'construcao', 'ampliacao', 'engenharia', 'iluminacao publica', 'recapeamento', 'ponte'],
+    'GOVERNANÇA': ['consultoria', 'auditoria', 'assessoria', 'gestao publica', 'transparencia', 'controle interno', 'planejamento'],
+    'PESSOAL': ['concurso', 'processo seletivo', 'folha de pagamento', 'terceirizad', 'mao de obra', 'capacitacao', 'treinamento'],
+    'DESESTATIZAÇÃO': ['concessao', 'privatizacao', 'parceria publico privada', 'ppp', 'desestatizacao', 'permissao de uso'],
+    'OUTROS': ['locacao', 'aquisicao de bens', 'material de expediente', 'material de limpeza', 'mobiliario'],
+    'RECEITA': ['arrecadacao', 'tributo', 'iptu', 'issqn', 'divida ativa', 'cobranca', 'fiscalizacao tributaria'],
+    'PREVIDÊNCIA': ['previdencia', 'previdenciario', 'aposentadoria', 'pensao', 'regime proprio', 'atuarial'],
+}
+
+def fold_text(values):
+    """Minúsculas, sem acentos e só com letras/dígitos separados por um espaço
+
+    O espaço inicial marca o começo da primeira palavra: termos casam no
+    início de palavras (escola → escolar), nunca no meio delas.
+    """
+    folded = (
+        pd.Series(values, dtype=object).fillna('').astype(str).str.lower()
+        .str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True)
+        .str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+    )
+    return ' ' + folded
+
+def parse_keyword_rules(text):
+    """Lê regras no formato "CATEGORIA: termo1, termo2" (uma categoria por linha)
+
+    Retorna (regras, erros); regras é uma tupla ordenada e portanto
+    utilizável como chave de cache.
+    """
+    rules, errors = {}, []
+    known = {category.upper(): category for category in CLASSIFICACOES}
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        category, separator, terms = line.partition(':')
+        category = known.get(category.strip().upper())
+        if not separator or category is None:
+            errors.append(f"Linha {number}: use uma das 14 categorias no formato CATEGORIA: termo1, termo2")
+            continue
+        terms = [term.strip() for term in terms.split(',') if term.strip()]
+        rules.setdefault(category, []).extend(terms)
+    return tuple((category, tuple(terms)) for category, terms in rules.items()), errors
+
+def format_keyword_rules(rules):
+    """Texto editável ("CATEGORIA: termo1, termo2") das regras"""
+    return '\n'.join(f"{category}: {', '.join(terms)}" for category, terms in rules)
+
+def load_default_keyword_rules():
+    """Regras padrão: arquivo JSON de EDITAIS_KEYWORDS_FILE ou o dicionário embutido"""
+    path = os.environ.get(KEYWORDS_FILE_ENV)
+    rules = DEFAULT_KEYWORD_RULES
+    if path:
+        try:
+            with open(path, encoding='utf-8') as keywords_file:
+                rules = dict(json.load(keywords_file))
+        except (OSError, ValueError, TypeError) as e:
+            st.warning(f"⚠️ Não foi possível ler {KEYWORDS_FILE_ENV} ({e}); usando os termos padrão")
+    return tuple((category, tuple(terms)) for category, terms in rules.items())
+
+class KeywordAutomaton:
+    """Autômato Aho–Corasick dos termos, já determinizado
+
+    Cada estado tem um dicionário caractere → próximo estado completo (as
+    ligações de falha já foram resolvidas), então a varredura é uma consulta
+    de dicionário por caractere, em uma única passada por texto. As saídas
+    de um estado têm uma categoria por termo reconhecido ali: termos
+    sobrepostos contam cada um ("alimentacao escolar" soma 3 em EDUCAÇÃO,
+    por escola, escolar e alimentacao escolar).
+    """
+
+    def __init__(self, rules):
+        self.categories = [category for category, _ in rules]
+        transitions, outputs = [{}], [[]]
+        
+        for category_id, (_, terms) in enumerate(rules):
+            for term in fold_text(list(terms)):
+                if term == ' ':
+                    continue
+                state = 0
+                for char in term:
+                    if char not in transitions[state]:
+                        transitions[state][char] = len(transitions)
+                        transitions.append({})
+                        outputs.append([])
+                    state = transitions[state][char]
+                if category_id not in outputs[state]:
+                    outputs[state].append(category_id)
+        
+        # Ligações de falha em largura; cada estado herda as transições e as
+        # saídas do seu estado de falha
+        goto = [dict(edges) for edges in transitions]
+        fail = [0] * len(transitions)
+        queue = list(transitions[0].values())
+        for state in queue:
+            for char, child in transitions[state].items():
+                fallback = goto[fail[state]].get(char, 0) if state else 0
+                fail[child] = fallback if fallback != child else 0
+                queue.append(child)
+            if state:
+                inherited = goto[fail[state]]
+                goto[state] = {**inherited, **transitions[state]}
+                outputs[state] = outputs[state] + outputs[fail[state]]
+        goto[0] = dict(transitions[0])
+        
+        self.goto = goto
+        self.outputs = [tuple(output) for output in outputs]
+
+    def scan(self, texts):
+        """Uma ocorrência por termo reconhecido em cada texto: (posições, categorias)"""
+        goto, outputs = self.goto, self.outputs
+        rows, categories = [], []
+        for position, text in enumerate(texts):
+            state = 0
+            for char in text:
+                state = goto[state].get(char, 0)
+                if outputs[state]:
+                    for category_id in outputs[state]:
+                        rows.append(position)
+                        categories.append(category_id)
+        return np.array(rows, dtype=np.int64), np.array(categories, dtype=np.int64)
+
+_worker_automaton = None
+
+def _init_keyword_worker(automaton):
+    """Inicializa o autômato uma vez por processo do pool"""
+    global _worker_automaton
+    _worker_automaton = automaton
+
+def _scan_keyword_chunk(texts):
+    """Varredura de um bloco de textos em um processo do pool"""
+    return _worker_automaton.scan(texts)
+
+def get_keyword_workers():
+    """Processos usados na varredura (EDITAIS_KEYWORD_WORKERS; 1 = sem pool)"""
+    try:
+        return max(1, int(os.environ.get(KEYWORD_WORKERS_ENV, 1)))
+    except ValueError:
+        return 1
+
+def scan_keywords(automaton, texts, workers=1):
+    """Varre os textos, opcionalmente em blocos distribuídos entre processos
+
+    Se o pool não puder ser criado ou falhar, a varredura é feita no
+    processo atual.
+    """
+    if workers > 1 and len(texts) > KEYWORD_CHUNK_TEXTS:
+        chunk_size = max(KEYWORD_CHUNK_TEXTS, -(-len(texts) // workers))
+        starts = range(0, len(texts), chunk_size)
+        try:
+            with ProcessPoolExecutor(workers, initializer=_init_keyword_worker, initargs=(automaton,)) as pool:
+                results = list(pool.map(_scan_keyword_chunk, [texts[start:start + chunk_size] for start in starts]))
+            rows = np.concatenate([chunk_rows + start for (chunk_rows, _), start in zip(results, starts)])
+            return rows, np.concatenate([categories for _, categories in results])
+        except Exception as e:
+            warnings.warn(f"Varredura de termos em {workers} processos falhou ({e}); refazendo no processo atual")
+    return automaton.scan(texts)
+
+def classify_by_keywords(texts, rules, workers=1):
+    """Predição por termos para cada texto e a matriz de pontuações
+
+    Textos repetidos são varridos uma única vez. A predição reúne as
+    categorias com pelo menos KEYWORD_MIN_SHARE da maior pontuação (no
+    máximo KEYWORD_MAX_LABELS, em ordem decrescente); sem termos, fica vazia.
+    """
+    automaton = KeywordAutomaton(rules)
+    codes, unique_texts = pd.factorize(pd.Series(texts, dtype=object).fillna(''))
+    rows, categories = scan_keywords(automaton, list(fold_text(unique_texts)), workers)
+    
+    n_categories = len(automaton.categories)
+    scores = np.bincount(rows * n_categories + categories, minlength=len(unique_texts) * n_categories)
+    scores = scores.reshape(len(unique_texts), n_categories)
+    
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :KEYWORD_MAX_LABELS]
+    ranked = np.take_along_axis(scores, order, axis=1)
+    keep = (ranked > 0) & (ranked >= KEYWORD_MIN_SHARE * ranked[:, :1])
+    names = np.array(automaton.categories + [''], dtype=object)
+    labels = names[np.where(keep, order, n_categories)]
+    predictions = pd.Series(labels[:, 0], dtype=object)
+    for extra in range(1, labels.shape[1]):
+        predictions = predictions.where(labels[:, extra] == '', predictions + '; ' + labels[:, extra])
+    
+    return predictions.to_numpy()[codes], scores[codes]
+
+def label_set_keys(values):
+    """Chave canônica (rótulos maiúsculos, únicos e ordenados) de cada valor multi-rótulo
+
+    Valores com os mesmos rótulos em outra ordem ou grafia de separador têm a
+    mesma chave; cada valor distinto é processado uma única vez.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna('').astype(str))
+    keys = np.array([
+        '; '.join(sorted({label.strip() for label in re.split(LABEL_SEPARATOR_PATTERN, value.upper()) if label.strip()}))
+        for value in uniques
+    ] + [''], dtype=object)
+    return keys[codes]
+
+class KeywordReclassification:
+    """Predição por termos de toda a base e o diff com a Nova Predição atual"""
+
+    def __init__(self, texts, current, row_keys, rules, workers=1):
+        started = time.perf_counter()
+        self.candidate, self.scores = classify_by_keywords(texts, rules, workers)
+        self.current = pd.Series(current, dtype=object).fillna('').to_numpy()
+        
+        current_keys = label_set_keys(self.current)
+        candidate_keys = label_set_keys(self.candidate)
+        self.status = np.where(
+            candidate_keys == '', 'Sem termos',
+            np.where(candidate_keys == current_keys, 'Mantida', 'Alterada')
+        ).astype(object)
+        self.key_index = pd.Index(row_keys)
+        self.seconds = time.perf_counter() - started
+
+    def positions(self, row_keys=None):
+        """Posições das linhas (todas, se row_keys for None)"""
+        if row_keys is None:
+            return np.arange(len(self.status))
+        positions = self.key_index.get_indexer(np.asarray(row_keys))
+        return positions[positions >= 0]
+
+    def summary(self, positions):
+        """Contagem por situação (Mantida, Alterada, Sem termos)"""
+        return pd.Series(self.status[positions]).value_counts()
+
+    def transitions(self, positions):
+        """Mudanças mais frequentes: Nova Predição atual → predição por termos"""
+        changed = positions[self.status[positions] == 'Alterada']
+        pairs = pd.DataFrame({
+            'Nova Predição': self.current[changed],
+            'Predição por Termos': self.candidate[changed]
+        })
+        return pairs.value_counts().rename('Quantidade').reset_index()
+
+    def diff(self, positions):
+        """Linhas cuja predição por termos difere da Nova Predição atual"""
+        changed = positions[self.status[positions] == 'Alterada']
+        return changed, pd.DataFrame({
+            'Nova Predição': self.current[changed],
+            'Predição por Termos': self.candidate[changed]
+        })
+
+@version_cached('reclassificacao')
+def get_keyword_reclassification(dataset_version, rules, text_columns, _load_rows):
+    """Reclassifica a base inteira uma vez por (versão dos dados, regras)
+
+    _load_rows(colunas) retorna as colunas de todas as linhas, na ordem da base.
+    """
+    rows = _load_rows(list(text_columns) + ['Nova Predição', ROW_KEY_COLUMN])
+    texts = rows[text_columns[0]].fillna('').astype(str)
+    for col in text_columns[1:]:
+        texts = texts + ' | ' + rows[col].fillna('').astype(str)
+    return KeywordReclassification(
+        texts.to_numpy(), rows['Nova Predição'], rows[ROW_KEY_COLUMN].to_numpy(), rules, get_keyword_workers()
+    )
+
+def show_keyword_reclassification(dataset_version, text_columns, load_rows, filtered_row_keys, fetch_rows):
+    """Aba de reclassificação por termos-chave
+
+    load_rows(colunas) carrega a base completa, filtered_row_keys() retorna as
+    chaves das linhas filtradas e fetch_rows(posições) as linhas
+    correspondentes da base completa.
+    """
+    st.markdown("### 🔑 Reclassificação por Termos-Chave")
+    st.markdown(
+        "Aplica o dicionário de termos ao **objeto** e aos **termos** de todos os editais e "
+        "compara a predição resultante com a **Nova Predição** atual. Os termos ignoram "
+        "maiúsculas e acentos e casam no início das palavras."
+    )
+    
+    default_rules = load_default_keyword_rules()
+    with st.form("regras_termos"):
+        rules_text = st.text_area(
+            "Termos por categoria (CATEGORIA: termo1, termo2)",
+            value=format_keyword_rules(default_rules),
+            height=300,
+            key="regras_termos_texto"
+        )
+        st.form_submit_button("🔄 Reclassificar", type="primary")
+    
+    rules, errors = parse_keyword_rules(rules_text)
+    for error in errors:
+        st.warning(f"⚠️ {error}")
+    if not rules:
+        st.info("Informe ao menos uma categoria com termos.")
+        return
+    
+    with st.spinner("Reclassificando a base..."):
+        reclassification = get_keyword_reclassification(dataset_version, rules, tuple(text_columns), load_rows)
+    positions = reclassification.positions(filtered_row_keys())
+    summary = reclassification.summary(positions)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Editais Avaliados", f"{len(positions):,}")
+    col2.metric("Predição Mantida", f"{int(summary.get('Mantida', 0)):,}")
+    col3.metric("Predição Alterada", f"{int(summary.get('Alterada', 0)):,}")
+    col4.metric("Sem Termos", f"{int(summary.get('Sem termos', 0)):,}")
+    st.caption(f"⏱️ Base completa ({len(reclassification.status):,} editais) reclassificada em {reclassification.seconds:.2f}s")
+    
+    transitions = reclassification.transitions(positions)
+    if transitions.empty:
+        st.success("✅ A predição por termos coincide com a Nova Predição nos editais filtrados.")
+        return
+    
+    st.markdown("#### 🔀 Mudanças Mais Frequentes")
+    st.dataframe(transitions.head(20), use_container_width=True, hide_index=True)
+    
+    changed, diff_df = reclassification.diff(positions)
+    details = fetch_rows(changed).reset_index(drop=True)
+    diff_df = pd.concat([details, diff_df], axis=1)
+    diff_df.attrs = {}
+    
+    st.markdown("#### 📝 Editais com Predição Alterada")
+    st.dataframe(format_page(diff_df.head(1000).copy()), use_container_width=True, hide_index=True)
+    st.download_button(
+        label="📥 Download CSV das alterações",
+        data=serialize_export(diff_df, "CSV"),
+        file_name=f"reclassificacao_termos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
+
+# Autocompletar: vocabulário do corpus e nomes de unidades, por versão dos dados
+AUTOCOMPLETE_TEXT_COLUMNS = ['objeto', 'todos_termos', 'Observações']
+AUTOCOMPLETE_NAME_COLUMNS = ['unidade']
+AUTOCOMPLETE_TOP_K = 8
+# Prefixos até este tamanho casam com muitas chaves: top-k pré-calculado
+AUTOCOMPLETE_CACHED_PREFIX = 2
+# Opções do seletor de Unidade depois de digitar um trecho do nome
+AUTOCOMPLETE_UNIDADE_OPTIONS = 50
+
+def fold_term(value):
+    """fold_text para um único texto (sem pandas, para cada tecla digitada)"""
+    folded = re.sub('[\u0300-\u036f]', '', unicodedata.normalize('NFKD', str(value).lower()))
+    return re.sub(r'[^a-z0-9]+', ' ', folded).strip()
+
+class AutocompleteIndex:
+    """Completação por prefixo, sem acentos, ordenada por frequência
+
+    As chaves (termos ou nomes já dobrados) ficam ordenadas: uma busca binária
+    delimita as chaves com o prefixo digitado e o top-k é escolhido pelos
+    pesos. Prefixos curtos, cujos intervalos cobrem boa parte do vocabulário,
+    têm o top-k pré-calculado. Uma mesma sugestão pode ter várias chaves
+    (nomes são indexados a partir de cada palavra).
+    """
+
+    def __init__(self, keys, labels, weights, top_k=AUTOCOMPLETE_TOP_K):
+        order = np.argsort(np.asarray(keys, dtype=object), kind='stable')
+        self.keys = [keys[i] for i in order]
+        self.labels = np.asarray(labels, dtype=object)[order]
+        self.weights = np.asarray(weights, dtype=np.int64)[order]
+        self.top_k = top_k
+        
+        self.cached = {}
+        for size in range(1, AUTOCOMPLETE_CACHED_PREFIX + 1):
+            for prefix in sorted({key[:size] for key in self.keys if len(key) >= size}):
+                self.cached[prefix] = self._top(*self._range(prefix), top_k)
+
+    @classmethod
+    def from_texts(cls, texts, names=None):
+        """Termos (≥ 3 letras) de cada texto e nomes completos
+
+        O peso é o número de editais em que o termo ou o nome aparece. Cada
+        termo é sugerido na grafia mais frequente (com acentos); nomes são
+        encontrados pelo início de qualquer uma de suas palavras.
+        """
+        tokens = pd.Series(texts).reset_index(drop=True).fillna('').astype(str).str.lower()
+        tokens = tokens.str.findall(SIMILARITY_TOKEN_PATTERN).explode().dropna()
+        pairs = pd.DataFrame({'linha': tokens.index, 'termo': tokens.to_numpy(dtype=object)}).drop_duplicates()
+        spellings = pairs['termo'].value_counts()
+        spellings = pd.DataFrame({
+            'termo': spellings.index.to_numpy(dtype=object),
+            'chave': [fold_term(token) for token in spellings.index],
+            'peso': spellings.to_numpy(),
+        })
+        # value_counts já ordena por frequência: a primeira grafia de cada chave é a mais comum
+        words = spellings.groupby('chave', sort=False).agg(termo=('termo', 'first'), peso=('peso', 'sum'))
+        keys, labels, weights = list(words.index), list(words['termo']), list(words['peso'])
+        
+        if names is not None:
+            counts = pd.Series(names).dropna().astype(str).value_counts()
+            for name, count in counts.items():
+                words_in_name = fold_term(name).split()
+                for start in range(len(words_in_name)):
+                    keys.append(' '.join(words_in_name[start:]))
+                    labels.append(name)
+                    weights.append(count)
+        return cls(keys, labels, weights)
+
+    def _range(self, prefix):
+        return bisect.bisect_left(self.keys, prefix), bisect.bisect_left(self.keys, prefix + '\uffff')
+
+    def _top(self, lo, hi, k):
+        """Rótulos distintos de maior peso entre as chaves lo..hi"""
+        weights = self.weights[lo:hi]
+        if len(weights) > 4 * k:
+            # Sobra margem para rótulos repetidos (nomes com várias chaves)
+            candidates = np.argpartition(-weights, 4 * k)[:4 * k]
+        else:
+            candidates = np.arange(len(weights))
+        candidates = candidates[np.lexsort((candidates, -weights[candidates]))]
+        
+        top, seen = [], set()
+        for i in candidates:
+            label = self.labels[lo + i]
+            if label not in seen:
+                seen.add(label)
+                top.append((label, int(weights[i])))
+                if len(top) == k:
+                    break
+        return top
+
+    def complete(self, text, k=None):
+        """[(sugestão, peso)] para o prefixo digitado, da mais frequente à menos"""
+        k = k or self.top_k
+        prefix = fold_term(text)
+        if not prefix:
+            return []
+        if k <= self.top_k and prefix in self.cached:
+            return self.cached[prefix][:k]
+        return self._top(*self._range(prefix), k)
+
+@version_cached('autocompletar')
+def get_autocomplete_index(dataset_version, text_columns, name_columns, _load_rows):
+    """Índice de autocompletar da versão dos dados (construído uma vez)
+
+    _load_rows(colunas) retorna as colunas de todas as linhas, na ordem da base.
+    """
+    rows = _load_rows(list(text_columns) + list(name_columns))
+    texts = pd.Series('', index=rows.index)
+    for col in text_columns:
+        texts = texts + ' ' + rows[col].fillna('').astype(str)
+    names = pd.concat([rows[col] for col in name_columns]) if name_columns else None
+    return AutocompleteIndex.from_texts(texts, names)
+
+@version_cached('autocompletar_nomes')
+def get_name_autocomplete_index(dataset_version, column, _load_rows):
+    """Índice só com os nomes de uma coluna (ex.: seletor de Unidade)"""
+    return AutocompleteIndex.from_texts([], _load_rows([column])[column])
+
+def last_search_term(text):
+    """Termo sendo digitado: o que vem depois do último ';'"""
+    return text.rsplit(';', 1)[-1].strip()
+
+def apply_search_suggestion(text_key, suggestions_key):
+    """Troca o último termo da busca pela sugestão escolhida"""
+    choice = st.session_state.get(suggestions_key)
+    if choice:
+        terms = st.session_state.get(text_key, '').split(';')
+        terms[-1] = (' ' if len(terms) > 1 else '') + choice
+        st.session_state[text_key] = ';'.join(terms)
+    st.session_state[suggestions_key] = None
+
+def show_search_suggestions(index, text_key):
+    """Sugestões para o termo digitado em um campo de busca"""
+    term = last_search_term(st.session_state.get(text_key, ''))
+    suggestions = index.complete(term) if term else []
+    if not suggestions or [label for label, _ in suggestions] == [term]:
+        return
+    counts = dict(suggestions)
+    st.pills(
+        "💡 Sugestões",
+        options=list(counts),
+        format_func=lambda label: f"{label} ({counts[label]:,})",
+        key=f"{text_key}_sugestoes",
+        on_change=apply_search_suggestion,
+        args=(text_key, f"{text_key}_sugestoes"),
+        label_visibility="collapsed"
+    )
+
+def unidade_options(index, unidades, typed, selected):
+    """Opções do seletor de Unidade: as mais frequentes que casam com o trecho digitado
+
+    Sem trecho, todas as unidades. A unidade já selecionada continua na lista
+    para não ser desmarcada.
+    """
+    if not fold_term(typed):
+        return ['Todas'] + unidades
+    matches = [label for label, _ in index.complete(typed, AUTOCOMPLETE_UNIDADE_OPTIONS)]
+    if selected not in ('Todas', None) and selected not in matches:
+        matches.insert(0, selected)
+    return ['Todas'] + matches
+
+# Histórico de versões: chaves e hashes de conteúdo de cada versão baixada
+HISTORY_DIR_ENV = 'EDITAIS_HISTORY_DIR'
+HISTORY_VERSIONS_ENV = 'EDITAIS_HISTORY_VERSIONS'
+HISTORY_DEFAULT_VERSIONS = 60
+# Colunas de classificação (já renomeadas) e campos mutáveis do edital: mudam
+# sem mudar a row_key, então entram no hash de conteúdo - um edital
+# reclassificado ou com nova situação/valor aparece como "alterado"
+HISTORY_CONTENT_COLUMNS = [
+    'Nova Predição', 'Predição Antiga', 'Predição CIC', 'Predição STI',
+    'pontuacao', 'pontuacao_final', 'Observações', 'observacoes'
+] + MUTABLE_EDITAL_COLUMNS
+# Colunas-resumo guardadas (codificadas por dicionário) para exibir editais
+# removidos e a classificação anterior dos alterados
+HISTORY_SUMMARY_COLUMNS = ['unidade', 'ano', 'Nova Predição']
+HISTORY_RESULT_COLUMNS = ['unidade', 'objeto', 'Valor Estimado']
+HISTORY_MAX_ROWS = 1000
+
+class DatasetSnapshot:
+    """Versão dos dados no histórico: row_key, hash de conteúdo e colunas-resumo
+
+    As posições seguem a ordem da base daquela versão (a mesma do DataFrame e
+    da coluna _linha do Parquet).
+    """
+
+    def __init__(self, version, saved_at, row_keys, content_hashes, summary):
+        self.version = version
+        self.saved_at = saved_at
+        self.row_keys = row_keys
+        self.content_hashes = content_hashes
+        self.summary = summary
+
+    @classmethod
+    def from_frame(cls, df, version, saved_at=None):
+        content_columns = sorted(col for col in HISTORY_CONTENT_COLUMNS if col in df.columns)
+        if content_columns:
+            content_hashes = pd.util.hash_pandas_object(df[content_columns], index=False).to_numpy(dtype=np.uint64)
+        else:
+            content_hashes = np.zeros(len(df), dtype=np.uint64)
+        
+        summary = {}
+        for col in HISTORY_SUMMARY_COLUMNS:
+            if col in df.columns:
+                codes, uniques = pd.factorize(df[col])
+                if pd.api.types.is_numeric_dtype(df[col]):
+                    uniques = np.asarray(uniques, dtype=np.float64)
+                    if np.array_equal(uniques, np.round(uniques)):
+                        uniques = uniques.astype(np.int64)
+                else:
+                    uniques = np.asarray(uniques, dtype=str)
+                summary[col] = (codes.astype(np.int32), uniques)
+        return cls(version, saved_at or datetime.now(), df[ROW_KEY_COLUMN].to_numpy(dtype=np.uint64), content_hashes, summary)
+
+    def save(self, path):
+        """Grava em .npz (arquivo temporário publicado com os.replace)"""
+        arrays = {'row_keys': self.row_keys, 'content_hashes': self.content_hashes}
+        for i, (codes, uniques) in enumerate(self.summary.values()):
+            arrays[f'codes_{i}'], arrays[f'uniques_{i}'] = codes, uniques
+        meta = {'version': self.version, 'saved_at': self.saved_at.isoformat(), 'summary': list(self.summary)}
+        
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'wb') as output:
+            np.savez_compressed(output, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            summary = {
+                col: (data[f'codes_{i}'], data[f'uniques_{i}'])
+                for i, col in enumerate(meta['summary'])
+            }
+            return cls(
+                meta['version'], datetime.fromisoformat(meta['saved_at']),
+                data['row_keys'], data['content_hashes'], summary
+            )
+
+    def summary_frame(self, positions, suffix=''):
+        """Colunas-resumo das posições pedidas (valores ausentes como None)"""
+        positions = np.asarray(positions, dtype=np.int64)
+        frame = {}
+        for col, (codes, uniques) in self.summary.items():
+            selected = codes[positions]
+            values = np.where(selected >= 0, uniques[np.maximum(selected, 0)] if len(uniques) else None, None)
+            frame[col + suffix] = values.astype(object)
+        return pd.DataFrame(frame)
+
+class DatasetDiff:
+    """Editais adicionados, removidos e alterados entre duas versões
+
+    Junção de hash nas row_keys (únicas em cada versão): um get_indexer sobre
+    a versão antiga e uma comparação vetorizada dos hashes de conteúdo - O(n).
+    """
+
+    def __init__(self, old, new):
+        indexer = pd.Index(old.row_keys).get_indexer(new.row_keys)
+        matched = np.flatnonzero(indexer >= 0)
+        
+        present = np.zeros(len(old.row_keys), dtype=bool)
+        present[indexer[matched]] = True
+        self.added = np.flatnonzero(indexer < 0)
+        self.removed = np.flatnonzero(~present)
+        
+        changed = old.content_hashes[indexer[matched]] != new.content_hashes[matched]
+        self.changed_new = matched[changed]
+        self.changed_old = indexer[matched][changed]
+        self.unchanged = int(len(matched) - changed.sum())
+
+    def restrict(self, new, row_keys):
+        """Mantém só os adicionados/alterados da versão nova com as row_keys dadas"""
+        added = np.isin(new.row_keys[self.added], row_keys)
+        changed = np.isin(new.row_keys[self.changed_new], row_keys)
+        self.added = self.added[added]
+        self.changed_new, self.changed_old = self.changed_new[changed], self.changed_old[changed]
+        return self
+
+class DatasetHistory:
+    """Histórico de versões em disco: um .npz por versão, as mais recentes mantidas"""
+
+    def __init__(self, base_dir, keep=HISTORY_DEFAULT_VERSIONS):
+        self.base_dir = base_dir
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def entries(self):
+        """[(gravada em, versão, caminho)], da mais recente à mais antiga"""
+        if not os.path.isdir(self.base_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.base_dir):
+            stem, extension = os.path.splitext(name)
+            if extension != '.npz' or '_' not in stem:
+                continue
+            stamp, version = stem.split('_', 1)
+            try:
+                entries.append((datetime.strptime(stamp, '%Y%m%dT%H%M%S'), version, os.path.join(self.base_dir, name)))
+            except ValueError:
+                continue
+        return sorted(entries, reverse=True)
+
+    def record(self, df):
+        """Grava a versão de df, se ainda não for a mais recente do histórico"""
+        version = get_dataset_version(df)
+        with self._lock:
+            entries = self.entries()
+            if version is None or (entries and entries[0][1] == version):
+                return False
+            os.makedirs(self.base_dir, exist_ok=True)
+            snapshot = DatasetSnapshot.from_frame(df, version)
+            snapshot.save(os.path.join(self.base_dir, f"{snapshot.saved_at:%Y%m%dT%H%M%S}_{version}.npz"))
+            for _, _, path in self.entries()[self.keep:]:
+                os.remove(path)
+            return True
+
+    def load(self, path):
+        return DatasetSnapshot.load(path)
+
+def get_history_dir():
+    """Diretório do histórico de versões"""
+    return os.environ.get(HISTORY_DIR_ENV) or os.path.join(tempfile.gettempdir(), 'editais_historico')
+
+@st.cache_resource
+def get_dataset_history():
+    """Histórico de versões do processo (mesmo diretório para todas as sessões)"""
+    try:
+        keep = max(int(os.environ.get(HISTORY_VERSIONS_ENV, HISTORY_DEFAULT_VERSIONS)), 2)
+    except ValueError:
+        keep = HISTORY_DEFAULT_VERSIONS
+    return DatasetHistory(get_history_dir(), keep)
+
+def record_dataset_history(df):
+    """Registra a versão baixada no histórico; falhas de disco não impedem a carga"""
+    try:
+        get_dataset_history().record(df)
+    except OSError as e:
+        warnings.warn(f"Histórico de versões indisponível: {e}")
+
+@version_cached('historico')
+def get_history_snapshot(dataset_version, path, _history):
+    """Versão do histórico carregada do disco (reaproveitada até a próxima carga)"""
+    return _history.load(path)
+
+def format_history_entry(entry):
+    """Rótulo de uma versão do histórico no seletor"""
+    saved_at, version, _ = entry
+    return f"{saved_at:%d/%m/%Y %H:%M:%S} · versão {version}"
+
+def show_dataset_history(dataset_version, filtered_row_keys, fetch_rows):
+    """Aba "Novidades desde...": editais adicionados, removidos e reclassificados
+
+    filtered_row_keys() retorna as row_keys filtradas da versão atual e
+    fetch_rows(posições) as colunas de detalhe dessas posições na versão atual.
+    """
+    st.markdown("### 🆕 Novidades desde...")
+    st.caption(
+        "Cada versão baixada da planilha fica registrada (chaves e hashes de conteúdo de cada edital). "
+        "Um edital alterado mantém a chave e muda a classificação, a pontuação, as observações, "
+        "a situação, o valor ou a data de realização."
+    )
+    
+    history = get_dataset_history()
+    entries = history.entries()
+    current = [entry for entry in entries if entry[1] == dataset_version]
+    if not current or len(entries) < 2:
+        st.info(f"ℹ️ O histórico ainda tem {len(entries)} versão(ões) registrada(s). "
+                "As novidades aparecem depois da próxima atualização com dados diferentes.")
+        return
+    
+    older = [entry for entry in entries if entry[0] < current[0][0]]
+    if not older:
+        st.info("ℹ️ Não há versões anteriores à atual no histórico.")
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        since = st.selectbox("📅 Desde a versão", older, format_func=format_history_entry, key='historico_desde')
+    with col2:
+        until = st.selectbox(
+            "📅 Até a versão", [entry for entry in entries if entry[0] > since[0]],
+            format_func=format_history_entry, key='historico_ate'
+        )
+    
+    old = get_history_snapshot(dataset_version, since[2], history)
+    new = get_history_snapshot(dataset_version, until[2], history)
+    diff = DatasetDiff(old, new)
+    
+    is_current = until[1] == dataset_version
+    if is_current and st.checkbox("🔍 Somente editais filtrados", key='historico_filtrados',
+                                  help="Aplica a busca e os filtros atuais aos adicionados e alterados"):
+        diff.restrict(new, filtered_row_keys())
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Adicionados", f"{len(diff.added):,}")
+    col2.metric("Removidos", f"{len(diff.removed):,}")
+    col3.metric("Alterados", f"{len(diff.changed_new):,}")
+    col4.metric("Inalterados", f"{diff.unchanged:,}")
+    
+    changed = new.summary_frame(diff.changed_new)
+    if 'Nova Predição' in old.summary and 'Nova Predição' in changed.columns:
+        changed.insert(
+            changed.columns.get_loc('Nova Predição'), 'Nova Predição (antes)',
+            old.summary_frame(diff.changed_old)['Nova Predição'].to_numpy()
+        )
+    sections = [
+        ("➕ Adicionados", diff.added, new.summary_frame(diff.added), is_current),
+        ("➖ Removidos", diff.removed, old.summary_frame(diff.removed), False),
+        ("✏️ Alterados", diff.changed_new, changed, is_current),
+    ]
+    exports = []
+    for title, positions, rows, with_details in sections:
+        if len(positions) == 0:
+            continue
+        if with_details:
+            # Versão atual: objeto e valor vêm da base carregada
+            details = fetch_rows(positions).reset_index(drop=True)
+            rows = pd.concat([rows, details.drop(columns=[col for col in details.columns if col in rows.columns])], axis=1)
+        rows.attrs = {}
+        
+        st.markdown(f"#### {title}")
+        if len(positions) > HISTORY_MAX_ROWS:
+            st.caption(f"Exibindo {HISTORY_MAX_ROWS:,} de {len(positions):,} editais (o CSV traz todos)")
+        st.dataframe(format_page(rows.head(HISTORY_MAX_ROWS).copy()), use_container_width=True, hide_index=True)
+        exports.append(rows.assign(Mudança=title.split(' ', 1)[1]))
+    
+    if exports:
+        st.download_button(
+            label="📥 Download CSV das novidades",
+            data=serialize_export(pd.concat(exports, ignore_index=True), "CSV"),
+            file_name=f"novidades_{since[1]}_{until[1]}.csv",
+            mime="text/csv"
+        )
+
+# Formatos de exportação: extensão do arquivo e tipo MIME
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'XLSX': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'PARQUET': ('parquet', 'application/vnd.apache.parquet'),
+    'FEATHER': ('feather', 'application/vnd.apache.arrow.file'),
+    'ARROW': ('arrows', 'application/vnd.apache.arrow.stream'),
+}
+# Formatos colunares (pyarrow): tipos preservados (datas, números) e compressão
+# opcional. FEATHER é o formato de arquivo Arrow IPC; ARROW, o de stream.
+COLUMNAR_EXPORT_FORMATS = ['PARQUET', 'FEATHER', 'ARROW']
+EXPORT_COMPRESSIONS = ['zstd', 'lz4', 'nenhuma']
+# Linhas por bloco na gravação de CSV e XLSX (cada bloco atualiza o progresso)
+EXPORT_CHUNK_ROWS = 10000
+# Fila de exportações em segundo plano
+EXPORT_WORKERS_ENV = 'EDITAIS_EXPORT_WORKERS'
+EXPORT_DEFAULT_WORKERS = 2
+# Intervalo (s) entre as atualizações da barra de progresso
+EXPORT_POLL_SECONDS = 0.5
+# Chave, na sessão, da última exportação pedida
+EXPORT_JOB_STATE = 'export_job'
+
+def import_pyarrow():
+    """Importa o pyarrow sob demanda (None se não estiver instalado)"""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+def export_formats():
+    """Formatos de exportação disponíveis (os colunares exigem o pyarrow)"""
+    if import_pyarrow() is not None:
+        return list(EXPORT_FORMATS)
+    return [fmt for fmt in EXPORT_FORMATS if fmt not in COLUMNAR_EXPORT_FORMATS]
+
+def export_chunks(n_rows):
+    """Blocos (início, fim) de EXPORT_CHUNK_ROWS linhas; ao menos um, mesmo sem linhas"""
+    return [(start, min(start + EXPORT_CHUNK_ROWS, n_rows)) for start in range(0, n_rows, EXPORT_CHUNK_ROWS)] or [(0, 0)]
+
+def write_arrow_table(table, export_format, compression=None):
+    """Grava uma tabela Arrow como Parquet, Feather ou stream Arrow IPC (bytes)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    codec = None if compression in (None, 'nenhuma') else compression
+    sink = pa.BufferOutputStream()
+    if export_format == 'PARQUET':
+        pq.write_table(table, sink, compression=codec or 'none')
+    else:
+        open_writer = pa.ipc.new_file if export_format == 'FEATHER' else pa.ipc.new_stream
+        with open_writer(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=codec)) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def serialize_export(export_data, export_format, compression=None, progress=None):
+    """Serializa os dados no formato de exportação escolhido (bytes)
+
+    Os formatos colunares convertem as colunas em memória direto para Arrow,
+    sem passar por texto; compression ('zstd', 'lz4') só vale para eles.
+    CSV e XLSX (os lentos) são gravados em blocos de EXPORT_CHUNK_ROWS linhas e
+    progress(fração), se informado, é atualizado após cada bloco; os colunares,
+    de uma vez (blocos menores aumentariam o arquivo Parquet).
+    """
+    if export_format in COLUMNAR_EXPORT_FORMATS:
+        import pyarrow as pa
+        
+        # attrs guardam a versão e as colunas compactadas: não vão para o arquivo
+        export_data = export_data.copy(deep=False)
+        export_data.attrs = {}
+        return write_arrow_table(pa.Table.from_pandas(export_data, preserve_index=False), export_format, compression)
+    
+    chunks = export_chunks(len(export_data))
+    if export_format == "CSV":
+        output = io.StringIO()
+        for done, (start, end) in enumerate(chunks, 1):
+            export_data.iloc[start:end].to_csv(output, index=False, header=start == 0)
+            if progress is not None:
+                progress(done / len(chunks))
+        return output.getvalue().encode('utf-8')
+    
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for done, (start, end) in enumerate(chunks, 1):
+            # Linha 0 da planilha é o cabeçalho
+            export_data.iloc[start:end].to_excel(
+                writer, index=False, sheet_name='Editais_Filtrados',
+                startrow=start + 1 if start else 0, header=start == 0
+            )
+            if progress is not None:
+                # A gravação da planilha, ao fechar o writer, conta como mais um bloco
+                progress(done / (len(chunks) + 1))
+    return output.getvalue()
+
+def get_export_cache():
+    """Arquivos de exportação gerados (no cache central)"""
+    return CacheNamespace(get_cache_manager(), 'exportacoes')
+
+class ExportJob:
+    """Uma exportação em segundo plano: progresso, erro e tempo de geração"""
+
+    def __init__(self, key, version, export_format):
+        self.key = key
+        self.version = version
+        self.export_format = export_format
+        self.created_at = datetime.now()
+        self.progress = 0.0
+        self.error = None
+        self.seconds = None
+        self.data = None
+        self.done = threading.Event()
+
+class ExportQueue:
+    """Pool de exportações em segundo plano, uma tarefa por seleção
+
+    A chave da tarefa é a da exportação (versão dos dados, filtros, colunas,
+    formato, compressão): pedir de novo a mesma seleção acompanha a tarefa em
+    andamento ou reaproveita o arquivo pronto, guardado no cache central
+    ('exportacoes'). Threads, e não processos, porque a serialização lê os
+    dados já carregados no processo.
+    """
+
+    def __init__(self, workers, cache):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='editais-export')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'reused': 0, 'failed': 0}
+
+    def job(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def artifact(self, job):
+        """Arquivo gerado pela tarefa (None se ainda não terminou ou saiu do cache)"""
+        if not job.done.is_set() or job.error is not None:
+            return None
+        return job.data if job.data is not None else self.cache.get(job.key)
+
+    def _reusable(self, job):
+        if job.error is not None:
+            return False
+        return not job.done.is_set() or job.data is not None or self.cache.contains(job.key)
+
+    def submit(self, key, serialize, version, export_format):
+        """Tarefa da seleção: em andamento, pronta (reaproveitada) ou nova
+
+        serialize(progress) gera os bytes; progress(fração) atualiza a tarefa.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None and self.cache.contains(key):
+                # Arquivo já no cache central (tarefa anterior já descartada)
+                job = ExportJob(key, version, export_format)
+                job.progress = 1.0
+                job.done.set()
+                self._jobs[key] = job
+            if job is not None and self._reusable(job):
+                self.stats['reused'] += 1
+                return job
+            
+            # Tarefas concluídas de outras versões saem do registro
+            self._jobs = {
+                other_key: other for other_key, other in self._jobs.items()
+                if other.version == version or not other.done.is_set()
+            }
+            job = ExportJob(key, version, export_format)
+            self._jobs[key] = job
+            self.stats['submitted'] += 1
+        self._executor.submit(self._run, job, serialize)
+        return job
+
+    def _run(self, job, serialize):
+        started = time.perf_counter()
+        
+        def progress(fraction):
+            job.progress = min(max(fraction, 0.0), 1.0)
+        
+        try:
+            data = serialize(progress)
+            job.seconds = time.perf_counter() - started
+            self.cache.put(job.key, data, version=job.version, cost=job.seconds)
+            # Acima do orçamento o cache não guarda o arquivo: fica com a tarefa
+            if not self.cache.contains(job.key):
+                job.data = data
+            job.progress = 1.0
+        except Exception as e:
+            job.error = str(e)
+            with self._lock:
+                self.stats['failed'] += 1
+        finally:
+            job.done.set()
+
+    def snapshot(self):
+        """Métricas da fila para exibição"""
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if not job.done.is_set())
+            return dict(self.stats, running=running)
+
+def get_export_workers():
+    """Threads do pool de exportação (EDITAIS_EXPORT_WORKERS, padrão 2)"""
+    try:
+        return max(1, int(os.environ.get(EXPORT_WORKERS_ENV, EXPORT_DEFAULT_WORKERS)))
+    except ValueError:
+        return EXPORT_DEFAULT_WORKERS
+
+@st.cache_resource
+def get_export_queue():
+    """Fila de exportações do processo, compartilhada pelas sessões"""
+    return ExportQueue(get_export_workers(), get_export_cache())
+
+@st.fragment(run_every=EXPORT_POLL_SECONDS)
+def show_export_progress(job_key):
+    """Barra de progresso da exportação em andamento (atualizada sozinha)"""
+    job = get_export_queue().job(job_key)
+    if job is None or job.done.is_set():
+        # Concluída: a página é remontada, agora com o botão de download
+        st.rerun()
+    st.progress(job.progress, text=f"⏳ Gerando arquivo {job.export_format}... {job.progress:.0%}")
+
+def show_export_job(job_key):
+    """Estado da exportação pedida nesta sessão: progresso, erro ou download"""
+    if st.session_state.get(EXPORT_JOB_STATE) != job_key:
+        return
+    queue = get_export_queue()
+    job = queue.job(job_key)
+    if job is None:
+        return
+    if not job.done.is_set():
+        show_export_progress(job_key)
+        return
+    if job.error is not None:
+        st.error(f"❌ Erro ao gerar o arquivo {job.export_format}: {job.error}")
+        return
+    
+    data = queue.artifact(job)
+    if data is None:
+        # Arquivo removido do cache: um novo clique gera outro
+        return
+    extension, mime = EXPORT_FORMATS[job.export_format]
+    st.download_button(
+        label=f"📥 Download {job.export_format}",
+        data=data,
+        file_name=f"editais_filtrados_{job.created_at.strftime('%Y%m%d_%H%M%S')}.{extension}",
+        mime=mime,
+        type="primary"
+    )
+    st.success(f"✅ Arquivo {job.export_format} preparado para download!")
+
+def export_controls(serialize, export_key=None):
+    """Seletor de formato e botões de exportação; serialize(formato, compressão, progress) gera os bytes
+
+    Com export_key (versão dos dados, ...), o arquivo é gerado em segundo
+    plano pela fila de exportações e reaproveitado enquanto a seleção não
+    muda; a sessão segue respondendo durante a geração.
+    """
+    col1, col2, col3 = st.columns([2, 1, 1])
+    
+    with col3:  # Posiciona no lado direito
+        export_format = st.selectbox(
+            "Formato:",
+            export_formats(),
+            key="export_format",
+            help="PARQUET, FEATHER e ARROW preservam os tipos (datas, valores) e são lidos rapidamente pelo pandas/pyarrow"
+        )
+        compression = None
+        if export_format in COLUMNAR_EXPORT_FORMATS:
+            compression = st.selectbox("Compressão:", EXPORT_COMPRESSIONS, key="export_compressao")
+        
+        if export_key is None:
+            if st.button("📥 Exportar Filtrados", type="primary"):
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                extension, mime = EXPORT_FORMATS[export_format]
+                st.download_button(
+                    label=f"📥 Download {export_format}",
+                    data=serialize(export_format, compression, None),
+                    file_name=f"editais_filtrados_{timestamp}.{extension}",
+                    mime=mime,
+                    type="primary"
+                )
+                st.success(f"✅ Arquivo {export_format} preparado para download!")
+            return
+        
+        job_key = export_key + (export_format, compression)
+        if st.button("📥 Exportar Filtrados", type="primary"):
+            get_export_queue().submit(
+                job_key,
+                lambda progress: serialize(export_format, compression, progress),
+                export_key[0],
+                export_format
+            )
+            st.session_state[EXPORT_JOB_STATE] = job_key
+        show_export_job(job_key)
+
+@st.fragment
+def create_export_button(df, columns_to_show, rows=None, export_key=None):
+    """Cria botão de exportação automática (fragmento: reexecuta só esta seção)
+
+    rows, se informado, são as posições (já ordenadas) das linhas exportadas;
+    export_key identifica a seleção no cache de exportações.
+    """
+    # Colunas pesadas só são descomprimidas ao gerar o arquivo
+    export_columns = list(columns_to_show) if columns_to_show else available_columns(df)
+    export_controls(
+        lambda export_format, compression, progress: serialize_export(
+            with_columns(df.iloc[rows] if rows is not None else df, export_columns), export_format, compression, progress
+        ),
+        export_key + (tuple(export_columns),) if export_key is not None else None
+    )
+
+def format_page(page_df):
+    """Formata valores monetários, pontuações e observações de uma página da tabela"""
+    # Metadados da base (versão, colunas compactadas) não são exibidos
+    page_df.attrs = {}
+    
+    # Formatação condicional para valores monetários
+    if 'Valor Estimado' in page_df.columns:
+        page_df['Valor Estimado'] = page_df['Valor Estimado'].apply(
+            lambda x: format_brl(x) if pd.notna(x) else 'N/A'
+        )
+    
+    # Formatação para pontuações
+    for col in ['pontuacao', 'pontuacao_final']:
+        if col in page_df.columns:
+            page_df[col] = page_df[col].apply(
+                lambda x: f"{x:.2f}" if pd.notna(x) else 'N/A'
+            )
+    
+    # Preenchimento automático para observações em branco
+    if 'Observações' in page_df.columns:
+        page_df['Observações'] = page_df['Observações'].apply(
+            lambda x: x if pd.notna(x) and str(x).strip() != '' else 'Classificação baseada em Termos Chave'
+        )
+    
+    return page_df
+
+# Colunas exibidas por padrão na tabela, na ordem especificada
+DEFAULT_TABLE_COLUMNS = [
+    'Nova Predição',
+    'Predição Antiga',
+    'Ano',
+    'Mês',
+    'Ente',
+    'Unidade',
+    'Objeto',
+    'Valor Estimado',
+    'observacoes'
+]
+
+# Ordenação da tabela: permutações da base completa por (versão, coluna, direção)
+SORT_NONE = 'Ordem original'
+SORT_DIRECTIONS = {'Crescente': False, 'Decrescente': True}
+SORT_TOP_OPTIONS = ['Todas', 10, 50, 100, 500, 1000]
+
+class SortPermutation:
+    """Permutação que ordena a base completa por uma coluna (nulos no final)
+
+    rank[posição] é a colocação da linha na ordem; as linhas filtradas são
+    ordenadas pelos seus ranks, sem comparar os valores de novo.
+    """
+
+    def __init__(self, values, descending=False, row_keys=None):
+        values = pd.Series(values).reset_index(drop=True)
+        self.order = values.sort_values(ascending=not descending, na_position='last', kind='stable').index.to_numpy()
+        self.rank = np.empty(len(self.order), dtype=np.int64)
+        self.rank[self.order] = np.arange(len(self.order))
+        self.n_rows = len(self.order)
+        self.row_keys = row_keys
+        self.key_index = pd.Index(row_keys) if row_keys is not None else None
+
+    def sorted_positions(self, positions=None, limit=None):
+        """Posições (na base) de positions em ordem; limit seleciona só as primeiras
+
+        Sem filtro a ordem é uma fatia da permutação. Com limit, os primeiros
+        são separados por seleção parcial (argpartition) e só eles ordenados;
+        sem limit, ordena os ranks ou percorre a permutação marcando as linhas
+        filtradas, o que for mais barato.
+        """
+        if positions is None:
+            return self.order[:limit] if limit is not None else self.order
+        
+        ranks = self.rank[positions]
+        if limit is not None and limit < len(ranks):
+            first = np.argpartition(ranks, limit - 1)[:limit]
+            return positions[first[np.argsort(ranks[first])]]
+        if len(positions) * np.log2(max(len(positions), 2)) < self.n_rows:
+            return positions[np.argsort(ranks)]
+        member = np.zeros(self.n_rows, dtype=bool)
+        member[positions] = True
+        return self.order[member[self.order]]
+
+@version_cached('permutacao')
+def get_sort_permutation(dataset_version, column, descending, _df):
+    """Constrói (uma vez por versão dos dados, coluna e direção) a permutação"""
+    row_keys = _df[ROW_KEY_COLUMN].to_numpy() if ROW_KEY_COLUMN in _df.columns else None
+    return SortPermutation(get_column(_df, column), descending, row_keys)
+
+def sort_controls(columns):
+    """Widgets de ordenação: (coluna ou None, decrescente, limite ou None)"""
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_column = st.selectbox("↕️ Ordenar por", [SORT_NONE] + list(columns), key="ordenar_por")
+    with col2:
+        direction = st.selectbox("Direção", list(SORT_DIRECTIONS), index=1, key="ordenar_direcao")
+    with col3:
+        top = st.selectbox(
+            "🏆 Limitar a",
+            SORT_TOP_OPTIONS,
+            format_func=lambda option: option if option == 'Todas' else f"Primeiras {option}",
+            key="ordenar_limite",
+            help="Exibe apenas as primeiras linhas da ordenação (ex.: maiores valores)"
+        )
+    if sort_column == SORT_NONE:
+        return None, False, None
+    return sort_column, SORT_DIRECTIONS[direction], (None if top == 'Todas' else top)
+
+def sorted_rows(display_df, base_df, column, descending, limit, cache_key=None):
+    """Posições (em base_df) das linhas de display_df ordenadas pela coluna
+
+    A permutação da base completa vem do cache; as linhas filtradas são
+    localizadas pela row_key. O resultado fica no cache de consultas, então
+    trocar de página só fatia o array.
+    """
+    dataset_version = get_dataset_version(base_df)
+    
+    def compute():
+        permutation = get_sort_permutation(dataset_version, column, descending, base_df)
+        if not index_matches_rows(permutation, base_df):
+            permutation = SortPermutation(get_column(base_df, column), descending, base_df[ROW_KEY_COLUMN].to_numpy())
+        if len(display_df) == len(base_df):
+            return permutation.sorted_positions(None, limit)
+        return permutation.sorted_positions(permutation.key_index.get_indexer(display_df[ROW_KEY_COLUMN].to_numpy()), limit)
+    
+    if cache_key is None:
+        return compute()
+    return get_query_cache().get_or_compute(('ordem', cache_key, column, descending, limit), compute, version=dataset_version)
+
+def table_controls(columns):
+    """Widgets da tabela: colunas exibidas, linhas por página e filtro de alterações"""
+    # Filtrar apenas as colunas que existem nos dados
+    default_columns = [col for col in DEFAULT_TABLE_COLUMNS if col in columns]
+    
+    # Opções de visualização
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        columns_to_show = st.multiselect(
+            "📊 Selecionar colunas para exibir",
+            options=columns,
+            default=default_columns,
+            help="Selecione as colunas que deseja visualizar"
+        )
+    
+    with col2:
+        rows_per_page = st.selectbox(
+            "📄 Linhas por página",
+            [10, 25, 50, 100],
+            index=1
+        )
+    
+    # Flag para mostrar apenas alterações de classificação
+    show_only_changes = st.checkbox(
+        "📊 Exibir apenas editais com classificações alteradas",
+        help="Mostra apenas editais onde Nova Predição ≠ Predição Antiga"
+    )
+    
+    return columns_to_show, rows_per_page, show_only_changes
+
+def show_changes_info(changed_rows, total_rows):
+    """Informa quantos editais alterados estão sendo exibidos (False se nenhum)"""
+    if changed_rows == 0:
+        st.warning("⚠️ Nenhum edital com classificação alterada encontrado nos dados filtrados.")
+        return False
+    st.info(f"📋 Mostrando {changed_rows:,} editais com classificações alteradas de {total_rows:,} totais ({(changed_rows/total_rows*100):.1f}%)")
+    return True
+
+def select_page(total_rows, rows_per_page):
+    """Seletor de página; retorna a posição da primeira linha da página"""
+    total_pages = (total_rows - 1) // rows_per_page + 1
+    
+    if total_pages > 1:
+        page = st.number_input(
+            f"Página (1 de {total_pages})",
+            min_value=1,
+            max_value=total_pages,
+            value=1
+        ) - 1
+    else:
+        page = 0
+    
+    return page * rows_per_page
+
+def show_page(page_df, start_idx, total_rows):
+    """Exibe a página formatada e a informação de paginação
+
+    Retorna a posição (na página) da linha selecionada, ou None.
+    """
+    event = st.dataframe(
+        format_page(page_df),
+        use_container_width=True,
+        height=400,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="tabela_editais"
+    )
+    
+    # Informações da paginação
+    st.info(f"Exibindo {start_idx + 1}-{min(start_idx + len(page_df), total_rows)} de {total_rows} registros")
+    
+    selected_rows = event.selection.rows if event is not None else []
+    if not selected_rows or selected_rows[0] >= len(page_df):
+        return None
+    st.caption("🧭 Linha selecionada - veja os editais similares abaixo")
+    return selected_rows[0]
+
+@st.fragment
+def display_data_table(df, base_df=None, cache_key=None):
+    """Exibe a tabela de dados com opções de visualização
+
+    Executa como fragmento: trocar página, linhas por página ou colunas
+    reexecuta apenas a tabela, sem recarregar dados nem refazer os filtros.
+    Selecionar uma linha mostra os editais similares da base completa
+    (base_df), que também fornece as permutações de ordenação.
+    """
+    st.markdown("### 📋 Dados dos Editais")
+    
+    # Todas as colunas do DataFrame (exceto a chave interna), inclusive as
+    # carregadas sob demanda - só descomprimidas se forem selecionadas
+    all_columns = [col for col in available_columns(df) if col != ROW_KEY_COLUMN]
+    columns_to_show, rows_per_page, show_only_changes = table_controls(all_columns)
+    sort_column, descending, top_limit = sort_controls(columns_to_show)
+    
+    # Aplicar filtro de alterações se solicitado
+    display_df = df
+    if show_only_changes and 'Nova Predição' in df.columns and 'Predição Antiga' in df.columns:
+        display_df = df[prediction_changes(df, base_df)]
+        if not show_changes_info(len(display_df), len(df)):
+            return
+    
+    if columns_to_show and len(display_df) > 0:
+        # Ordenação: posições na base completa, pela permutação em cache
+        source_df, rows = display_df, None
+        if sort_column is not None:
+            source_df = base_df if base_df is not None else display_df
+            order_key = (cache_key, show_only_changes) if cache_key is not None and base_df is not None else None
+            rows = sorted_rows(display_df, source_df, sort_column, descending, top_limit, order_key)
+        
+        # Paginação
+        total_rows = len(rows) if rows is not None else len(display_df)
+        start_idx = select_page(total_rows, rows_per_page)
+        
+        # Exibir dados
+        if rows is not None:
+            page_rows = source_df.iloc[rows[start_idx:start_idx + rows_per_page]]
+        else:
+            page_rows = display_df.iloc[start_idx:start_idx + rows_per_page]
+        selected = show_page(with_columns(page_rows, columns_to_show).copy(), start_idx, total_rows)
+        
+        # Botão de exportação reposicionado (lado inferior direito)
+        export_key = cache_key + (show_only_changes, sort_column, descending, top_limit) if cache_key is not None else None
+        create_export_button(source_df, columns_to_show, rows, export_key)
+        
+        if selected is not None and base_df is not None and similarity_text_column(available_columns(base_df)):
+            result_columns = [col for col in SIMILARITY_RESULT_COLUMNS if col in available_columns(base_df)]
+            show_similar_editais(
+                get_similarity_index(get_dataset_version(base_df), base_df),
+                page_rows[ROW_KEY_COLUMN].iloc[selected],
+                lambda positions: with_columns(base_df.iloc[positions], result_columns)
+            )
+
+# Backend opcional fora da memória: Parquet particionado por ano, consultado
+# pelo DuckDB. Ativado com EDITAIS_BACKEND=duckdb (requer o pacote duckdb)
+BACKEND_ENV = 'EDITAIS_BACKEND'
+PARQUET_DIR_ENV = 'EDITAIS_PARQUET_DIR'
+PARQUET_PARTITION_COLUMN = 'ano'
+# Versões do Parquet mantidas em disco (a atual e a anterior)
+PARQUET_VERSIONS_KEPT = 2
+# Coluna interna com a posição original da linha (ordem estável na paginação)
+ROW_ORDER_COLUMN = '_linha'
+
+def get_backend_name():
+    """Backend de consulta configurado: 'pandas' (padrão) ou 'duckdb'"""
+    return os.environ.get(BACKEND_ENV, 'pandas').strip().lower()
+
+def import_duckdb():
+    """Importa o duckdb sob demanda (None se não estiver instalado)"""
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    return duckdb
+
+def get_parquet_base_dir():
+    """Diretório base dos conjuntos Parquet (uma subpasta por versão dos dados)"""
+    return os.environ.get(PARQUET_DIR_ENV) or os.path.join(tempfile.gettempdir(), 'editais_parquet')
+
+def prune_parquet_versions(base_dir, keep=PARQUET_VERSIONS_KEPT):
+    """Remove as versões mais antigas do Parquet, mantendo as `keep` mais recentes"""
+    versions = [
+        os.path.join(base_dir, name) for name in os.listdir(base_dir)
+        if '.tmp-' not in name and os.path.isdir(os.path.join(base_dir, name))
+    ]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    for path in versions[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def write_parquet_dataset(df, base_dir):
+    """Grava o DataFrame como Parquet particionado por ano (pasta da versão)
+
+    A gravação é feita em uma pasta temporária e publicada com os.replace,
+    de modo que leitores nunca veem um conjunto incompleto.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    
+    dataset_dir = os.path.join(base_dir, get_dataset_version(df))
+    if os.path.isdir(dataset_dir):
+        return dataset_dir
+    os.makedirs(base_dir, exist_ok=True)
+    
+    table_df = df.reset_index(drop=True)
+    # Metadados da carga (versão, relatório de qualidade) não vão para o Parquet
+    table_df.attrs = {}
+    table_df[ROW_ORDER_COLUMN] = np.arange(len(table_df), dtype=np.int64)
+    
+    partitioning = None
+    if PARQUET_PARTITION_COLUMN in table_df.columns:
+        table_df[PARQUET_PARTITION_COLUMN] = table_df[PARQUET_PARTITION_COLUMN].round().astype('Int64')
+        partitioning = ds.partitioning(pa.schema([(PARQUET_PARTITION_COLUMN, pa.int64())]), flavor='hive')
+    
+    tmp_dir = f"{dataset_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    ds.write_dataset(
+        pa.Table.from_pandas(table_df, preserve_index=False),
+        tmp_dir,
+        format='parquet',
+        partitioning=partitioning,
+        existing_data_behavior='delete_matching'
+    )
+    try:
+        os.replace(tmp_dir, dataset_dir)
+    except OSError:
+        # Outro processo publicou a mesma versão primeiro
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    prune_parquet_versions(base_dir)
+    return dataset_dir
+
+def quote_identifier(column):
+    """Nome de coluna entre aspas para o SQL do DuckDB"""
+    return '"' + column.replace('"', '""') + '"'
+
+def sql_text(column):
+    """Expressão SQL do valor da coluna como texto ('' para nulos)"""
+    return f"coalesce(CAST({quote_identifier(column)} AS VARCHAR), '')"
+
+def sql_label_set(column):
+    """Expressão SQL do conjunto de categorias de uma coluna multi-label
+
+    Lista ordenada e sem repetições dos rótulos em maiúsculas (separados por
+    ; ou ,), como nos vetores de bits de PredictionAgreement.
+    """
+    labels = f"regexp_replace(upper(trim({sql_text(column)})), '^[\\s;,]+|[\\s;,]+$', '', 'g')"
+    return f"list_sort(list_distinct(string_split(regexp_replace({labels}, '\\s*[;,][\\s;,]*', ';', 'g'), ';')))"
+
+class ParquetBackend:
+    """Consultas fora da memória (DuckDB) sobre o Parquet particionado por ano
+
+    Busca e filtros viram um único WHERE: o DuckDB descarta partições de ano
+    e grupos de linhas pelas estatísticas do Parquet e lê só as colunas
+    usadas. Apenas páginas, agregados e exportações chegam ao pandas.
+    """
+
+    def __init__(self, dataset_dir, dataset_version, columns, quality=None):
+        self.duckdb = import_duckdb()
+        self.connection = self.duckdb.connect()
+        self.dataset_version = dataset_version
+        self.quality = quality
+        pattern = os.path.join(dataset_dir, '**', '*.parquet').replace("'", "''")
+        self.source = f"read_parquet('{pattern}', hive_partitioning = true)"
+        self.columns = [col for col in columns if col != ROW_ORDER_COLUMN]
+        self._re2_checked = {}
+        self.n_rows = self.scalar(f"SELECT count(*) FROM {self.source}")
+
+    def execute(self, sql, params=()):
+        # Um cursor por consulta: a conexão é compartilhada entre threads
+        return self.connection.cursor().execute(sql, list(params))
+
+    def scalar(self, sql, params=()):
+        return self.execute(sql, params).fetchone()[0]
+
+    def frame(self, sql, params=()):
+        return self.execute(sql, params).df()
+
+    def distinct(self, column):
+        """Valores distintos não nulos da coluna, ordenados"""
+        col = quote_identifier(column)
+        rows = self.execute(f"SELECT DISTINCT {col} FROM {self.source} WHERE {col} IS NOT NULL ORDER BY 1").fetchall()
+        return [row[0] for row in rows]
+
+    def bounds(self, column):
+        """Menor e maior valor da coluna (None, None se vazia)"""
+        col = quote_identifier(column)
+        return self.execute(f"SELECT min({col}), max({col}) FROM {self.source}").fetchone()
+
+    def value_steps(self, column):
+        """Marcas do slider de valor pelos percentis (como value_slider_steps)"""
+        quantiles = [step / VALUE_SLIDER_STEPS for step in range(VALUE_SLIDER_STEPS + 1)]
+        values = self.scalar(f"SELECT quantile_disc({quote_identifier(column)}, ?) FROM {self.source}", [quantiles])
+        return sorted({float(value) for value in values or [] if value is not None})
+
+    def re2_accepts(self, pattern):
+        """Se o RE2 do DuckDB aceita o padrão (lookaround e retrovisores não)"""
+        accepted = self._re2_checked.get(pattern)
+        if accepted is None:
+            try:
+                self.execute("SELECT regexp_matches('', ?, 'i')", [pattern])
+                accepted = True
+            except self.duckdb.Error:
+                accepted = False
+            self._re2_checked[pattern] = accepted
+        return accepted
+
+    def unsupported_regex_terms(self, search_params):
+        """Termos válidos em Python que o RE2 rejeita (buscados como texto literal)"""
+        mode = (search_params or {}).get('mode', 'texto')
+        if mode not in ('curinga', 'regex'):
+            return []
+        return [
+            term for key in SEARCH_TEXT_KEYS
+            for term in split_search_terms((search_params or {}).get(key, ''))
+            if not self.re2_accepts(compile_search_pattern(term, mode)[0].pattern)
+        ]
+
+    def regex_pattern(self, term, mode):
+        """Padrão do termo para regexp_matches; literal se o RE2 não aceitar
+
+        Nesse caso o resultado difere do backend pandas: a interface avisa
+        (unsupported_regex_terms) e a API recusa a consulta.
+        """
+        compiled, _ = compile_search_pattern(term, mode)
+        if self.re2_accepts(compiled.pattern):
+            return compiled.pattern
+        return re.escape(term)
+
+    def term_condition(self, term, mode, search_columns):
+        """Predicado SQL: o termo aparece em alguma coluna de busca"""
+        if mode in ('curinga', 'regex'):
+            pattern = self.regex_pattern(term, mode)
+            conditions = [f"regexp_matches({sql_text(col)}, ?, 'i')" for col in search_columns]
+            return '(' + ' OR '.join(conditions) + ')', [pattern] * len(search_columns)
+        
+        conditions = [f"contains(lower({sql_text(col)}), ?)" for col in search_columns]
+        return '(' + ' OR '.join(conditions) + ')', [term.lower()] * len(search_columns)
+
+    def where_clause(self, search_params, filters, only_changes=False):
+        """Traduz busca avançada, filtros e faixas em (WHERE, parâmetros)
+
+        Mesma semântica de filter_mask/select_rows; o filtro pela coluna de
+        partição é tipado para que o DuckDB pule as pastas de outros anos.
+        """
+        conditions, params = [], []
+        
+        search_columns = [col for col in SEARCH_COLUMNS if col in self.columns]
+        if has_text_search(search_params) and search_columns:
+            mode = search_params.get('mode', 'texto')
+            
+            for term in split_search_terms(search_params.get('contains_and', '')):
+                condition, term_params = self.term_condition(term, mode, search_columns)
+                conditions.append(condition)
+                params += term_params
+            
+            or_conditions = []
+            for term in split_search_terms(search_params.get('contains_or', '')):
+                condition, term_params = self.term_condition(term, mode, search_columns)
+                or_conditions.append(condition)
+                params += term_params
+            if or_conditions:
+                conditions.append('(' + ' OR '.join(or_conditions) + ')')
+            
+            for term in split_search_terms(search_params.get('not_contains', '')):
+                condition, term_params = self.term_condition(term, mode, search_columns)
+                conditions.append(f"NOT {condition}")
+                params += term_params
+        
+        for column, value in filters.items():
+            col = quote_identifier(column)
+            if isinstance(value, tuple):
+                low, high = value
+                if low is not None:
+                    conditions.append(f"{col} >= ?")
+                    params.append(low.to_pydatetime() if isinstance(low, pd.Timestamp) else low)
+                if high is not None:
+                    conditions.append(f"{col} <= ?")
+                    params.append(high.to_pydatetime() if isinstance(high, pd.Timestamp) else high)
+            elif value in ['Todas', 'Todos']:
+                continue
+            elif column == 'Nova Predição':
+                # Filtro especial para Nova Predição - busca por containment
+                if column in self.columns:
+                    conditions.append(f"contains(upper(trim({sql_text(column)})), ?)")
+                    params.append(str(value).upper())
+            elif column == OUTLIER_SCORE_COLUMN:
+                bounds = {
+                    'acima': f"{col} >= {OUTLIER_THRESHOLD}",
+                    'abaixo': f"{col} <= -{OUTLIER_THRESHOLD}",
+                    'ambos': f"abs({col}) >= {OUTLIER_THRESHOLD}",
+                }
+                conditions.append(bounds.get(value, 'false') if column in self.columns else 'false')
+            elif column == PARQUET_PARTITION_COLUMN:
+                try:
+                    params.append(int(float(value)))
+                    conditions.append(f"{col} = ?")
+                except ValueError:
+                    conditions.append('false')
+            else:
+                # Filtro exato para outras colunas
+                conditions.append(f"{sql_text(column)} = ?")
+                params.append(str(value))
+        
+        if only_changes and 'Nova Predição' in self.columns and 'Predição Antiga' in self.columns:
+            conditions.append(f"{sql_label_set('Nova Predição')} <> {sql_label_set('Predição Antiga')}")
+        
+        return (' AND '.join(conditions) if conditions else 'true'), params
+
+    def count(self, where):
+        sql, params = where
+        return self.scalar(f"SELECT count(*) FROM {self.source} WHERE {sql}", params)
+
+    def count_changes(self, where):
+        """Linhas em que a Nova Predição difere da Predição Antiga (None sem as colunas)"""
+        if 'Nova Predição' not in self.columns or 'Predição Antiga' not in self.columns:
+            return None
+        sql, params = where
+        return self.scalar(
+            f"SELECT count(*) FROM {self.source} WHERE {sql} "
+            f"AND {sql_label_set('Nova Predição')} <> {sql_label_set('Predição Antiga')}",
+            params
+        )
+
+    def order_clause(self, order_by=None):
+        """ORDER BY da coluna (nulos no final) com a ordem original como desempate"""
+        if order_by is None:
+            return ROW_ORDER_COLUMN
+        column, descending = order_by
+        return f"{quote_identifier(column)} {'DESC' if descending else 'ASC'} NULLS LAST, {ROW_ORDER_COLUMN}"
+
+    def fetch(self, columns, where, limit=None, offset=0, order_by=None):
+        """Linhas filtradas (só as colunas pedidas), na ordem original ou por order_by
+
+        order_by é (coluna, decrescente); com LIMIT o DuckDB usa top-N em vez
+        de ordenar todas as linhas filtradas.
+        """
+        sql, params = where
+        projection = ', '.join(quote_identifier(col) for col in columns)
+        query = f"SELECT {projection} FROM {self.source} WHERE {sql} ORDER BY {self.order_clause(order_by)}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        return self.frame(query, params)
+
+    def fetch_positions(self, columns, positions):
+        """Linhas pelas posições originais (na ordem das posições pedidas)"""
+        projection = ', '.join(quote_identifier(col) for col in columns)
+        rows = self.frame(
+            f"SELECT {ROW_ORDER_COLUMN}, {projection} FROM {self.source} WHERE {ROW_ORDER_COLUMN} IN "
+            f"(SELECT unnest(?))",
+            [[int(position) for position in positions]]
+        )
+        return rows.set_index(ROW_ORDER_COLUMN).loc[list(positions), columns]
+
+    def chart_data(self, where):
+        """Mesmas séries de build_chart_data, agregadas no DuckDB"""
+        sql, params = where
+        chart_data = {}
+        
+        if 'unidade' in self.columns:
+            counts = self.frame(
+                f"SELECT unidade, count(*) AS n FROM {self.source} WHERE {sql} AND unidade IS NOT NULL "
+                f"GROUP BY unidade ORDER BY n DESC, unidade LIMIT 10",
+                params
+            )
+            chart_data['unidade_counts'] = pd.Series(counts['n'].to_numpy(), index=pd.Index(counts['unidade'], name='unidade'), name='count')
+        
+        if 'unidade' in self.columns and 'Valor Estimado' in self.columns:
+            valores = self.frame(
+                f"SELECT unidade, coalesce(sum(\"Valor Estimado\"), 0) AS total FROM {self.source} "
+                f"WHERE {sql} AND unidade IS NOT NULL GROUP BY unidade ORDER BY total DESC LIMIT 8",
+                params
+            )
+            chart_data['unidade_valores'] = pd.Series(valores['total'].to_numpy(), index=pd.Index(valores['unidade'], name='unidade'), name='Valor Estimado')
+        
+        if 'ano' in self.columns:
+            temporal = self.frame(
+                f"SELECT ano, count(*) AS n FROM {self.source} WHERE {sql} AND ano IS NOT NULL GROUP BY ano ORDER BY ano",
+                params
+            )
+            chart_data['temporal'] = pd.Series(temporal['n'].to_numpy(), index=pd.Index(temporal['ano'], name='ano'), name='count')
+        
+        return chart_data
+
+    def classification_stats(self, where):
+        """Quantidade, valor total/médio e pontuação média por categoria (CategoryMatrix)"""
+        columns = ['Nova Predição'] + [col for col in ('Valor Estimado', 'pontuacao') if col in self.columns]
+        rows = self.fetch(columns, where)
+        values = rows['Valor Estimado'] if 'Valor Estimado' in rows.columns else np.zeros(len(rows))
+        scores = rows['pontuacao'] if 'pontuacao' in rows.columns else None
+        return CategoryMatrix(rows['Nova Predição'], values).category_stats(scores=scores)
+
+    def cooccurrence(self, where):
+        """Coocorrência de categorias: lê só Nova Predição e Valor Estimado filtrados"""
+        columns = ['Nova Predição'] + (['Valor Estimado'] if 'Valor Estimado' in self.columns else [])
+        rows = self.fetch(columns, where)
+        values = rows['Valor Estimado'] if 'Valor Estimado' in rows.columns else np.zeros(len(rows))
+        return CategoryMatrix(rows['Nova Predição'], values).cooccurrence()
+
+    def aggregate(self, where, by):
+        """Quantidade e Valor Estimado total por coluna (como api_aggregate)"""
+        sql, params = where
+        col = quote_identifier(by)
+        value_sum = ', sum("Valor Estimado") AS valor_total' if 'Valor Estimado' in self.columns else ''
+        return self.frame(
+            f"SELECT {col}, count(*) AS quantidade{value_sum} FROM {self.source} "
+            f"WHERE {sql} AND {col} IS NOT NULL GROUP BY {col} ORDER BY quantidade DESC",
+            params
+        )
+
+    def outliers(self, where, limit=20):
+        """Contagens de atípicos (acima, abaixo) e as linhas de maior |escore|"""
+        sql, params = where
+        col = quote_identifier(OUTLIER_SCORE_COLUMN)
+        above, below = self.execute(
+            f"SELECT count(*) FILTER (WHERE {col} >= {OUTLIER_THRESHOLD}), "
+            f"count(*) FILTER (WHERE {col} <= -{OUTLIER_THRESHOLD}) FROM {self.source} WHERE {sql}",
+            params
+        ).fetchone()
+        projection = ', '.join(quote_identifier(c) for c in OUTLIER_TABLE_COLUMNS if c in self.columns)
+        top = self.frame(
+            f"SELECT {projection} FROM {self.source} WHERE {sql} AND abs({col}) >= {OUTLIER_THRESHOLD} "
+            f"ORDER BY abs({col}) DESC, {ROW_ORDER_COLUMN} LIMIT {int(limit)}",
+            params
+        )
+        return top, int(above), int(below)
+
+    def export(self, columns, where, export_format, order_by=None, limit=None, compression=None, progress=None):
+        """Arquivo de exportação; CSV e Parquet são escritos pelo DuckDB direto em disco
+
+        FEATHER/ARROW saem do resultado da consulta em Arrow, sem passar pelo
+        pandas. O XLSX é montado em memória pelo openpyxl, então só as
+        colunas escolhidas das linhas filtradas são lidas; só ele informa o
+        progresso (progress(fração), por bloco de linhas).
+        """
+        sql, params = where
+        projection = ', '.join(quote_identifier(col) for col in columns)
+        limit_clause = f" LIMIT {int(limit)}" if limit is not None else ''
+        query = f"SELECT {projection} FROM {self.source} WHERE {sql} ORDER BY {self.order_clause(order_by)}{limit_clause}"
+        
+        if export_format in ('FEATHER', 'ARROW'):
+            return write_arrow_table(self.execute(query, params).to_arrow_table(), export_format, compression)
+        if export_format not in ('CSV', 'PARQUET'):
+            return serialize_export(self.fetch(columns, where, limit, order_by=order_by), export_format, progress=progress)
+        
+        if export_format == 'CSV':
+            options = "HEADER, DELIMITER ','"
+        else:
+            options = f"FORMAT PARQUET, COMPRESSION {'uncompressed' if compression in (None, 'nenhuma') else compression}"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'export')
+            self.execute(f"COPY ({query}) TO '{path}' ({options})", params)
+            with open(path, 'rb') as export_file:
+                return export_file.read()
+
+def open_parquet_backend():
+    """Baixa a planilha, grava o Parquet da versão e abre o backend DuckDB
+
+    O DataFrame só existe durante a gravação; as consultas seguintes leem o
+    Parquet em disco.
+    """
+    if import_duckdb() is None:
+        return None, f"{BACKEND_ENV}=duckdb requer o pacote duckdb (pip install duckdb)"
+    
+    df, error = fetch_data_from_sharepoint()
+    if error:
+        return None, error
+    record_dataset_history(df)
+    
+    try:
+        dataset_dir = write_parquet_dataset(df, get_parquet_base_dir())
+        return ParquetBackend(dataset_dir, get_dataset_version(df), list(df.columns), df.attrs.get(QUALITY_ATTR)), None
+    except Exception as e:
+        return None, f"Erro ao gravar/abrir o Parquet: {str(e)}"
+
+@st.cache_resource
+def get_backend_loader():
+    """Retorna o carregador single-flight do backend Parquet/DuckDB"""
+    return DatasetLoader(
+        open_parquet_backend,
+        on_refresh=lambda backend: publish_dataset_version(backend, backend.dataset_version, warm_backend_query)
+    )
+
+def load_parquet_backend():
+    """Backend DuckDB da versão atual dos dados"""
+    return get_backend_loader().get()
+
+# Log de consultas (SQLite): assinatura normalizada (busca + filtros), frequência
+# e latência. Depois de cada carga, as consultas mais frequentes são
+# recalculadas em segundo plano e os usuários já as encontram no cache
+QUERY_LOG_ENV = 'EDITAIS_QUERY_LOG'
+PREWARM_TOP_ENV = 'EDITAIS_PREWARM_TOP'
+PREWARM_DEFAULT_TOP = 10
+# Assinaturas mantidas no log (as menos frequentes saem primeiro)
+QUERY_LOG_MAX_SIGNATURES = 1000
+
+def query_signature(search_params, filters):
+    """Assinatura da consulta: a chave normalizada de make_filter_key, em JSON"""
+    return json.dumps(make_filter_key(search_params, filters), ensure_ascii=False)
+
+def encode_query(search_params, filters):
+    """JSON com os parâmetros originais da consulta (faixas e datas incluídas)"""
+    def encode(value):
+        if isinstance(value, tuple):
+            return {'faixa': [encode(bound) for bound in value]}
+        if isinstance(value, (pd.Timestamp, datetime)):
+            return {'data': pd.Timestamp(value).isoformat()}
+        return value.item() if isinstance(value, np.generic) else value
+    
+    return json.dumps({
+        'busca': {key: value for key, value in (search_params or {}).items() if value},
+        'filtros': {
+            column: encode(value) for column, value in (filters or {}).items()
+            if value not in ['Todas', 'Todos']
+        },
+    }, ensure_ascii=False)
+
+def decode_query(text):
+    """(search_params, filters) a partir do JSON de encode_query"""
+    def decode(value):
+        if isinstance(value, dict) and 'faixa' in value:
+            return tuple(decode(bound) for bound in value['faixa'])
+        if isinstance(value, dict) and 'data' in value:
+            return pd.Timestamp(value['data'])
+        return value
+    
+    query = json.loads(text)
+    return dict(query['busca']), {column: decode(value) for column, value in query['filtros'].items()}
+
+class QueryLog:
+    """Log local das consultas em SQLite, compartilhado pelas sessões do processo
+
+    Uma conexão (check_same_thread=False) protegida por lock; o arquivo fica
+    pequeno - só as max_signatures consultas mais frequentes são mantidas.
+    Guarda também o estado do último pré-aquecimento.
+    """
+
+    def __init__(self, path, max_signatures=QUERY_LOG_MAX_SIGNATURES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_signatures = max_signatures
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS consultas (
+                    assinatura TEXT PRIMARY KEY,
+                    consulta TEXT NOT NULL,
+                    execucoes INTEGER NOT NULL,
+                    ms_total REAL NOT NULL,
+                    ms_max REAL NOT NULL,
+                    ultima REAL NOT NULL
+                )
+            """)
+        self._prewarming = False
+        self.last_prewarm = None
+
+    def record(self, signature, query, seconds):
+        """Soma uma execução da consulta (e a latência) à assinatura"""
+        ms = seconds * 1000
+        with self._lock, self._connection:
+            self._connection.execute("""
+                INSERT INTO consultas VALUES (?, ?, 1, ?, ?, ?)
+                ON CONFLICT(assinatura) DO UPDATE SET
+                    consulta = excluded.consulta,
+                    execucoes = execucoes + 1,
+                    ms_total = ms_total + excluded.ms_total,
+                    ms_max = max(ms_max, excluded.ms_max),
+                    ultima = excluded.ultima
+            """, (signature, query, ms, ms, time.time()))
+            self._connection.execute("""
+                DELETE FROM consultas WHERE assinatura NOT IN (
+                    SELECT assinatura FROM consultas ORDER BY execucoes DESC, ultima DESC LIMIT ?
+                )
+            """, (self.max_signatures,))
+
+    def top(self, limit):
+        """Consultas mais frequentes (as mais lentas primeiro no empate): [(assinatura, consulta)]"""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT assinatura, consulta FROM consultas ORDER BY execucoes DESC, ms_total DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+    def stats(self):
+        """Tabela das consultas mais frequentes, para exibição"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT assinatura, execucoes, ms_total / execucoes, ms_max FROM consultas "
+                "ORDER BY execucoes DESC, ms_total DESC LIMIT 20"
+            ).fetchall()
+        return pd.DataFrame(rows, columns=['Consulta', 'Execuções', 'Latência Média (ms)', 'Latência Máxima (ms)']).round(1)
+
+    def count(self):
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM consultas").fetchone()[0]
+
+    def begin_prewarm(self):
+        """Marca o início de um pré-aquecimento (False se já houver um em andamento)"""
+        with self._lock:
+            if self._prewarming:
+                return False
+            self._prewarming = True
+            return True
+
+    def end_prewarm(self, version, warmed, seconds):
+        with self._lock:
+            self._prewarming = False
+            self.last_prewarm = {'version': version, 'queries': warmed, 'seconds': seconds}
+
+    def prewarm_snapshot(self):
+        with self._lock:
+            return self._prewarming, self.last_prewarm
+
+def get_query_log_path():
+    """Arquivo SQLite do log de consultas"""
+    return os.environ.get(QUERY_LOG_ENV) or os.path.join(tempfile.gettempdir(), 'editais_consultas.sqlite3')
+
+@st.cache_resource
+def get_query_log():
+    """Log de consultas do processo (None se o SQLite estiver indisponível)"""
+    try:
+        return QueryLog(get_query_log_path())
+    except (OSError, sqlite3.Error) as e:
+        warnings.warn(f"Log de consultas indisponível: {e}")
+        return None
+
+def get_prewarm_top():
+    """Consultas pré-aquecidas após cada carga (0 desliga)"""
+    try:
+        return max(int(os.environ.get(PREWARM_TOP_ENV, PREWARM_DEFAULT_TOP)), 0)
+    except ValueError:
+        return PREWARM_DEFAULT_TOP
+
+def log_session_query(search_params, filters, seconds):
+    """Registra a consulta da sessão no log quando ela muda (reruns da mesma consulta não contam)"""
+    signature = query_signature(search_params, filters)
+    if st.session_state.get('_consulta_registrada') == signature:
+        return
+    st.session_state['_consulta_registrada'] = signature
+    log = get_query_log()
+    if log is None:
+        return
+    try:
+        log.record(signature, encode_query(search_params, filters), seconds)
+    except sqlite3.Error as e:
+        warnings.warn(f"Falha ao registrar a consulta: {e}")
+
+def warm_dataset_query(df, search_params, filters):
+    """Resultado filtrado, gráficos e coocorrência da consulta (mesmas chaves de main)"""
+    cache_key = (get_dataset_version(df), make_filter_key(search_params, filters))
+    filtered_df = query_filtered_data(df, search_params, filters)
+    get_chart_figures(cache_key, lambda: build_chart_data(filtered_df))
+    if 'Nova Predição' in df.columns:
+        get_cooccurrence(cache_key, lambda: filtered_cooccurrence(df, filtered_df))
+
+def warm_backend_query(backend, search_params, filters):
+    """Contagens, gráficos e coocorrência da consulta no DuckDB (mesmas chaves de main)"""
+    cache_key = (backend.dataset_version, make_filter_key(search_params, filters))
+    where = backend.where_clause(search_params, filters)
+    get_backend_count(backend, search_params, filters)
+    get_chart_figures(cache_key, lambda: backend.chart_data(where))
+    if 'Nova Predição' in backend.columns:
+        get_cooccurrence(cache_key, lambda: backend.cooccurrence(where))
+
+def prewarm_queries(log, data, version, warm, top_n):
+    """Recalcula as top_n consultas do log para a versão carregada (thread de fundo)"""
+    started = time.perf_counter()
+    warmed = 0
+    try:
+        for signature, query in log.top(top_n):
+            search_params, filters = decode_query(query)
+            if query_signature(search_params, filters) != signature:
+                continue
+            try:
+                warm(data, search_params, filters)
+                warmed += 1
+            except Exception as e:
+                # Consulta que não vale mais nesta versão (coluna removida, regex inválida)
+                warnings.warn(f"Pré-aquecimento ignorou {signature}: {e}")
+    finally:
+        log.end_prewarm(version, warmed, time.perf_counter() - started)
+
+def publish_dataset_version(data, version, warm):
+    """Callback do carregador: torna a versão carregada a atual do cache e a pré-aquece"""
+    get_cache_manager().retain_version(version)
+    start_prewarm(data, version, warm)
+
+def start_prewarm(data, version, warm):
+    """Pré-aquece as consultas mais frequentes em segundo plano"""
+    top_n = get_prewarm_top()
+    log = get_query_log() if top_n else None
+    if log is None or not log.begin_prewarm():
+        return
+    threading.Thread(
+        target=prewarm_queries, args=(log, data, version, warm, top_n),
+        name='editais-prewarm', daemon=True
+    ).start()
+
+def distinct_values(df, backend, column):
+    """Opções de um filtro da sidebar: valores distintos não nulos, ordenados"""
+    if backend is not None:
+        return backend.distinct(column)
+    return sorted(df[column].dropna().unique().tolist())
+
+def range_bounds(df, backend, column):
+    """Menor e maior valor de uma coluna de faixa (None, None se vazia)"""
+    if backend is not None:
+        return backend.bounds(column)
+    index = get_sorted_index(get_dataset_version(df), column, df)
+    if len(index.order) == 0:
+        return None, None
+    return index.sorted_values[0], index.sorted_values[-1]
+
+def get_backend_count(backend, search_params, filters):
+    """Total filtrado e total de alterações, memoizados por versão e filtros"""
+    def compute():
+        where = backend.where_clause(search_params, filters)
+        return backend.count(where), backend.count_changes(where)
+    
+    key = ('contagem', backend.dataset_version, make_filter_key(search_params, filters))
+    return get_query_cache().get_or_compute(key, compute, version=backend.dataset_version)
+
+@st.fragment
+def display_backend_table(backend, search_params, filters):
+    """Tabela paginada pelo DuckDB: só a página exibida é lida do Parquet"""
+    st.markdown("### 📋 Dados dos Editais")
+    
+    all_columns = [col for col in backend.columns if col != ROW_KEY_COLUMN]
+    columns_to_show, rows_per_page, show_only_changes = table_controls(all_columns)
+    sort_column, descending, top_limit = sort_controls(columns_to_show)
+    order_by = (sort_column, descending) if sort_column is not None else None
+    
+    total_rows, changed_rows = get_backend_count(backend, search_params, filters)
+    where = backend.where_clause(search_params, filters)
+    if show_only_changes and changed_rows is not None:
+        if not show_changes_info(changed_rows, total_rows):
+            return
+        total_rows = changed_rows
+        where = backend.where_clause(search_params, filters, only_changes=True)
+    if order_by is not None and top_limit is not None:
+        total_rows = min(total_rows, top_limit)
+    
+    if columns_to_show and total_rows > 0:
+        start_idx = select_page(total_rows, rows_per_page)
+        page_size = min(rows_per_page, total_rows - start_idx)
+        selected = show_page(
+            backend.fetch(columns_to_show, where, page_size, start_idx, order_by=order_by),
+            start_idx, total_rows
+        )
+        
+        export_columns = list(columns_to_show)
+        export_limit = top_limit if order_by is not None else None
+        export_controls(
+            lambda export_format, compression, progress: backend.export(
+                export_columns, where, export_format, order_by, export_limit, compression, progress
+            ),
+            (backend.dataset_version, make_filter_key(search_params, filters), show_only_changes,
+             order_by, export_limit, tuple(export_columns))
+        )
+        
+        if selected is not None and similarity_text_column(backend.columns):
+            row_key = backend.fetch([ROW_KEY_COLUMN], where, 1, start_idx + selected, order_by=order_by)[ROW_KEY_COLUMN].iloc[0]
+            result_columns = [col for col in SIMILARITY_RESULT_COLUMNS if col in backend.columns]
+            show_similar_editais(
+                get_backend_similarity_index(backend.dataset_version, backend),
+                row_key,
+                lambda positions: backend.fetch_positions(result_columns, positions)
+            )
+
+# API local de consulta (JSON/HTTP) sobre os mesmos dados e caches da interface
+API_PORT_ENV = 'EDITAIS_API_PORT'
+API_HOST = '127.0.0.1'
+API_DEFAULT_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_GZIP_MIN_BYTES = 1024
+# Parâmetros de filtro da API → colunas da base (os mesmos nos dois backends)
+API_FILTER_PARAMS = {
+    'nova_predicao': 'Nova Predição',
+    'predicao_antiga': 'Predição Antiga',
+    'ano': 'ano',
+    'unidade': 'unidade',
+    'atipico': OUTLIER_SCORE_COLUMN,
+}
+
+class ApiError(Exception):
+    """Erro de requisição da API local, com o status HTTP correspondente"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def parse_api_query(query):
+    """Converte a query string em (search_params, filters, parâmetros brutos)"""
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    search_params = {name: params.get(name, '') for name in SEARCH_TEXT_KEYS}
+    if params.get('mode') in SEARCH_MODES.values():
+        search_params['mode'] = params['mode']
+    filters = {
+        column: params[name] for name, column in API_FILTER_PARAMS.items()
+        if params.get(name)
+    }
+    
+    # Faixas: valor_min/valor_max e data_inicio/data_fim (AAAA-MM-DD, inclusivas)
+    try:
+        if params.get('valor_min') or params.get('valor_max'):
+            filters['Valor Estimado'] = (
+                float(params['valor_min']) if params.get('valor_min') else None,
+                float(params['valor_max']) if params.get('valor_max') else None
+            )
+        if params.get('data_inicio') or params.get('data_fim'):
+            filters['data realizacao licitacao'] = (
+                pd.Timestamp(params['data_inicio']) if params.get('data_inicio') else None,
+                pd.Timestamp(params['data_fim']) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+                if params.get('data_fim') else None
+            )
+    except ValueError:
+        raise ApiError(400, "Faixa inválida: use números em valor_min/valor_max e datas AAAA-MM-DD")
+    return search_params, filters, params
+
+def make_api_etag(dataset_version, path, query):
+    """ETag forte: a resposta depende só da versão dos dados e da consulta"""
+    canonical_query = urlencode(sorted(parse_qsl(query)))
+    digest = hashlib.sha1(f"{dataset_version}|{path}|{canonical_query}".encode('utf-8')).hexdigest()
+    return f'"{digest[:20]}"'
+
+def gzip_etag(etag):
+    """ETag da representação comprimida (outros bytes, outra entidade)"""
+    return etag[:-1] + '-gzip"'
+
+def parse_if_none_match(header):
+    """Entidades de If-None-Match, sem o prefixo fraco W/ ('*' casa com qualquer uma)"""
+    tags = set()
+    for tag in (header or '').split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+def encode_cursor(dataset_version, filter_key, offset):
+    """Cursor opaco: versão dos dados, hash dos filtros e posição"""
+    filter_hash = hashlib.sha1(repr(filter_key).encode('utf-8')).hexdigest()[:12]
+    payload = json.dumps([dataset_version, filter_hash, offset]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_cursor(cursor, dataset_version, filter_key):
+    """Valida o cursor contra a versão/filtros atuais e retorna a posição"""
+    try:
+        version, filter_hash, offset = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        offset = int(offset)
+    except Exception:
+        raise ApiError(400, "Cursor inválido")
+    
+    if version != dataset_version:
+        raise ApiError(410, "Cursor expirado - os dados foram atualizados")
+    if filter_hash != hashlib.sha1(repr(filter_key).encode('utf-8')).hexdigest()[:12]:
+        raise ApiError(400, "Cursor não corresponde aos filtros informados")
+    return max(offset, 0)
+
+def api_list_editais(df, filtered_df, search_params, filters, params):
+    """Página de editais filtrados com paginação por cursor"""
+    version = get_dataset_version(df)
+    filter_key = make_filter_key(search_params, filters)
+    
+    try:
+        limit = int(params.get('limit', API_DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "Parâmetro 'limit' deve ser inteiro")
+    limit = min(max(limit, 1), API_MAX_PAGE_SIZE)
+    
+    offset = decode_cursor(params['cursor'], version, filter_key) if params.get('cursor') else 0
+    
+    columns = [col for col in params.get('columns', '').split(',') if col]
+    unknown = [col for col in columns if col not in available_columns(filtered_df)]
+    if unknown:
+        raise ApiError(400, f"Colunas inexistentes: {', '.join(unknown)}")
+    
+    page_df = with_columns(filtered_df.iloc[offset:offset + limit], columns or available_columns(filtered_df))
+    
+    next_offset = offset + limit
+    meta = {
+        'dataset_version': version,
+        'total': len(filtered_df),
+        'next_cursor': encode_cursor(version, filter_key, next_offset) if next_offset < len(filtered_df) else None,
+    }
+    # Os registros já saem serializados pelo pandas; só o envelope passa pelo json
+    items = page_df.to_json(orient='records', date_format='iso', force_ascii=False)
+    body = json.dumps(meta, ensure_ascii=False)[:-1] + ', "items": ' + items + '}'
+    return 'application/json; charset=utf-8', body.encode('utf-8'), {}
+
+def api_aggregate(df, filtered_df, params):
+    """Quantidade e Valor Estimado total por coluna de agrupamento"""
+    by = params.get('by', 'unidade')
+    if by not in available_columns(filtered_df):
+        raise ApiError(400, f"Coluna de agrupamento inexistente: {by}")
+    
+    grouped = filtered_df.groupby(get_column(filtered_df, by), dropna=True)
+    aggregate = grouped.size().rename('quantidade').to_frame()
+    if 'Valor Estimado' in filtered_df.columns:
+        aggregate['valor_total'] = grouped['Valor Estimado'].sum()
+    aggregate = aggregate.sort_values('quantidade', ascending=False).reset_index()
+    
+    meta = {'dataset_version': get_dataset_version(df), 'total': len(filtered_df), 'by': by}
+    items = aggregate.to_json(orient='records', date_format='iso', force_ascii=False)
+    body = json.dumps(meta, ensure_ascii=False)[:-1] + ', "groups": ' + items + '}'
+    return 'application/json; charset=utf-8', body.encode('utf-8'), {}
+
+def parse_export_params(params):
+    """Formato e compressão pedidos na rota /export (ApiError se inválidos)"""
+    export_format = params.get('format', 'CSV').upper()
+    if export_format not in export_formats():
+        raise ApiError(400, f"Formato inválido. Opções: {', '.join(export_formats())}")
+    compression = params.get('compression', 'zstd').lower()
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ApiError(400, f"Compressão inválida. Opções: {', '.join(EXPORT_COMPRESSIONS)}")
+    return export_format, compression
+
+def api_export(filtered_df, params):
+    """Arquivo de exportação dos editais filtrados"""
+    export_format, compression = parse_export_params(params)
+    
+    columns = [col for col in params.get('columns', '').split(',') if col in available_columns(filtered_df)]
+    export_data = with_columns(filtered_df, columns or available_columns(filtered_df))
+    extension, mime = EXPORT_FORMATS[export_format]
+    headers = {'Content-Disposition': f'attachment; filename="editais_filtrados.{extension}"'}
+    return mime, serialize_export(export_data, export_format, compression), headers
+
+def api_quality(report, dataset_version):
+    """Relatório de qualidade da carga da versão atual"""
+    if report is None:
+        raise ApiError(404, "Relatório de qualidade indisponível para esta versão")
+    body = json.dumps(dict(report.as_dict(), dataset_version=dataset_version), ensure_ascii=False)
+    return 'application/json; charset=utf-8', body.encode('utf-8'), {}
+
+def handle_backend_api_request(backend, path, query):
+    """Mesmas rotas de handle_api_request, resolvidas pelo backend DuckDB"""
+    if path == '/health':
+        body = json.dumps({'dataset_version': backend.dataset_version, 'rows': backend.n_rows, 'backend': 'duckdb'})
+        return 'application/json; charset=utf-8', body.encode('utf-8'), {}
+    
+    if path == '/qualidade':
+        return api_quality(backend.quality, backend.dataset_version)
+    
+    if path not in ('/editais', '/aggregate', '/export'):
+        raise ApiError(404, "Rota inexistente. Use /editais, /aggregate, /export, /qualidade ou /health")
+    
+    search_params, filters, params = parse_api_query(query)
+    missing = [column for column in filters if column not in backend.columns]
+    if missing:
+        raise ApiError(400, f"Filtro indisponível nesta base: {', '.join(missing)}")
+    unsupported = backend.unsupported_regex_terms(search_params)
+    if unsupported:
+        raise ApiError(400, f"Expressão não suportada pelo backend DuckDB (RE2): {', '.join(unsupported)}")
+    where = backend.where_clause(search_params, filters)
+    version = backend.dataset_version
+    
+    if path == '/editais':
+        filter_key = make_filter_key(search_params, filters)
+        try:
+            limit = int(params.get('limit', API_DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(400, "Parâmetro 'limit' deve ser inteiro")
+        limit = min(max(limit, 1), API_MAX_PAGE_SIZE)
+        offset = decode_cursor(params['cursor'], version, filter_key) if params.get('cursor') else 0
+        
+        columns = [col for col in params.get('columns', '').split(',') if col]
+        unknown = [col for col in columns if col not in backend.columns]
+        if unknown:
+            raise ApiError(400, f"Colunas inexistentes: {', '.join(unknown)}")
+        
+        total = backend.count(where)
+        page_df = backend.fetch(columns or backend.columns, where, limit, offset)
+        next_offset = offset + limit
+        meta = {
+            'dataset_version': version,
+            'total': total,
+            'next_cursor': encode_cursor(version, filter_key, next_offset) if next_offset < total else None,
+        }
+        items = page_df.to_json(orient='records', date_format='iso', force_ascii=False)
+        body = json.dumps(meta, ensure_ascii=False)[:-1] + ', "items": ' + items + '}'
+        return 'application/json; charset=utf-8', body.encode('utf-8'), {}
+    
+    if path == '/aggregate':
+        by = params.get('by', 'unidade')
+        if by not in backend.columns:
+            raise ApiError(400, f"Coluna de agrupamento inexistente: {by}")
+        aggregate = backend.aggregate(where, by)
+        meta = {'dataset_version': version, 'total': backend.count(where), 'by': by}
+        items = aggregate.to_json(orient='records', date_format='iso', force_ascii=False)
+        body = json.dumps(meta, ensure_ascii=False)[:-1] + ', "groups": ' + items + '}'
+        return 'application/json; charset=utf-8', body.encode('utf-8'), {}
+    
+    export_format, compression = parse_export_params(params)
+    columns = [col for col in params.get('columns', '').split(',') if col in backend.columns]
+    extension, mime = EXPORT_FORMATS[export_format]
+    headers = {'Content-Disposition': f'attachment; filename="editais_filtrados.{extension}"'}
+    return mime, backend.export(columns or backend.columns, where, export_format, compression=compression), headers
+
+def handle_api_request(df, path, query):
+    """Resolve uma requisição da API: retorna (content_type, corpo, cabeçalhos extras)"""
+    if isinstance(df, ParquetBackend):
+        return handle_backend_api_request(df, path, query)
+    
+    if path == '/health':
+        body = json.dumps({'dataset_version': get_dataset_version(df), 'rows': len(df)})
+        return 'application/json; charset=utf-8', body.encode('utf-8'), {}
+    
+    if path == '/qualidade':
+        return api_quality(df.attrs.get(QUALITY_ATTR), get_dataset_version(df))
+    
+    if path not in ('/editais', '/aggregate', '/export'):
+        raise ApiError(404, "Rota inexistente. Use /editais, /aggregate, /export, /qualidade ou /health")
+    
+    search_params, filters, params = parse_api_query(query)
+    missing = [column for column in filters if column not in df.columns]
+    if missing:
+        raise ApiError(400, f"Filtro indisponível nesta base: {', '.join(missing)}")
+    filtered_df = query_filtered_data(df, search_params, filters)
+    
+    if path == '/editais':
+        return api_list_editais(df, filtered_df, search_params, filters, params)
+    if path == '/aggregate':
+        return api_aggregate(df, filtered_df, params)
+    return api_export(filtered_df, params)
+
+class QueryApiHandler(BaseHTTPRequestHandler):
+    """Handler HTTP da API local (GET com ETag, gzip e coalescência)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        accepts_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        try:
+            if get_backend_name() == 'duckdb':
+                df, error = load_parquet_backend()
+            else:
+                df, error = load_data_from_sharepoint()
+            if error:
+                raise ApiError(503, error)
+            
+            version = df.dataset_version if isinstance(df, ParquetBackend) else get_dataset_version(df)
+            etag = make_api_etag(version, url.path, url.query)
+            # O cliente revalida com a ETag da representação que recebeu
+            # (comprimida ou não); '*' casa com qualquer uma
+            candidates = [gzip_etag(etag), etag] if accepts_gzip else [etag]
+            client_tags = parse_if_none_match(self.headers.get('If-None-Match'))
+            matched = next((tag for tag in candidates if '*' in client_tags or tag in client_tags), None)
+            if matched:
+                self.send_response(304)
+                self.send_header('ETag', matched)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            
+            # Requisições idênticas simultâneas compartilham a mesma resposta
+            content_type, body, extra_headers = get_single_flight().do(
+                ('api', etag),
+                lambda: handle_api_request(df, url.path, url.query)
+            )
+            status = 200
+        except ApiError as exc:
+            status, etag, extra_headers = exc.status, None, {}
+            content_type = 'application/json; charset=utf-8'
+            body = json.dumps({'error': exc.message}, ensure_ascii=False).encode('utf-8')
+        except Exception as exc:
+            status, etag, extra_headers = 500, None, {}
+            content_type = 'application/json; charset=utf-8'
+            body = json.dumps({'error': f"Erro inesperado: {str(exc)}"}, ensure_ascii=False).encode('utf-8')
+        
+        if len(body) >= API_GZIP_MIN_BYTES and accepts_gzip:
+            body = gzip.compress(body, compresslevel=5)
+            extra_headers = dict(extra_headers, **{'Content-Encoding': 'gzip'})
+            etag = etag and gzip_etag(etag)
+        
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@st.cache_resource
+def start_query_api(host, port):
+    """Inicia a API local em uma thread de fundo (uma vez por processo)"""
+    server = ThreadingHTTPServer((host, port), QueryApiHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='editais-api', daemon=True).start()
+    return server
+
+def show_help_tab():
+    """Mostra a aba de ajuda e instruções"""
+    st.markdown("""
+    # 📚 Como Usar o Projeto Predição de Editais - CIC2025
+    
+    ## 🚀 Início Rápido
+    
+    ### 1. Escopo da Base de Dados
+    - **52.429 editais** analisados e classificados
+    - **R$ 244 bilhões** em valor total estimado
+    - **729 coordenadorias/unidades** organizacionais mapeadas
+    - **14 categorias originais** + **2 novas categorias** criadas
+    - Sistema carrega amostras para consulta interativa
+    
+    ### 2. Dados Automáticos
+    - Os dados são carregados automaticamente do SharePoint TCERJ
+    - Sistema atualiza a cada 5 minutos para manter dados frescos
+    - Não é necessário fazer upload manual (se configurado corretamente)
+    
+    ### 3. Navegação
+    O sistema possui **3 abas principais**:
+    - **📊 Análise de Dados**: Visualização principal com filtros e tabelas
+    - **📈 Dashboard**: Gráficos e estatísticas detalhadas
+    - **📚 Ajuda**: Esta seção com instruções
+    
+    ## 🔍 Funcionalidades de Pesquisa Avançada
+    
+    ### Busca Avançada com Operadores Lógicos
+    A seção "🔍 Busca Avançada" permite diferentes tipos de filtros com **duas modalidades de busca**:
+    
+    #### 🔤 **Modalidades de Busca:**
+    
+    **1. Busca por Frase Completa (SEM ponto e vírgula)**
+    - Digite termos **sem ponto e vírgula (;)** para buscar a frase exata
+    - **Exemplo**: "bens permanentes" → encontra registros que contenham exatamente esta sequência
+    - **Exemplo**: "material de escritório" → busca esta frase completa
+    - **Uso**: Ideal para termos compostos que devem aparecer juntos
+    
+    **2. Busca por Termos Separados (COM ponto e vírgula)**
+    - Use **ponto e vírgula (;)** para separar termos que podem aparecer em qualquer lugar
+    - **Exemplo**: "bens; permanentes" → encontra registros que contenham "bens" E "permanentes" separadamente
+    - **Exemplo**: "material; escritório" → busca por ambos os termos em qualquer posição
+    - **Uso**: Ideal para buscar conceitos relacionados que podem estar em partes diferentes do texto
+    
+    #### 📝 **Tipos de Filtros:**
+    
+    #### 1. **Contém TODOS os termos (E)**
+    - **Frase**: "educação infantil" → registros com esta frase exata
+    - **Termos**: "educação; construção" → registros que contenham **tanto** "educação" **quanto** "construção"
+    - **Uso prático**: Encontrar editais que atendam múltiplos critérios simultaneamente
+    
+    #### 2. **Contém ALGUM termo (OU)**
+    - **Frase**: "centro de saúde" → registros com esta frase específica
+    - **Termos**: "hospital; posto; upa" → registros com **qualquer um** desses termos
+    - **Uso prático**: Buscar variações de um mesmo conceito
+    
+    #### 3. **NÃO contém (Filtro Negativo)**
+    - **Frase**: "serviços terceirizados" → exclui registros com esta frase exata
+    - **Termos**: "consultoria; terceirizado" → exclui registros com qualquer um desses termos
+    - **Uso prático**: Refinar resultados removendo categorias indesejadas
+    
+    #### 🧩 **Modos de Busca: Curinga e Expressão Regular**
+    - **Texto** (padrão): os termos são buscados literalmente, como descrito acima
+    - **Curinga**: `*` representa qualquer sequência e `?` um único caractere
+      - **Exemplo**: "manuten*" → manutenção, manutenções, manutenir...
+    - **Expressão regular**: cada termo é uma regex (maiúsculas e minúsculas são equivalentes)
+      - **Exemplo**: "pregão (eletrônico|presencial)"
+    - O ponto e vírgula (;) continua separando termos em todos os modos
+    - Expressões inválidas são tratadas como texto literal
+    
+    #### 💡 **Sugestões de Termos**
+    - Depois de digitar (e confirmar com Enter), o último termo de cada campo ganha sugestões
+    - As sugestões vêm das palavras do objeto, dos termos e das observações, e dos nomes das unidades
+    - Maiúsculas e acentos são ignorados: "licitacao" sugere "licitação"
+    - O número entre parênteses é a quantidade de editais com o termo; clique para completar
+    
+    ## 📂 Filtro "Nova Predição" com Busca por Containment
+    
+    ### Funcionalidade Especial para Categorias
+    O filtro "📂 Nova Predição" utiliza **busca por containment** (contém):
+    
+    #### Como Funciona
+    - **Busca Parcial**: Não precisa coincidir exatamente - funciona com ocorrências parciais
+    - **Categoria Única**: Se um edital tem apenas "EDUCAÇÃO", será encontrado ao selecionar "EDUCAÇÃO"
+    - **Categorias Múltiplas**: Se um edital tem "EDUCAÇÃO; SAÚDE", será encontrado ao selecionar **qualquer uma** das categorias
+    - **Aplicação Sequencial**: Os filtros são aplicados um após o outro, mantendo a consistência
+    
+    #### Exemplos Práticos
+    - **Selecionando "EDUCAÇÃO"** encontra:
+      - ✅ Editais com classificação: "EDUCAÇÃO"
+      - ✅ Editais com classificação: "EDUCAÇÃO; SAÚDE"
+      - ✅ Editais com classificação: "INFRAESTRUTURA; EDUCAÇÃO; TRANSPORTE"
+    
+    ## 🔄 Sistema de Filtros Corrigido
+    
+    ### Aplicação Sequencial
+    - **Múltiplas aplicações**: Os filtros agora podem ser aplicados múltiplas vezes
+    - **Ordem de aplicação**: Busca avançada primeiro, depois filtros específicos
+    - **Consistência**: Cada filtro mantém o estado anterior
+    - **Reset de índices**: Cada etapa reseta os índices para evitar erros
+    
+    ### Filtros Disponíveis
+    1. **Nova Predição**: Busca por containment (contém)
+    2. **Predição Antiga**: Busca exata
+    3. **Ano**: Busca exata
+    4. **Unidade**: Busca exata (digite parte do nome em "Filtrar unidades" para reduzir a lista)
+    5. **Data de realização**: Faixa de datas (inclusiva)
+    6. **Valor Estimado**: Faixa de valores, com marcas nos percentis da base
+    
+    ## 📥 Sistema de Exportação Aprimorado
+    
+    ### Localização e Funcionalidade
+    - **Posicionamento**: Botão azul no **lado inferior direito** da tabela
+    - **Exportação Automática**: Clique único inicia o download automaticamente
+    - **Sem Confirmações**: Processo otimizado sem etapas extras
+    
+    ### Opções de Formato
+    - **CSV**: Formato universal para análise em Excel, Python, R
+    - **XLSX**: Formato Excel nativo com formatação preservada
+    - **PARQUET / FEATHER / ARROW**: Formatos colunares para Python, R e DuckDB - preservam os tipos (datas, valores) e são os mais rápidos de gerar e de ler; compressão zstd (menor arquivo) ou lz4 (mais rápida)
+    
+    ### Dados Exportados
+    - **Apenas dados filtrados** são exportados (respeita todos os filtros aplicados)
+    - **Colunas selecionadas** na interface são mantidas na exportação
+    - **Formatação preservada** para valores monetários e datas
+    - **Nome automático** com timestamp: `editais_filtrados_YYYYMMDD_HHMMSS`
+    - **Geração em segundo plano**: uma barra mostra o progresso e o app continua respondendo; exportar de novo a mesma seleção reaproveita o arquivo pronto
+    
+    ## 💡 Dicas de Uso Avançado
+    
+    ### Para Gestores CIC
+    1. **Análise Comparativa**: Use filtros de containment para categorias complexas
+    2. **Busca Estratégica**: Combine operadores E/OU para análises precisas
+    3. **Exportação Seletiva**: Filtre dados específicos antes de exportar
+    4. **Monitoramento**: Use filtros negativos para excluir categorias não relevantes
+    
+    ### Para Analistas
+    1. **Pesquisa Complexa**: Combine múltiplos operadores para análises detalhadas
+    2. **Validação de Dados**: Use exportação para validação externa
+    3. **Análise Temporal**: Combine filtros de ano com categorias específicas
+    4. **Comparação Metodológica**: Explore divergências entre predições na seção "🤝 Concordância entre Modelos" do Dashboard - escolha a referência (ex.: Predição CIC) e o modelo comparado para ver a matriz de confusão, a precisão/revocação por categoria e os editais em que divergem
+    
+    ### Fluxo de Trabalho Recomendado
+    1. **Definir Objetivo**: O que você quer analisar?
+    2. **Aplicar Filtros Básicos**: Unidade, ano, modalidade
+    3. **Refinar com Busca Avançada**: Use operadores lógicos
+    4. **Aplicar Filtro de Predição**: Use containment para categorias
+    5. **Validar Resultados**: Verifique se os dados fazem sentido
+    6. **Exportar para Análise**: Use formato apropriado (CSV/XLSX)
+    
+    ## 🔧 Solução de Problemas
+    
+    ### Busca Avançada
+    - **Sem resultados**: Verifique se os operadores estão corretos
+    - **Muitos resultados**: Use filtros negativos para refinar
+    - **Termos não encontrados**: Verifique ortografia e use sinônimos
+    
+    ### Filtros de Predição
+    - **Categoria não aparece**: Verificar se existe na base de dados
+    - **Resultados inesperados**: Lembrar que busca é por containment (contém)
+    - **Filtros não aplicam**: Verificar se há dados para filtrar
+    
+    ### Exportação
+    - **Download não inicia**: Aguardar processamento e tentar novamente
+    - **Arquivo muito grande**: Aplicar mais filtros para reduzir volume
+    - **Problemas de formatação**: Preferir XLSX para manter formatação
+    
+    ---
+    
+    > 💼 **Projeto Predição de Editais - CIC2025 | TCERJ**  
+    > **🔍 Novidades:** Busca Avançada | Filtros Containment | Aplicação Sequencial  
+    > Coordenadoria de Informações Estratégicas
+    """)
+
+def main():
+    """Função principal da aplicação"""
+    
+    # Header principal
+    st.markdown("""
+    <div class="main-header">
+        <div style="display: flex; justify-content: space-between; align-items: center;">
+            <div>
+                <h1>📊 Projeto Predição de Editais - CIC2025</h1>
+                <p style="color: #e2e8f0; margin: 0.5rem 0 0 0;">
+                    Ferramenta de Consulta de Editais - Versão Avançada (Corrigida)
+                </p>
+            </div>
+            <div style="margin-left: 2rem;">
+                <img src="https://tcerj365-my.sharepoint.com/:i:/g/personal/emanuellipc_tcerj_tc_br/EU_4T9vkz1BEmtF4qGFPdekB71dUQ1f_isaIoampssa5WQ?e=33qdcT" 
+                     alt="CIC TCERJ Logo" 
+                     style="height: 80px; width: auto; max-width: 150px; object-fit: contain;"
+                     onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
+                <!-- Fallback caso a imagem não carregue -->
+                <div style="width: 120px; height: 80px; background: rgba(255,255,255,0.1); border-radius: 8px; display: none; align-items: center; justify-content: center; color: white; font-size: 0.8rem;">
+                    LOGO<br>CIC TCERJ
+                </div>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Estatísticas gerais da base completa
+    st.markdown("""
+    <div class="alert-info">
+        <h4>📈 Escopo da Base de Dados Completa</h4>
+        <div style="display: flex; justify-content: space-around; text-align: center; margin: 1rem 0;">
+            <div>
+                <strong style="font-size: 1.5rem; color: #1e40af;">52.429</strong><br>
+                <span style="color: #64748b;">Editais Analisados</span>
+            </div>
+            <div>
+                <strong style="font-size: 1.5rem; color: #1e40af;">R$ 244 Bilhões</strong><br>
+                <span style="color: #64748b;">Valor Total Estimado</span>
+            </div>
+            <div>
+                <strong style="font-size: 1.5rem; color: #1e40af;">729</strong><br>
+                <span style="color: #64748b;">Unidades Mapeadas</span>
+            </div>
+            <div>
+                <strong style="font-size: 1.5rem; color: #1e40af;">14</strong><br>
+                <span style="color: #64748b;">Categorias</span>
+            </div>
+            <div>
+                <strong style="font-size: 1.5rem; color: #1e40af;">2</strong><br>
+                <span style="color: #64748b;">Novas Categorias</span>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Carregamento dos dados do SharePoint (em memória ou Parquet + DuckDB)
+    with st.spinner("🔄 Carregando dados do SharePoint TCERJ..."):
+        df, backend = None, None
+        if get_backend_name() == 'duckdb':
+            backend, error = load_parquet_backend()
+        else:
+            df, error = load_data_from_sharepoint()
+        
+        # Add reload button
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            if st.button("🔄 Recarregar Dados"):
+                # Uma única recarga, mesmo com várias sessões clicando juntas
+                # O cache é limpo antes da carga: o pré-aquecimento disparado por ela fica
+                loader = get_backend_loader() if backend is not None else get_dataset_loader()
+                get_cache_manager().clear()
+                loader.refresh()
+                st.rerun()
+        
+        with col2:
+            st.markdown("*Atualização automática a cada 5min*")
+
+    # Show connection status in sidebar
+    st.sidebar.markdown("### 🔗 Status da Conexão")
+    st.sidebar.markdown(f"**URL da Planilha:** [Link TCERJ]({SHAREPOINT_URL})")
+    loader_stats = (get_backend_loader() if get_backend_name() == 'duckdb' else get_dataset_loader()).snapshot()
+    st.sidebar.caption(
+        f"Carregamento: {loader_stats['hits']} acertos · {loader_stats['misses']} cargas · "
+        f"{loader_stats['waits']} esperas · {loader_stats['stale']} versões anteriores servidas"
+        + (" · 🔄 atualizando" if loader_stats['refreshing'] else "")
+        + (f" · última carga {loader_stats['last_load_seconds']:.1f}s" if loader_stats['last_load_seconds'] is not None else "")
+    )
+
+    # Cache central: a versão atual é definida pelos carregadores (publish_dataset_version)
+    cache_manager = get_cache_manager()
+    if backend is None and df is not None:
+        cache_manager.record_dataset('dados', get_dataset_version(df), lambda: estimate_nbytes(df) + estimate_nbytes(df.attrs.get('lazy_columns')))
+    cache_stats = cache_manager.snapshot()
+    st.sidebar.caption(
+        f"Cache: {format_bytes(cache_stats['bytes'])} de {format_bytes(cache_stats['budget_bytes'])} · "
+        f"{cache_stats['entries']} itens · {cache_stats['hits']} acertos · {cache_stats['misses']} faltas · "
+        f"{cache_stats['evictions']} remoções · {cache_stats['invalidations']} invalidações"
+        + (f" · dados {format_bytes(cache_stats['dataset_bytes'])}" if cache_stats['dataset_bytes'] else "")
+    )
+    query_log = get_query_log()
+    if query_log is not None:
+        prewarming, last_prewarm = query_log.prewarm_snapshot()
+        st.sidebar.caption(
+            f"Consultas: {query_log.count():,} registradas"
+            + (" · 🔥 pré-aquecendo" if prewarming else "")
+            + (f" · {last_prewarm['queries']} pré-aquecidas em {last_prewarm['seconds']:.1f}s" if last_prewarm else "")
+        )
+    export_stats = get_export_queue().snapshot()
+    st.sidebar.caption(
+        f"Exportações: {export_stats['submitted']:,} geradas · {export_stats['reused']:,} reaproveitadas"
+        + (f" · ⏳ {export_stats['running']} em andamento" if export_stats['running'] else "")
+    )
+
+    # Qualidade da carga da versão atual (linhas descartadas, conversões, quarentena)
+    if backend is not None and backend.quality is not None:
+        show_quality_report(backend.quality, backend.dataset_version)
+    elif df is not None and QUALITY_ATTR in df.attrs:
+        show_quality_report(df.attrs[QUALITY_ATTR], get_dataset_version(df))
+
+    # Se houve erro, mostrar diagnóstico
+    if error:
+        st.error(f"❌ {error}")
+        
+        # Instruções específicas baseadas no tipo de erro
+        if "conexão" in error.lower() or "timeout" in error.lower():
+            st.markdown("""
+            <div class="alert-warning">
+                <h4>🌐 Problema de Conectividade</h4>
+                <p><strong>Soluções alternativas:</strong></p>
+                <ul>
+                    <li>Mude para "📄 Upload de Arquivo CSV" acima</li>
+                    <li>Baixe a planilha como CSV e faça upload manual</li>
+                    <li>Verifique sua conexão com a internet</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
+            
+        elif "permission" in error.lower() or "403" in error.lower() or "autenticação" in error.lower():
+            st.markdown("""
+            <div class="alert-warning">
+                <h4>🔒 Problema de Permissão do SharePoint TCERJ</h4>
+                <p><strong>O SharePoint corporativo requer configurações especiais:</strong></p>
+                <h5>Opção 1: Configurar Acesso Público (Recomendado)</h5>
+                <ol>
+                    <li>Abra a planilha no SharePoint</li>
+                    <li>Clique em "Compartilhar" no canto superior direito</li>
+                    <li>Clique em "Qualquer pessoa com o link pode visualizar"</li>
+                    <li>Defina permissão como "Visualizar" apenas</li>
+                    <li>Copie o novo link público gerado</li>
+                    <li>Atualize o código com o novo link</li>
+                </ol>
+                <h5>Opção 2: Usar Upload Manual</h5>
+                <ol>
+                    <li>Baixe a planilha como Excel (.xlsx)</li>
+                    <li>Abra no Excel e salve como CSV (UTF-8)</li>
+                    <li>Use a opção "📄 Upload de Arquivo CSV" acima</li>
+                </ol>
+                <h5>Opção 3: Exportar para Serviço Público</h5>
+                <ul>
+                    <li>Exporte para Google Sheets público</li>
+                    <li>Ou coloque o arquivo em repositório GitHub</li>
+                    <li>Use um desses serviços no lugar do SharePoint corporativo</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
+            
+        else:
+            st.markdown("""
+            <div class="alert-warning">
+                <h4>⚠️ Problema de Formatação dos Dados</h4>
+                <p><strong>Soluções recomendadas:</strong></p>
+                <ol>
+                    <li><strong>Limpar dados no Google Sheets:</strong>
+                        <ul>
+                            <li>Abra a planilha original</li>
+                            <li>Selecione todos os dados (Ctrl+A)</li>
+                            <li>Copie para uma nova planilha</li>
+                            <li>Use "Colar especial" → "Valores apenas"</li>
+                            <li>Baixe como CSV e faça upload aqui</li>
+                        </ul>
+                    </li>
+                    <li><strong>Usar Excel para limpeza:</strong>
+                        <ul>
+                            <li>Abra o arquivo no Excel</li>
+                            <li>Use "Localizar e Substituir" para remover caracteres estranhos</li>
+                            <li>Salve como CSV (UTF-8)</li>
+                        </ul>
+                    </li>
+                    <li><strong>Hospedagem alternativa:</strong>
+                        <ul>
+                            <li>Coloque o CSV limpo no GitHub</li>
+                            <li>Use a URL raw no código</li>
+                        </ul>
+                    </li>
+                </ol>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        return
+    
+    # Se os dados foram carregados com sucesso
+    if backend is not None or (df is not None and len(df) > 0):
+        st.markdown(f"""
+        <div class="alert-success">
+            ✅ <strong>Dados carregados com sucesso!</strong><br>
+            📋 52.429 editais encontrados | 8.574 editais em mais de uma categoria (16,35%) | 43.855 editais em apenas uma categoria (83,65%) | 🕐 {datetime.now().strftime('%H:%M:%S')}
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Conversões de tipos, renomeações e deduplicação já são feitas (e
+        # cacheadas) em load_data_from_sharepoint - o df aqui é somente leitura
+        
+        # Informações dos dados na sidebar
+        st.sidebar.markdown("### 📊 Informações dos Dados")
+        
+        # Status da conexão com ícone verde - simplificado sem verificação de data_source
+        st.sidebar.markdown("**Fonte:** 🔗 SharePoint TCERJ (Automático) 🟢")
+        if backend is not None:
+            st.sidebar.markdown(f"**Backend:** 🦆 DuckDB/Parquet ({backend.n_rows:,} linhas em disco)")
+        
+        # Colunas disponíveis (DataFrame em memória ou Parquet)
+        columns = backend.columns if backend is not None else list(df.columns)
+        # Inclui as colunas de texto compactadas (carregadas sob demanda)
+        text_columns = backend.columns if backend is not None else available_columns(df)
+        # Versão dos dados e leitura da base completa (índices construídos uma vez por versão)
+        if backend is not None:
+            dataset_version = backend.dataset_version
+            load_rows = lambda row_columns: backend.fetch(row_columns, ('true', []))
+        else:
+            dataset_version = get_dataset_version(df)
+            load_rows = lambda row_columns: with_columns(df, row_columns)
+
+        # API local opcional - compartilha os dados e caches desta instância
+        api_port = os.environ.get(API_PORT_ENV)
+        if api_port:
+            try:
+                start_query_api(API_HOST, int(api_port))
+                st.sidebar.markdown(f"**API local:** `http://{API_HOST}:{api_port}/editais`")
+            except (OSError, ValueError) as e:
+                st.sidebar.warning(f"⚠️ API local indisponível: {str(e)}")
+
+        # Informações estatísticas fixas da base completa
+        st.sidebar.markdown("**Total de Editais:** 52.429")
+        st.sidebar.markdown("**Total de Categorias:** 14") 
+        st.sidebar.markdown("**Total Estimado:** R$ 244 bilhões")
+        
+        # **SEÇÃO DE BUSCA AVANÇADA**
+        st.sidebar.markdown("### 🔍 Busca Avançada")
+
+        with st.sidebar.expander("🔎 Filtros de Texto Avançados", expanded=False):
+            search_params = {}
+            
+            # Initialize session state keys if they don't exist
+            if "limpar_filtros_texto" not in st.session_state:
+                st.session_state["limpar_filtros_texto"] = False
+            if "search_and" not in st.session_state:
+                st.session_state["search_and"] = ""
+            if "search_or" not in st.session_state:
+                st.session_state["search_or"] = ""
+            if "search_not" not in st.session_state:
+                st.session_state["search_not"] = ""
+
+            # Check if reset flag is active and clear filters if needed
+            if st.session_state["limpar_filtros_texto"]:
+                st.session_state["search_and"] = ""
+                st.session_state["search_or"] = ""
+                st.session_state["search_not"] = ""
+                st.session_state["search_mode"] = "Texto"
+                st.session_state["limpar_filtros_texto"] = False
+                st.rerun()
+
+            # Reset button - must be before the input widgets
+            if st.button("🔄 Limpar Filtros de Texto", 
+                         use_container_width=True,
+                         help="Remove todos os filtros de texto aplicados"):
+                st.session_state["limpar_filtros_texto"] = True
+                st.rerun()
+            
+            # Modo de busca: texto literal, curinga ou expressão regular
+            search_mode = st.radio(
+                "🧩 Modo de busca",
+                options=list(SEARCH_MODES),
+                horizontal=True,
+                key="search_mode",
+                help="Curinga: * = qualquer sequência, ? = um caractere (ex.: manuten*). "
+                     "Expressão regular: ex.: pregão (eletrônico|presencial)"
+            )
+            if SEARCH_MODES[search_mode] != 'texto':
+                search_params['mode'] = SEARCH_MODES[search_mode]
+            
+            # Autocompletar do termo digitado (o índice só é montado depois da primeira busca)
+            autocomplete = None
+            if search_params.get('mode') != 'regex' and any(
+                st.session_state[key].strip() for key in ("search_and", "search_or", "search_not")
+            ):
+                autocomplete = get_autocomplete_index(
+                    dataset_version,
+                    tuple(col for col in AUTOCOMPLETE_TEXT_COLUMNS if col in text_columns),
+                    tuple(col for col in AUTOCOMPLETE_NAME_COLUMNS if col in text_columns),
+                    load_rows
+                )
+            
+            # Now create the input widgets
+            search_params['contains_and'] = st.text_input(
+                "🔗 Deve conter TODOS os termos (E)",
+                placeholder="frase completa OU termo1; termo2; termo3",
+                help="SEM ';' = busca frase completa. COM ';' = todos os termos devem estar presentes",
+                key="search_and"
+            )
+            if autocomplete is not None:
+                show_search_suggestions(autocomplete, "search_and")
+            
+            search_params['contains_or'] = st.text_input(
+                "🔀 Deve conter ALGUM termo (OU)",
+                placeholder="frase completa OU termo1; termo2; termo3",
+                help="SEM ';' = busca frase completa. COM ';' = pelo menos um termo deve estar presente",
+                key="search_or"
+            )
+            if autocomplete is not None:
+                show_search_suggestions(autocomplete, "search_or")
+            
+            search_params['not_contains'] = st.text_input(
+                "❌ NÃO deve conter",
+                placeholder="frase completa OU termo1; termo2",
+                help="SEM ';' = exclui frase completa. COM ';' = exclui qualquer um dos termos",
+                key="search_not"
+            )
+            if autocomplete is not None:
+                show_search_suggestions(autocomplete, "search_not")
+
+            # Exemplos e indicador de filtros ativos permanecem os mesmos
+            st.markdown("""
+            **💡 Exemplos:**
+            - **FRASE**: "bens permanentes" → busca exata
+            - **TERMOS**: "bens; permanentes" → ambos separados
+            - **NEGATIVO**: "consultoria; terceirizado" → exclui ambos
+            - **CURINGA**: "manuten*" → manutenção, manutenções...
+            - **REGEX**: "pregão (eletrônico|presencial)"
+            """)
+            
+            if search_params.get('mode') == 'regex':
+                invalid_terms = invalid_regex_terms(search_params)
+                if invalid_terms:
+                    st.warning(f"⚠️ Expressão inválida tratada como texto literal: {', '.join(invalid_terms)}")
+            if backend is not None:
+                # RE2 (DuckDB) não tem lookaround nem retrovisores: resultado difere do pandas
+                unsupported_terms = backend.unsupported_regex_terms(search_params)
+                if unsupported_terms:
+                    st.warning(
+                        "⚠️ Expressão não suportada pelo backend DuckDB (RE2), "
+                        f"buscada como texto literal: {', '.join(unsupported_terms)}"
+                    )
+    
+            # Indicador de filtros ativos
+            active_searches = [key for key in SEARCH_TEXT_KEYS if search_params.get(key, '').strip()]
+            if active_searches:
+                st.success(f"🔍 {len(active_searches)} filtro(s) de busca ativo(s)")
+            else:
+                st.info("🔍 Nenhum filtro de busca ativo")
+        
+        # **CRIAÇÃO DOS FILTROS ESPECÍFICOS**
+        st.sidebar.markdown("### 🎛️ Filtros Específicos")
+
+        filters = {}
+
+        # Nova Predição (primeiro filtro) - CORRIGIDO
+        nova_predicao = st.sidebar.selectbox(
+            "📂 Nova Predição (contém)",
+            options=['Todas'] + CLASSIFICACOES,
+            key='nova_predicao',
+            help="Busca por containment - encontra editais que CONTÊM a categoria selecionada"
+        )
+        if nova_predicao != 'Todas':
+            filters['Nova Predição'] = nova_predicao
+
+        # Predição Antiga
+        if 'Predição Antiga' in columns:
+            predicao_antiga = st.sidebar.selectbox(
+                "🔄 Predição Antiga",
+                options=['Todas'] + distinct_values(df, backend, 'Predição Antiga'),
+                key='predicao_antiga'
+            )
+            if predicao_antiga != 'Todas':
+                filters['Predição Antiga'] = predicao_antiga
+
+        # Ano (no backend DuckDB é a coluna de partição: só a pasta do ano é lida)
+        if 'ano' in columns:
+            ano = st.sidebar.selectbox(
+                "📅 Ano",
+                options=['Todos'] + [str(int(ano)) for ano in distinct_values(df, backend, 'ano')],
+                key='ano'
+            )
+            if ano != 'Todos':
+                filters['ano'] = ano
+
+        # Unidade
+        if 'unidade' in columns:
+            # O trecho digitado (sem acentos, início de qualquer palavra) reduz a lista
+            unidade_typed = st.sidebar.text_input(
+                "🔎 Filtrar unidades",
+                placeholder="ex.: cidade, saude",
+                key='unidade_busca'
+            )
+            unidades = unidade_options(
+                get_name_autocomplete_index(dataset_version, 'unidade', load_rows),
+                distinct_values(df, backend, 'unidade'),
+                unidade_typed,
+                st.session_state.get('unidade')
+            )
+            unidade = st.sidebar.selectbox(
+                "🏢 Unidade",
+                options=unidades,
+                key='unidade'
+            )
+            if unidade != 'Todas':
+                filters['unidade'] = unidade
+        
+        # Faixas de data e valor - resolvidas por índices ordenados (O(log n) por
+        # ajuste) ou, no backend DuckDB, pelas estatísticas do Parquet
+        if 'data realizacao licitacao' in columns:
+            min_date, max_date = range_bounds(df, backend, 'data realizacao licitacao')
+            if min_date is not None:
+                min_date, max_date = pd.Timestamp(min_date).date(), pd.Timestamp(max_date).date()
+                if min_date < max_date:
+                    date_range = st.sidebar.slider(
+                        "📆 Data de realização",
+                        min_value=min_date,
+                        max_value=max_date,
+                        value=(min_date, max_date),
+                        format="DD/MM/YYYY",
+                        key='faixa_data'
+                    )
+                    if date_range != (min_date, max_date):
+                        # Fim do dia inclusivo
+                        filters['data realizacao licitacao'] = (
+                            pd.Timestamp(date_range[0]),
+                            pd.Timestamp(date_range[1]) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+                        )
+        
+        if 'Valor Estimado' in columns:
+            if backend is not None:
+                value_steps = backend.value_steps('Valor Estimado')
+            else:
+                value_steps = value_slider_steps(get_sorted_index(get_dataset_version(df), 'Valor Estimado', df))
+            if len(value_steps) > 1:
+                value_range = st.sidebar.select_slider(
+                    "💰 Valor Estimado",
+                    options=value_steps,
+                    value=(value_steps[0], value_steps[-1]),
+                    format_func=format_brl,
+                    key='faixa_valor',
+                    help="Marcas distribuídas pelos percentis dos valores"
+                )
+                if value_range != (value_steps[0], value_steps[-1]):
+                    filters['Valor Estimado'] = tuple(value_range)
+        
+        if OUTLIER_SCORE_COLUMN in columns:
+            outlier_option = st.sidebar.selectbox(
+                "🚨 Valor atípico",
+                list(OUTLIER_FILTER_OPTIONS),
+                key='filtro_atipico',
+                help=f"Valor Estimado fora do padrão da unidade, categoria e ano (|escore| ≥ {OUTLIER_THRESHOLD})"
+            )
+            if outlier_option != 'Todos':
+                filters[OUTLIER_SCORE_COLUMN] = OUTLIER_FILTER_OPTIONS[outlier_option]
+        
+        # Indicador de filtros específicos ativos
+        active_specific_filters = []
+        if nova_predicao != 'Todas':
+            active_specific_filters.append("Nova Predição")
+        if 'Predição Antiga' in columns and predicao_antiga != 'Todas':
+            active_specific_filters.append("Predição Antiga")
+        if 'ano' in columns and ano != 'Todos':
+            active_specific_filters.append("Ano")
+        if 'unidade' in columns and unidade != 'Todas':
+            active_specific_filters.append("Unidade")
+        if 'data realizacao licitacao' in filters:
+            active_specific_filters.append("Data")
+        if 'Valor Estimado' in filters:
+            active_specific_filters.append("Valor")
+        if OUTLIER_SCORE_COLUMN in filters:
+            active_specific_filters.append("Atípicos")
+        
+        if active_specific_filters:
+            st.sidebar.success(f"🎛️ {len(active_specific_filters)} filtro(s) específico(s) ativo(s)")
+        else:
+            st.sidebar.info("🎛️ Nenhum filtro específico ativo")
+        
+        # Latência da consulta (filtros e contagens) para o log de consultas
+        query_started = time.perf_counter()
+        if backend is not None:
+            # Backend DuckDB: contagens, páginas e agregados saem do Parquet
+            total_linhas, linhas_diferentes = get_backend_count(backend, search_params, filters)
+            where = backend.where_clause(search_params, filters)
+            cache_key = (backend.dataset_version, make_filter_key(search_params, filters))
+            
+            show_table = lambda: display_backend_table(backend, search_params, filters)
+            show_charts = lambda: render_chart_figures(
+                get_chart_figures(cache_key, lambda: backend.chart_data(where)),
+                show_temporal='ano' in columns
+            )
+            compute_stats = lambda: backend.classification_stats(where) if 'Nova Predição' in columns else None
+            compute_cooccurrence = lambda: backend.cooccurrence(where)
+            filtered_row_keys = lambda: backend.fetch([ROW_KEY_COLUMN], where)[ROW_KEY_COLUMN].to_numpy()
+            fetch_full_rows = lambda positions, result_columns: backend.fetch_positions(result_columns, positions)
+            compute_outliers = lambda: backend.outliers(where)
+        else:
+            # Aplicação dos filtros - reaproveitada enquanto busca/filtros não mudam
+            filtered_df = get_filtered_data(df, search_params, filters)
+            total_linhas = len(filtered_df)
+            linhas_diferentes = None
+            if 'Nova Predição' in filtered_df.columns and 'Predição Antiga' in filtered_df.columns:
+                linhas_diferentes = int(prediction_changes(filtered_df, df).sum())
+            
+            show_table = lambda: display_data_table(filtered_df, df, cache_key)
+            show_charts = lambda: create_charts(filtered_df, cache_key=cache_key)
+            compute_stats = lambda: classification_stats(df, filtered_df)
+            cache_key = (get_dataset_version(df), make_filter_key(search_params, filters))
+            compute_cooccurrence = lambda: filtered_cooccurrence(df, filtered_df)
+            filtered_row_keys = lambda: filtered_df[ROW_KEY_COLUMN].to_numpy()
+            fetch_full_rows = lambda positions, result_columns: with_columns(df.iloc[positions], result_columns)
+            compute_outliers = lambda: (
+                top_outliers(with_columns(filtered_df, [col for col in OUTLIER_TABLE_COLUMNS if col in text_columns])),
+                int((filtered_df[OUTLIER_SCORE_COLUMN] >= OUTLIER_THRESHOLD).sum()),
+                int((filtered_df[OUTLIER_SCORE_COLUMN] <= -OUTLIER_THRESHOLD).sum())
+            )
+        log_session_query(search_params, filters, time.perf_counter() - query_started)
+        
+        # Criação das abas após o processamento dos filtros. Com on_change="rerun"
+        # as abas guardam estado e só a aba visível é calculada (tab.open)
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(
+            ["📊 Análise de Dados", "📈 Dashboard", "🔑 Reclassificação", "🆕 Novidades", "📚 Ajuda"],
+            key="aba_principal",
+            on_change="rerun"
+        )
+        
+        with tab1:
+            if tab1.open is not False:
+                # Métricas de visão geral
+                st.markdown("### 📊 Dados Carregados para Análise")
+                create_overview_metrics(df)
+                
+                create_categorization_metrics(total_linhas, linhas_diferentes)
+            
+                if total_linhas == 0:
+                    st.warning("⚠️ Nenhum resultado encontrado com os filtros aplicados. Tente ajustar os critérios de busca.")
+                else:
+                    # Exibir informações dos filtros aplicados
+                    filter_info = build_filter_info(
+                        f"🔍 **Filtros aplicados** - Exibindo {total_linhas:,} de 52.429 editais",
+                        search_params, filters, show_filters=True
+                    )
+                    if filter_info:
+                        st.info(filter_info)
+                
+                    # Tabela de dados
+                    show_table()
+        
+        with tab2:
+            # Dashboard só é calculado quando a aba está visível
+            if tab2.open is not False:
+                st.markdown("### 📊 Dashboard Analítico")
+            
+                if total_linhas > 0:
+                    # Mostrar informação de filtros se aplicados
+                    filter_info = build_filter_info(
+                        f"🔍 **Visualizando dados filtrados** - {total_linhas:,} de 52.429 editais",
+                        search_params, filters, show_filters=False
+                    )
+                    if filter_info:
+                        st.info(filter_info)
+                
+                    # Métricas principais
+                    st.markdown("### 📊 Dados Filtrados para Análise")
+                    create_overview_metrics(df)
+                
+                    create_categorization_metrics(total_linhas, linhas_diferentes)
+                
+                    # Gráficos
+                    show_charts()
+                    
+                    # Coocorrência das categorias multi-rótulo
+                    if 'Nova Predição' in columns:
+                        show_cooccurrence(get_cooccurrence(cache_key, compute_cooccurrence))
+                    
+                    # Concordância entre Nova Predição, Predição Antiga, STI e CIC
+                    model_columns = prediction_columns(columns)
+                    if len(model_columns) >= 2:
+                        result_columns = [col for col in list(model_columns) + AGREEMENT_RESULT_COLUMNS if col in columns]
+                        show_prediction_agreement(
+                            lambda: get_prediction_agreement(dataset_version, model_columns, load_rows),
+                            filtered_row_keys,
+                            lambda positions: fetch_full_rows(positions, result_columns)
+                        )
+                    
+                    # Valores atípicos por unidade, categoria e ano
+                    if OUTLIER_SCORE_COLUMN in columns:
+                        source_columns = [col for col in OUTLIER_SOURCE_COLUMNS if col in columns]
+                        show_outliers(
+                            *compute_outliers(),
+                            lambda: get_outlier_stats(dataset_version, lambda: load_rows(source_columns))
+                        )
+                
+                    # Estatísticas adicionais
+                    stats = compute_stats()
+                    if stats is not None:
+                        st.markdown("### 📋 Análise Detalhada por Classificação")
+                        st.caption("Por categoria: um edital com mais de uma classificação entra na linha de cada uma delas.")
+                        st.dataframe(
+                            stats.sort_values('Quantidade', ascending=False),
+                            use_container_width=True
+                        )
+                else:
+                    st.warning("⚠️ Nenhum dado disponível para exibir no dashboard com os filtros aplicados.")
+        
+        with tab3:
+            if tab3.open is not False:
+                keyword_columns = [col for col in KEYWORD_TEXT_COLUMNS if col in text_columns]
+                if 'Nova Predição' in columns and keyword_columns:
+                    result_columns = [col for col in ['unidade', 'objeto', 'Valor Estimado'] if col in columns]
+                    show_keyword_reclassification(
+                        dataset_version,
+                        keyword_columns,
+                        load_rows,
+                        filtered_row_keys,
+                        lambda positions: fetch_full_rows(positions, result_columns)
+                    )
+                else:
+                    st.warning("⚠️ A reclassificação requer as colunas Nova Predição e objeto/todos_termos.")
+        
+        with tab4:
+            if tab4.open is not False:
+                result_columns = [col for col in HISTORY_RESULT_COLUMNS if col in columns]
+                show_dataset_history(
+                    dataset_version,
+                    filtered_row_keys,
+                    lambda positions: fetch_full_rows(positions, result_columns)
+                )
+        
+        with tab5:
+            if tab5.open is not False:
+                show_help_tab()
+    
+    else:
+        st.markdown("""
+        <div class="alert-info">
+            <h3>👋 Bem-vindo ao Projeto Predição de Editais - CIC2025!</h3>
+            <p><strong>📊 Nossa base completa contém:</strong></p>
+            <ul style="margin: 1rem 0;">
+                <li><strong>52.429 editais</strong> analisados e classificados</li>
+                <li><strong>R$ 244 bilhões</strong> em valor total estimado</li>
+                <li><strong>729 unidades</strong> organizacionais mapeadas</li>
+                <li><strong>14 categorias</strong> originais + <strong>2 novas categorias</strong></li>
+            </ul>
+            
+            <p><strong>🚀 Para começar sua consulta:</strong></p>
+            <ol>
+                <li>📁 Selecione uma fonte de dados acima</li>
+                <li>🔍 Use os filtros avançados para encontrar informações específicas</li>
+                <li>📊 Explore as visualizações no dashboard</li>
+                <li>📥 Exporte os dados filtrados automaticamente</li>
+            </ol>
+            
+            <p><strong>🆕 Novidades da versão corrigida:</strong></p>
+            <ul>
+                <li>🔍 <strong>Busca Avançada</strong> com operadores lógicos (E, OU, NÃO)</li>
+                <li>📂 <strong>Filtros Containment</strong> para "Nova Predição"</li>
+                <li>🔄 <strong>Aplicação Sequencial</strong> de filtros múltiplos</li>
+                <li>📥 <strong>Exportação Automática</strong> em CSV/XLSX</li>
+            </ul>
+            
+            <p><strong>💡 Dica:</strong> Acesse a aba "📚 Ajuda" para instruções detalhadas sobre todas as funcionalidades!</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+if __name__ == "__main__":
+    if '--api' in sys.argv:
+        # Modo somente API: python App.py --api [porta]
+        args = [arg for arg in sys.argv[1:] if arg != '--api']
+        port = int(args[0]) if args else int(os.environ.get(API_PORT_ENV, 8765))
+        server = ThreadingHTTPServer((API_HOST, port), QueryApiHandler)
+        print(f"API de editais em http://{API_HOST}:{port}")
+        server.serve_forever()
+    else:
+        main()
+
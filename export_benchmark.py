@@ -0,0 +1,109 @@
+"""Benchmark dos formatos de exportação do App.py sobre a base completa
+
+Carrega uma planilha sintética do tamanho da base (servida localmente, pelo
+mesmo pipeline de fetch_data_from_sharepoint) e, para cada formato e
+compressão, mede o tempo de escrita (serialize_export), o tamanho do arquivo,
+o tempo de releitura com pandas e quantas colunas voltam com o mesmo tipo.
+
+Uso:
+    python export_benchmark.py --rows 52429 --repeat 3 --json resultado.json
+"""
+import argparse
+import io
+import json
+import time
+import warnings
+
+import pandas as pd
+
+from loadtest import make_synthetic_csv, serve_dataset
+
+def read_export(data, export_format):
+    """Relê o arquivo exportado com pandas/pyarrow"""
+    if export_format == 'CSV':
+        return pd.read_csv(io.BytesIO(data))
+    if export_format == 'XLSX':
+        return pd.read_excel(io.BytesIO(data))
+    if export_format == 'PARQUET':
+        return pd.read_parquet(io.BytesIO(data))
+    if export_format == 'FEATHER':
+        return pd.read_feather(io.BytesIO(data))
+
+    import pyarrow as pa
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+def best_of(repeat, fn):
+    """Menor tempo (s) de `repeat` execuções e o último resultado"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def run_benchmark(df, cases, repeat):
+    """Mede escrita, tamanho, releitura e tipos preservados de cada (formato, compressão)"""
+    import App
+
+    results = []
+    for export_format, compression in cases:
+        write_seconds, data = best_of(repeat, lambda: App.serialize_export(df, export_format, compression))
+        read_seconds, loaded = best_of(repeat, lambda: read_export(data, export_format))
+        same_dtypes = sum(
+            1 for col in df.columns
+            if col in loaded.columns and loaded[col].dtype == df[col].dtype
+        )
+        results.append({
+            'formato': export_format if compression is None else f"{export_format} ({compression})",
+            'escrita_s': round(write_seconds, 3),
+            'tamanho_mb': round(len(data) / 1024 / 1024, 2),
+            'leitura_s': round(read_seconds, 3),
+            'tipos_preservados': f"{same_dtypes}/{len(df.columns)}",
+        })
+        print(f"  {results[-1]['formato']}: escrita {write_seconds:.3f}s, {results[-1]['tamanho_mb']} MB", flush=True)
+    return results
+
+def print_report(results):
+    """Tabela comparativa dos formatos"""
+    header = f"{'formato':<20} {'escrita s':>10} {'tamanho MB':>11} {'leitura s':>10} {'tipos':>8}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(
+            f"{result['formato']:<20} {result['escrita_s']:>10} {result['tamanho_mb']:>11} "
+            f"{result['leitura_s']:>10} {result['tipos_preservados']:>8}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=52429, help="Linhas da planilha sintética (padrão: tamanho da base)")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções por medida (vale a menor)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--skip-xlsx', action='store_true', help="Não mede o XLSX (o mais lento)")
+    parser.add_argument('--json', help="Grava o resultado em JSON neste caminho")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    import App
+
+    server, url = serve_dataset(make_synthetic_csv(args.rows, args.seed))
+    df, error = App.fetch_data_from_sharepoint([url])
+    server.shutdown()
+    if error:
+        raise SystemExit(f"Falha ao carregar a planilha sintética: {error}")
+    df = df.drop(columns=[App.ROW_KEY_COLUMN])
+    df.attrs = {}
+    print(f"Base: {len(df):,} linhas × {len(df.columns)} colunas\n")
+
+    cases = [('CSV', None)] + ([] if args.skip_xlsx else [('XLSX', None)])
+    cases += [(fmt, compression) for fmt in App.COLUMNAR_EXPORT_FORMATS for compression in App.EXPORT_COMPRESSIONS]
+    results = run_benchmark(df, cases, max(args.repeat, 1))
+
+    print()
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'linhas': len(df), 'colunas': len(df.columns), 'resultados': results}, output, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
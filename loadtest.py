@@ -0,0 +1,332 @@
+"""Teste de carga do App.py com sessões simultâneas (streamlit.testing AppTest)
+
+Sobe um servidor HTTP local com uma planilha sintética (EDITAIS_SOURCE_URL),
+executa sessões realistas em paralelo - busca, filtros da sidebar,
+paginação, ordenação, dashboard e exportação - e reporta a latência dos
+reruns (p50/p95/p99) e o pico de memória (RSS) em concorrências crescentes.
+
+O AppTest não foi feito para rodar em paralelo: cada `run()` instala um
+Runtime simulado global e o remove ao terminar, derrubando as outras sessões
+("Runtime hasn't been created!"). `share_test_runtime()` mantém o último
+Runtime simulado como fallback enquanto o teste roda - como num servidor real,
+onde todas as sessões compartilham o mesmo Runtime. A compilação do script
+também é serializada: o `ast.parse` do CPython 3.11 falha quando chamado em
+paralelo ("AST constructor recursion depth mismatch").
+
+Uso:
+    python loadtest.py --levels 1,5,10,20,50 --rows 50000 --actions 10
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'App.py')
+
+CATEGORIAS = [
+    'EDUCAÇÃO', 'SAÚDE', 'TECNOLOGIA DA INFORMAÇÃO', 'SANEAMENTO', 'MOBILIDADE',
+    'SEGURANÇA PÚBLICA', 'DESENVOLVIMENTO', 'OBRAS', 'GOVERNANÇA', 'PESSOAL',
+    'DESESTATIZAÇÃO', 'OUTROS', 'RECEITA', 'PREVIDÊNCIA'
+]
+PALAVRAS = (
+    "aquisição de material escolar merenda pavimentação obra manutenção preventiva veículos "
+    "pregão eletrônico presencial serviços consultoria terceirizado medicamentos hospital posto "
+    "upa software licença computadores iluminação pública saneamento esgoto água limpeza urbana "
+    "coleta lixo transporte escolar combustível reforma escola creche"
+).split()
+COLUNAS = [
+    'Nova Classificação', 'Predição Antiga', 'classificacao_final - Copiar', 'predicao classificacao',
+    'ano', 'unidade', 'ente', 'objeto', 'objeto_processada', 'todos_termos',
+    'descricao situacao edital', 'data realizacao licitacao', 'Valor Estimado',
+    'pontuacao', 'pontuacao_final', 'observacoes'
+]
+# Termos digitados nas buscas das sessões
+TERMOS_BUSCA = ['escola', 'hospital', 'obra', 'software', 'lixo', 'transporte', 'merenda', 'pavimentação']
+
+def make_synthetic_csv(n_rows, seed=1):
+    """Planilha sintética (CSV) com o mesmo esquema da planilha do SharePoint"""
+    rng = random.Random(seed)
+    unidades = [f'PREFEITURA MUNICIPAL DE CIDADE {i}' for i in range(max(n_rows // 80, 10))]
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(COLUNAS)
+
+    for _ in range(n_rows):
+        categorias = rng.sample(CATEGORIAS, 1 if rng.random() < 0.84 else 2)
+        nova = '; '.join(categorias)
+        antiga = categorias[0] if rng.random() < 0.8 else rng.choice(CATEGORIAS)
+        objeto = ' '.join(rng.choice(PALAVRAS) for _ in range(rng.randint(5, 15)))
+        ano = rng.choice([2019, 2020, 2021, 2022, 2023, 2024])
+        writer.writerow([
+            nova, antiga, nova, antiga, ano, rng.choice(unidades), f'MUNICIPIO {rng.randint(0, 90)}',
+            objeto.capitalize(), objeto, ';'.join(objeto.split()[:5]),
+            rng.choice(['Publicado', 'Homologado', 'Cancelado']),
+            f'{ano}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            f'{rng.lognormvariate(12, 2):.2f}'.replace('.', ','),
+            f'{rng.random():.3f}'.replace('.', ','), f'{rng.random():.3f}'.replace('.', ','),
+            '' if rng.random() < 0.6 else 'revisado manualmente'
+        ])
+    return output.getvalue().encode('utf-8')
+
+def serve_dataset(body):
+    """Servidor HTTP local que devolve a planilha; retorna (servidor, URL)"""
+    class DatasetHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DatasetHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/editais.csv"
+
+def current_rss_bytes():
+    """RSS atual do processo (Linux: /proc/self/status; senão o pico)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return peak_rss_bytes()
+
+def peak_rss_bytes():
+    """Pico de RSS do processo desde o início"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class RssSampler:
+    """Amostra o RSS em segundo plano para medir o pico de cada nível"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+def share_test_runtime():
+    """Permite várias sessões AppTest simultâneas no mesmo processo"""
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    shared = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def locked_get_bytecode(self, script_path):
+        with compile_lock:
+            return get_bytecode(self, script_path)
+
+    def instance(cls):
+        if cls._instance is not None:
+            shared['runtime'] = cls._instance
+            return cls._instance
+        if 'runtime' in shared:
+            return shared['runtime']
+        raise RuntimeError("Runtime hasn't been created!")
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or 'runtime' in shared)
+    ScriptCache.get_bytecode = locked_get_bytecode
+
+def session_actions(rng, n_actions):
+    """Roteiro de uma sessão: lista de (nome, função que altera o AppTest)
+
+    Ações cujo widget não está na tela (ex.: ordenação com o Dashboard aberto)
+    levantam KeyError e são puladas, sem contar como rerun.
+    """
+    def type_search(key):
+        return lambda at: at.text_input(key=key).set_value(rng.choice(TERMOS_BUSCA))
+
+    def clear_search(at):
+        for key in ('search_and', 'search_or', 'search_not'):
+            at.text_input(key=key).set_value('')
+
+    def pick_sidebar(key):
+        def action(at):
+            widget = at.selectbox(key=key)
+            widget.set_value(rng.choice(widget.options[1:] or widget.options))
+        return action
+
+    def reset_sidebar(at):
+        at.selectbox(key='nova_predicao').set_value(at.selectbox(key='nova_predicao').options[0])
+
+    def next_page(at):
+        at.number_input[0].increment()
+
+    def sort_by_value(at):
+        at.selectbox(key='ordenar_por').set_value('Valor Estimado')
+
+    def open_tab(name):
+        def action(at):
+            at.session_state['aba_principal'] = name
+        return action
+
+    def export(at):
+        [button for button in at.button if button.label.startswith('📥 Exportar')][0].click()
+
+    choices = [
+        ('busca_e', type_search('search_and'), 4),
+        ('busca_ou', type_search('search_or'), 2),
+        ('busca_nao', type_search('search_not'), 1),
+        ('limpa_busca', clear_search, 2),
+        ('nova_predicao', pick_sidebar('nova_predicao'), 3),
+        ('limpa_sidebar', reset_sidebar, 1),
+        ('pagina', next_page, 3),
+        ('ordenacao', sort_by_value, 1),
+        ('dashboard', open_tab('📈 Dashboard'), 2),
+        ('tabela', open_tab('📊 Análise de Dados'), 2),
+        ('exportacao', export, 1),
+    ]
+    names, actions, weights = zip(*choices)
+    picked = rng.choices(range(len(choices)), weights=weights, k=n_actions)
+    return [(names[i], actions[i]) for i in picked]
+
+def run_session(session_id, n_actions, timeout, seed):
+    """Executa uma sessão e retorna [(ação, segundos, erro ou None)]"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 1000 + session_id)
+    results = []
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    started = time.perf_counter()
+    at.run()
+    results.append(('abertura', time.perf_counter() - started, first_exception(at)))
+
+    for name, action in session_actions(rng, n_actions):
+        try:
+            action(at)
+        except (KeyError, IndexError):
+            continue
+        try:
+            started = time.perf_counter()
+            at.run()
+            results.append((name, time.perf_counter() - started, first_exception(at)))
+        except Exception as e:
+            results.append((name, None, f"{type(e).__name__}: {e}"))
+    return results
+
+def first_exception(at):
+    """Mensagem da primeira exceção exibida pelo app (None se não houver)"""
+    return at.exception[0].message if len(at.exception) else None
+
+def run_level(concurrency, n_actions, timeout, seed):
+    """Roda `concurrency` sessões simultâneas; retorna o resumo do nível"""
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            sessions = list(pool.map(
+                lambda session_id: run_session(session_id, n_actions, timeout, seed),
+                range(concurrency)
+            ))
+        elapsed = time.perf_counter() - started
+
+    reruns = [result for session in sessions for result in session]
+    latencies = np.array([seconds for _, seconds, error in reruns if seconds is not None and error is None])
+    errors = [error for _, _, error in reruns if error is not None]
+    percentiles = np.percentile(latencies, [50, 95, 99]) * 1000 if len(latencies) else [float('nan')] * 3
+
+    by_action = {}
+    for name, seconds, error in reruns:
+        if seconds is not None and error is None:
+            by_action.setdefault(name, []).append(seconds)
+
+    return {
+        'concorrencia': concurrency,
+        'reruns': len(reruns),
+        'erros': len(errors),
+        'p50_ms': round(float(percentiles[0]), 1),
+        'p95_ms': round(float(percentiles[1]), 1),
+        'p99_ms': round(float(percentiles[2]), 1),
+        'max_ms': round(float(latencies.max() * 1000), 1) if len(latencies) else None,
+        'reruns_por_s': round(len(reruns) / elapsed, 2) if elapsed else None,
+        'pico_rss_mb': round(sampler.peak / 1024 / 1024, 1),
+        'p95_por_acao_ms': {name: round(float(np.percentile(values, 95) * 1000), 1) for name, values in sorted(by_action.items())},
+        'exemplos_erros': sorted(set(errors))[:3],
+    }
+
+def print_report(levels):
+    """Tabela de resultados por nível de concorrência"""
+    header = f"{'sessões':>8} {'reruns':>7} {'erros':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'reruns/s':>9} {'pico RSS':>10}"
+    print(header)
+    print('-' * len(header))
+    for level in levels:
+        print(
+            f"{level['concorrencia']:>8} {level['reruns']:>7} {level['erros']:>6} {level['p50_ms']:>9} "
+            f"{level['p95_ms']:>9} {level['p99_ms']:>9} {level['max_ms']:>9} {level['reruns_por_s']:>9} "
+            f"{level['pico_rss_mb']:>7} MB"
+        )
+    for level in levels:
+        print(f"\np95 por ação com {level['concorrencia']} sessões: {level['p95_por_acao_ms']}")
+        for error in level['exemplos_erros']:
+            print(f"  erro: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', default='1,5,10,20', help="Concorrências testadas, em ordem (ex.: 1,5,10,20,50)")
+    parser.add_argument('--rows', type=int, default=20000, help="Linhas da planilha sintética")
+    parser.add_argument('--actions', type=int, default=8, help="Ações (reruns) por sessão, além da abertura")
+    parser.add_argument('--timeout', type=float, default=300, help="Tempo máximo de um rerun, em segundos")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--backend', choices=['pandas', 'duckdb'], help="Valor de EDITAIS_BACKEND durante o teste")
+    parser.add_argument('--json', help="Grava o resultado em JSON neste caminho")
+    args = parser.parse_args()
+
+    share_test_runtime()
+    server, url = serve_dataset(make_synthetic_csv(args.rows, args.seed))
+    os.environ['EDITAIS_SOURCE_URL'] = url
+    if args.backend:
+        os.environ['EDITAIS_BACKEND'] = args.backend
+
+    print(f"Planilha sintética: {args.rows:,} linhas em {url}")
+    # Aquecimento: a primeira carga (download, parsing e índices) não entra nas medidas
+    started = time.perf_counter()
+    run_session(0, 0, args.timeout, args.seed)
+    print(f"Aquecimento (carga dos dados): {time.perf_counter() - started:.1f}s\n")
+
+    levels = []
+    for concurrency in [int(level) for level in args.levels.split(',') if level.strip()]:
+        levels.append(run_level(concurrency, args.actions, args.timeout, args.seed))
+        print(f"{concurrency} sessões: p95 {levels[-1]['p95_ms']} ms, pico RSS {levels[-1]['pico_rss_mb']} MB", flush=True)
+
+    print()
+    print_report(levels)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'linhas': args.rows, 'acoes_por_sessao': args.actions, 'niveis': levels}, output, ensure_ascii=False, indent=2)
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
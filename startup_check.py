@@ -0,0 +1,147 @@
+"""Tempo de abertura do App.py: importações e primeira renderização
+
+Executa o app em um interpretador novo com `python -X importtime`, sobre uma
+planilha sintética servida localmente (a mesma do loadtest.py). O streamlit é
+importado antes da medição, como no servidor; só entra no relatório o que o
+próprio app importa e executa. O relatório mostra:
+- os módulos importados pelo app, pelo tempo acumulado de cada importação;
+- o tempo até a primeira renderização completa (mediana das repetições);
+- os módulos adiados (plotly, openpyxl) carregados já na abertura.
+
+Sai com código 1 se a mediana passar do orçamento (--budget-ms ou
+EDITAIS_STARTUP_BUDGET_MS) ou se um módulo adiado for importado na abertura.
+
+Uso:
+    python startup_check.py --budget-ms 5000 --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+STARTUP_BUDGET_ENV = 'EDITAIS_STARTUP_BUDGET_MS'
+DEFAULT_BUDGET_MS = 5000
+# Só o dashboard e a exportação XLSX precisam destes módulos
+DEFERRED_MODULES = ['plotly.express', 'plotly.graph_objects', 'plotly.io', 'openpyxl']
+# Marca no stderr a partir da qual as importações são do app
+APP_MARKER = '--- importações do app ---'
+
+def run_child(rows, seed):
+    """Processo filho: abre o app uma vez e imprime as medidas em JSON"""
+    from loadtest import make_synthetic_csv, serve_dataset
+
+    server, url = serve_dataset(make_synthetic_csv(rows, seed))
+    os.environ['EDITAIS_SOURCE_URL'] = url
+    # Só a abertura: o pré-aquecimento das consultas frequentes roda depois, em segundo plano
+    os.environ['EDITAIS_PREWARM_TOP'] = '0'
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'App.py')
+    at = AppTest.from_file(app_path, default_timeout=300)
+    print(APP_MARKER, file=sys.stderr, flush=True)
+    started = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    print(json.dumps({
+        'primeira_renderizacao_ms': round(elapsed * 1000, 1),
+        'erros': [exception.message for exception in at.exception],
+    }))
+
+def parse_importtime(stderr):
+    """Linhas do -X importtime depois da marca: [(módulo, próprio µs, acumulado µs, nível)]"""
+    imports = []
+    after_marker = False
+    for line in stderr.splitlines():
+        if line.strip() == APP_MARKER:
+            after_marker = True
+            continue
+        if not after_marker or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+def measure_once(rows, seed):
+    """Abre o app num interpretador novo; retorna (medidas, importações)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', '--rows', str(rows), '--seed', str(seed)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao abrir o app:\n{result.stderr[-2000:]}")
+    measures = json.loads(result.stdout.strip().splitlines()[-1])
+    return measures, parse_importtime(result.stderr)
+
+def print_import_report(imports, top):
+    """Importações de primeiro nível feitas pelo app, da mais lenta à mais rápida"""
+    top_level = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: -entry[2])
+    total_ms = sum(entry[2] for entry in top_level) / 1000
+    print(f"Importações feitas pelo app: {len(imports)} módulos, {total_ms:.1f} ms no total\n")
+    print(f"{'acumulado ms':>13} {'próprio ms':>11}  módulo")
+    for name, self_us, cumulative_us, _ in top_level[:top]:
+        print(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>11.1f}  {name}")
+    return total_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get(STARTUP_BUDGET_ENV, DEFAULT_BUDGET_MS)),
+                        help=f"Orçamento da primeira renderização, em ms (padrão: {STARTUP_BUDGET_ENV} ou {DEFAULT_BUDGET_MS})")
+    parser.add_argument('--repeat', type=int, default=3, help="Aberturas medidas (cada uma num interpretador novo)")
+    parser.add_argument('--rows', type=int, default=2000, help="Linhas da planilha sintética")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--top', type=int, default=15, help="Importações listadas no relatório")
+    parser.add_argument('--json', help="Grava o resultado em JSON neste caminho")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.rows, args.seed)
+        return
+
+    runs = [measure_once(args.rows, args.seed) for _ in range(max(args.repeat, 1))]
+    timings = sorted(measures['primeira_renderizacao_ms'] for measures, _ in runs)
+    median_ms = timings[len(timings) // 2]
+    measures, imports = runs[-1]
+
+    import_ms = print_import_report(imports, args.top)
+    imported = {name for name, _, _, _ in imports}
+    deferred = [name for name in DEFERRED_MODULES if name in imported]
+    errors = sorted({error for measures, _ in runs for error in measures['erros']})
+
+    print(f"\nPrimeira renderização ({args.rows:,} linhas): mediana {median_ms:.0f} ms "
+          f"em {len(timings)} aberturas ({', '.join(f'{timing:.0f}' for timing in timings)} ms)")
+    print(f"Orçamento: {args.budget_ms:.0f} ms")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"primeira renderização acima do orçamento ({median_ms:.0f} > {args.budget_ms:.0f} ms)")
+    if deferred:
+        failures.append(f"módulos adiados importados na abertura: {', '.join(deferred)}")
+    if errors:
+        failures.append(f"exceções na abertura: {'; '.join(errors)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({
+                'linhas': args.rows,
+                'aberturas_ms': timings,
+                'mediana_ms': median_ms,
+                'orcamento_ms': args.budget_ms,
+                'importacoes_ms': round(import_ms, 1),
+                'modulos_adiados_importados': deferred,
+                'falhas': failures,
+            }, output, ensure_ascii=False, indent=2)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Abertura dentro do orçamento")
+
+if __name__ == '__main__':
+    main()